@@ -5,7 +5,8 @@ PyConform - Command-Line Interface
 This command-line tool is designed to run PyConform, given a "standardization file" (a
 JSON-formatted file specifying the output variables, files and formats, and how to construct
 the output variables from input variables) and a collection of "input NetCDF files" containing
-the data to be standardized.
+the data to be standardized.  Multiple standardization files can be given, in which case the
+input files are scanned once and all of their output files are written together in one run.
 
 COPYRIGHT: 2017-2020, University Corporation for Atmospheric Research
 LICENSE: See the LICENSE.rst file for details
@@ -15,16 +16,19 @@ from argparse import ArgumentParser, ArgumentTypeError
 from collections import OrderedDict
 from glob import glob
 from imp import load_source
+from json import dump as json_dump
 from json import load as json_load
 from os.path import exists
 from warnings import simplefilter
 
-from asaptools.partition import Duplicate
+from asaptools.partition import Duplicate, WeightBalanced
 from asaptools.simplecomm import create_comm
 
-from pyconform.dataflow import DataFlow
+from pyconform.dataflow import DataFlow, execute_dataflows, group_files
 from pyconform.datasets import InputDatasetDesc, OutputDatasetDesc
 from pyconform.flownodes import ValidationWarning
+from pyconform.profiling import Profiler
+from pyconform.tracing import Tracer, span
 
 
 def chunk(arg):
@@ -36,6 +40,37 @@ def chunk(arg):
         raise ArgumentTypeError("Chunks must be formatted as 'name,size'")
 
 
+def output_datasets(specs):
+    """
+    Create the output dataset descriptors of multiple standardization files
+
+    The variables of each standardization file are kept in a separate output dataset, so the
+    same variable name can be specified differently (or written to different files) in different
+    standardization files.  Only the output files must be unique across all of them.
+
+    Parameters:
+        specs (OrderedDict): The contents of each standardization file, by file name
+
+    Returns:
+        OrderedDict: The output dataset descriptor of each standardization file, by file name
+    """
+    outdss = OrderedDict()
+    owners = {}
+    for sname, spec in specs.items():
+        outds = OutputDatasetDesc(name=sname, dsdict=spec)
+        for fname in outds.files:
+            if fname in owners:
+                raise ValueError(
+                    (
+                        "Output file {!r} is written by both standardization files {!r} "
+                        "and {!r}"
+                    ).format(fname, owners[fname], sname)
+                )
+            owners[fname] = sname
+        outdss[sname] = outds
+    return outdss
+
+
 def cli(argv=None):
     desc = """This is the PyConform command-line tool.  This scripts takes
               input from the command-line and a predefined output
@@ -86,11 +121,37 @@ def cli(argv=None):
     parser.add_argument(
         "-f",
         "--stdfile",
-        default=None,
+        dest="stdfiles",
+        default=[],
         metavar="STANDARDIZATION",
+        action="append",
         type=str,
         help=(
-            "JSON-formatted standardization (output specification) file " "[REQUIRED]"
+            "JSON-formatted standardization (output specification) file.  Multiple "
+            "standardization files can be given, which are written against the same "
+            "input files in one run [REQUIRED]"
+        ),
+    )
+    parser.add_argument(
+        "--fanout",
+        default=0,
+        metavar="NFILES",
+        type=int,
+        help=(
+            "Maximum number of output files reading the same input data to write "
+            "together, so that each chunk of input data needed by several of them is "
+            "read only once (0 writes one file at a time) [Default: 0]"
+        ),
+    )
+    parser.add_argument(
+        "--fanout-memory",
+        dest="fanout_memory",
+        default=None,
+        metavar="MB",
+        type=float,
+        help=(
+            "Approximate maximum size of the input data read per chunk for the output "
+            "files written together [Default: no limit]"
         ),
     )
     parser.add_argument(
@@ -115,6 +176,40 @@ def cli(argv=None):
             "at execution time [Default: False]"
         ),
     )
+    parser.add_argument(
+        "-p",
+        "--prefetch",
+        default=0,
+        metavar="DEPTH",
+        type=int,
+        help=(
+            "Number of chunks of input data to read ahead in a background thread "
+            "while the current chunk is computed and written [Default: 0]"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="FILE",
+        type=str,
+        help=(
+            "JSON file in which to write the calls, time, bytes and peak memory of "
+            "each data flow node and the time spent on each output file, summed over "
+            "all ranks, and print the nodes taking the most time [Default: None]"
+        ),
+    )
+    parser.add_argument(
+        "-r",
+        "--resume",
+        default=False,
+        action="store_true",
+        help=(
+            "Whether to skip output files completely written by a previous run with "
+            "this option and the same specification, and to record the specification "
+            "in each output file written so that later runs can skip it "
+            "[Default: False]"
+        ),
+    )
     parser.add_argument(
         "-s",
         "--serial",
@@ -124,6 +219,19 @@ def cli(argv=None):
             "Whether to run in serial (True) or parallel " "(False). [Default: False]"
         ),
     )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        metavar="FILE",
+        type=str,
+        help=(
+            "JSON file in which to write a timeline of the execution on all ranks "
+            "(reading the input headers, building the data flow, and opening, reading, "
+            "computing, writing and closing each output file), in the Chrome trace "
+            "event format viewable with chrome://tracing or ui.perfetto.dev "
+            "[Default: None]"
+        ),
+    )
     parser.add_argument(
         "infiles",
         metavar="INFILE",
@@ -146,28 +254,39 @@ def main(argv=None):
     # Create the necessary SimpleComm
     scomm = create_comm(serial=args.serial)
 
+    # Trace the timeline of the execution on each node, if requested
+    tracer = Tracer(rank=scomm.get_rank()) if args.trace is not None else None
+    if tracer is not None:
+        tracer.start()
+
     # Do setup only on manager node
     if scomm.is_manager():
 
-        # Check that the specfile exists
-        if not exists(args.stdfile):
-            raise OSError(
-                ("Output specification file {!r} not " "found").format(args.stdfile)
-            )
-
-        # Read the specfile into a dictionary
-        print("Reading standardization file: {}".format(args.stdfile))
-        dsdict = json_load(open(args.stdfile, "r"), object_pairs_hook=OrderedDict)
-
-        # Parse the output Dataset
-        print("Creating output dataset descriptor from standardization file...")
-        outds = OutputDatasetDesc(dsdict=dsdict)
+        # Check that the specfiles exist
+        if len(args.stdfiles) == 0:
+            raise ValueError("No output specification file given")
+        for stdfile in args.stdfiles:
+            if not exists(stdfile):
+                raise OSError(
+                    ("Output specification file {!r} not " "found").format(stdfile)
+                )
+
+        # Read the specfiles
+        specs = OrderedDict()
+        for stdfile in args.stdfiles:
+            print("Reading standardization file: {}".format(stdfile))
+            with open(stdfile, "r") as fobj:
+                specs[stdfile] = json_load(fobj, object_pairs_hook=OrderedDict)
+
+        # Parse the output Datasets
+        print("Creating output dataset descriptors from standardization files...")
+        outdss = output_datasets(specs)
 
     else:
-        outds = None
+        outdss = None
 
-    # Send the output descriptor to all nodes
-    outds = scomm.partition(outds, func=Duplicate(), involved=True)
+    # Send the output descriptors to all nodes
+    outdss = scomm.partition(outdss, func=Duplicate(), involved=True)
 
     # Sync
     scomm.sync()
@@ -182,7 +301,7 @@ def main(argv=None):
 
         # If no input files, stop here
         if len(infiles) == 0:
-            print("Standardization file validated.")
+            print("Standardization files validated.")
             return
 
         # Parse the input Dataset
@@ -191,7 +310,8 @@ def main(argv=None):
                 len(infiles)
             )
         )
-        inpds = InputDatasetDesc(filenames=infiles)
+        with span("header scan", files=len(infiles)):
+            inpds = InputDatasetDesc(filenames=infiles)
 
     else:
         inpds = None
@@ -211,20 +331,96 @@ def main(argv=None):
         for i, modpath in enumerate(args.module):
             load_source("user{}".format(i), modpath)
 
-    # Setup the PyConform data flow on all nodes
+    # Setup the complete PyConform data flow of each output dataset on the manager node only
     if scomm.is_manager():
-        print("Creating the data flow...")
-    dataflow = DataFlow(inpds, outds)
-
-    # Execute the data flow (write to files)
-    history = not args.no_history
-    dataflow.execute(
-        chunks=dict(args.chunks),
-        scomm=scomm,
-        history=history,
-        deflate=args.deflate,
-        debug=args.debug,
+        plans = OrderedDict()
+        for stdfile, outds in outdss.items():
+            print("Creating the data flow of {}...".format(stdfile))
+            with span("flow build", stdfile=stdfile):
+                dataflow = DataFlow(inpds, outds)
+            plan = dataflow.plan
+
+            # Balance only the remaining output files across all nodes, if resuming
+            if args.resume:
+                complete = set(dataflow.complete_files())
+                print("Skipping {} completed output files.".format(len(complete)))
+                plan.filesizes = OrderedDict(
+                    (f, s) for f, s in plan.filesizes.items() if f not in complete
+                )
+            plans[stdfile] = plan
+
+    else:
+        plans = None
+
+    # Send the data flow plans to all nodes
+    plans = scomm.partition(plans, func=Duplicate(), involved=True)
+
+    # Group the output files of all output datasets together, so that files of different
+    # output datasets reading the same input data are written together, and partition the
+    # groups over all nodes
+    chunks = OrderedDict(args.chunks)
+    fanout_memory = None
+    if args.fanout_memory is not None:
+        fanout_memory = int(args.fanout_memory * 1048576)
+    groups = group_files(
+        plans.values(), chunks=chunks, fanout=args.fanout, memory=fanout_memory
     )
+    filesizes = {}
+    for plan in plans.values():
+        filesizes.update(plan.filesizes)
+    weights = [(tuple(g), sum(filesizes[f] for f in g)) for g in groups]
+    groups = [
+        list(g) for g in scomm.partition(weights, func=WeightBalanced(), involved=True)
+    ]
+
+    # Setup the part of each data flow needed to write the files of these groups on each node
+    fnames = set(f for g in groups for f in g)
+    dataflows = OrderedDict()
+    for stdfile, plan in plans.items():
+        files = [f for f in plan.filesizes if f in fnames]
+        with span("flow build", stdfile=stdfile, files=len(files)):
+            dataflows[stdfile] = DataFlow(
+                inpds, outdss[stdfile], plan=plan, files=files
+            )
+
+    # Profile the data flow nodes, if requested
+    profiler = Profiler() if args.profile is not None else None
+    if profiler is not None:
+        profiler.start()
+
+    # Execute the data flows (write to files) together
+    with span("execute"):
+        execute_dataflows(
+            list(dataflows.values()),
+            chunks=chunks,
+            scomm=scomm,
+            history=not args.no_history,
+            deflate=args.deflate,
+            debug=args.debug,
+            prefetch=args.prefetch,
+            resume=args.resume,
+            fanout=args.fanout,
+            fanout_memory=fanout_memory,
+            groups=groups,
+        )
+
+    # Gather the profile of all nodes on the manager, and report it
+    if profiler is not None:
+        profiler.stop()
+        records = profiler.gather(scomm)
+        if scomm.is_manager():
+            print(Profiler.report(records))
+            with open(args.profile, "w") as fobj:
+                json_dump(records, fobj, indent=4)
+            print("Profile written to: {}".format(args.profile))
+
+    # Gather the timeline of all nodes on the manager, and write it
+    if tracer is not None:
+        tracer.stop()
+        events = tracer.gather(scomm)
+        if scomm.is_manager():
+            Tracer.write(events, args.trace)
+            print("Trace written to: {}".format(args.trace))
 
 
 if __name__ == "__main__":
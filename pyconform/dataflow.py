@@ -16,6 +16,7 @@ Copyright 2017-2020, University Corporation for Atmospheric Research
 LICENSE: See the LICENSE.rst file for details
 """
 
+from collections import OrderedDict
 from warnings import warn
 
 import numpy
@@ -35,18 +36,71 @@ from pyconform.flownodes import (
 from pyconform.functions import find_function, find_operator
 from pyconform.parsing import FuncType, OpType, VarType, parse_definition
 from pyconform.physarray import PhysArray
+from pyconform.scheduling import ReadPrefetcher, ReadScheduler
 
 
 class VariableNotFoundError(ValueError):
     """Indicate if an input variable could not be found during construction"""
 
 
+def _write_stats_str_(vstats):
+    """
+    Return a string summarizing the write statistics of a single output variable
+
+    Parameters:
+        vstats (dict): Write statistics, as stored in WriteNode.write_stats
+    """
+    mbytes = vstats["bytes"] / 1048576.0
+    seconds = vstats["seconds"]
+    rate_str = "{:.2f} MB/s".format(mbytes / seconds) if seconds > 0 else "-- MB/s"
+    if vstats["storage"]:
+        ratio_str = "compression ratio {:.2f}".format(
+            vstats["bytes"] / float(vstats["storage"])
+        )
+    else:
+        ratio_str = "compression ratio unknown"
+    return "{:.2f} MB in {:.3f} s ({}), {}".format(mbytes, seconds, rate_str, ratio_str)
+
+
+class DataFlowPlan(object):
+    """
+    The results of constructing a complete DataFlow that do not depend on the FlowNodes
+
+    A DataFlowPlan is small and can be sent to other ranks, where it is used to construct a
+    DataFlow for only the output files written by that rank, without evaluating the metadata
+    of every output variable again.
+    """
+
+    def __init__(
+        self, i2omap, o2imap, sumlike_dimensions, filesizes, filedims, fileinputs
+    ):
+        """
+        Initializer
+
+        Parameters:
+            i2omap (dict): The input-to-output dimension name map
+            o2imap (dict): The output-to-input dimension name map
+            sumlike_dimensions (set): The output dimensions that cannot be chunked
+            filesizes (dict): The size of each output file that can be written, by name
+            filedims (dict): The sizes of the dimensions of each output file, by name
+            fileinputs (dict): The input data read by each output file, by name, as a
+                dictionary of the size in bytes and the dimension sizes of each input variable,
+                keyed by input file path and ReadNode label
+        """
+        self.i2omap = i2omap
+        self.o2imap = o2imap
+        self.sumlike_dimensions = sumlike_dimensions
+        self.filesizes = filesizes
+        self.filedims = filedims
+        self.fileinputs = fileinputs
+
+
 class DataFlow(object):
     """
     An object describing the flow of data from input to output
     """
 
-    def __init__(self, inpds, outds):
+    def __init__(self, inpds, outds, plan=None, files=None):
         """
         Initializer
 
@@ -55,6 +109,13 @@ class DataFlow(object):
                 parsing variable definitions
             outds (OutputDatasetDesc): The output dataset defining the output variables and
                 their definitions or data
+            plan (DataFlowPlan): The plan of a DataFlow constructed with the same input and
+                output datasets, used instead of computing the dimension maps from the metadata
+                of every output variable
+            files (list): The names of the output files (as returned by the plan's filesizes)
+                to construct the DataFlow for, in which case only the variables written to these
+                files are constructed and executing the DataFlow writes all of these files
+                (requires a plan)
         """
         # Input dataset
         if not isinstance(inpds, InputDatasetDesc):
@@ -66,32 +127,53 @@ class DataFlow(object):
             raise TypeError("Output dataset must be of OutputDatasetDesc type")
         self._ods = outds
 
+        # Plan and output files
+        if plan is not None and not isinstance(plan, DataFlowPlan):
+            raise TypeError("Data flow plan must be of DataFlowPlan type")
+        if files is not None and plan is None:
+            raise ValueError("A data flow plan is required to select output files")
+        self._local = files is not None
+
+        # Names of the output files and variables to construct
+        if files is None:
+            fnames = list(self._ods.files if plan is None else plan.filesizes)
+        else:
+            fnames = list(files)
+        vnames = self._find_file_variables_(fnames)
+
         # Create a dictionary of DataNodes from variables with non-string
         # definitions
         datnodes = self._create_data_nodes_()
 
         # Create a dictionary to store FlowNodes for variables with string
         # definitions
-        defnodes = self._create_definition_nodes_(datnodes)
+        defnodes = self._create_definition_nodes_(datnodes, vnames)
 
         # Compute the definition node info objects (zero-sized physarrays)
         definfos = self._compute_node_infos_(defnodes)
 
         # Construct the dimension map
-        self._i2omap, self._o2imap = self._compute_dimension_maps_(definfos)
+        if plan is None:
+            self._i2omap, self._o2imap = self._compute_dimension_maps_(definfos)
+        else:
+            self._i2omap, self._o2imap = plan.i2omap, plan.o2imap
+        self._set_output_dimensions_()
 
         # Create the map nodes
         defnodes = self._create_map_nodes_(defnodes, definfos)
 
         # Create the validate nodes for each valid output variable
-        self._valnodes = self._create_validate_nodes_(datnodes, defnodes)
+        self._valnodes = self._create_validate_nodes_(datnodes, defnodes, vnames)
 
         # Get the set of all sum-like dimensions (dimensions that cannot be
         # broken into chunks)
-        self._sumlike_dimensions = self._find_sumlike_dimensions_()
+        if plan is None:
+            self._sumlike_dimensions = self._find_sumlike_dimensions_()
+        else:
+            self._sumlike_dimensions = plan.sumlike_dimensions
 
         # Create the WriteNodes for each time-series output file
-        self._writenodes = self._create_write_nodes_()
+        self._writenodes = self._create_write_nodes_(fnames)
 
         # Compute the bytesizes of each output variable
         varsizes = self._compute_variable_sizes_()
@@ -99,6 +181,63 @@ class DataFlow(object):
         # Compute the file sizes for each output file
         self._filesizes = self._compute_file_sizes(varsizes)
 
+        # Store the plan of the complete data flow
+        if plan is None:
+            plan = DataFlowPlan(
+                self._i2omap,
+                self._o2imap,
+                self._sumlike_dimensions,
+                self._filesizes,
+                self._compute_file_dimensions_(),
+                self._compute_file_inputs_(),
+            )
+        self._plan = plan
+
+    @property
+    def plan(self):
+        """The plan of the complete DataFlow, used to construct DataFlows for subsets of files"""
+        return self._plan
+
+    def complete_files(self):
+        """
+        Names of the output files completely written by a previous execution with the same
+        specification (only files written with resume enabled can be recognized)
+        """
+        return [
+            fname for fname, wnode in self._writenodes.items() if wnode.is_complete()
+        ]
+
+    def _compute_file_dimensions_(self):
+        filedims = {}
+        for fname, wnode in self._writenodes.items():
+            filedims[fname] = dict(
+                (d, dd.size)
+                for vnode in wnode.inputs
+                for d, dd in self._ods.variables[vnode.label].dimensions.items()
+            )
+        return filedims
+
+    def _compute_file_inputs_(self):
+        fileinputs = {}
+        for fname, wnode in self._writenodes.items():
+            inputs = {}
+            for nd in iter_dfs(wnode):
+                if isinstance(nd, ReadNode):
+                    vdesc = self._ids.variables[nd.variable]
+                    idims = dict((d, dd.size) for d, dd in vdesc.dimensions.items())
+                    nbytes = vdesc.dtype.itemsize * int(
+                        numpy.prod(list(idims.values()))
+                    )
+                    inputs[(nd.filepath, nd.label)] = (nbytes, idims)
+            fileinputs[fname] = inputs
+        return fileinputs
+
+    def _find_file_variables_(self, fnames):
+        vnames = set()
+        for fname in fnames:
+            vnames.update(self._ods.files[fname].variables)
+        return vnames
+
     def _create_data_nodes_(self):
         datnodes = {}
         for vname in self._ods.variables:
@@ -114,11 +253,11 @@ class DataFlow(object):
                 datnodes[vname] = DataNode(varray)
         return datnodes
 
-    def _create_definition_nodes_(self, datnodes):
+    def _create_definition_nodes_(self, datnodes, vnames):
         defnodes = {}
         for vname in self._ods.variables:
             vdesc = self._ods.variables[vname]
-            if isinstance(vdesc.definition, str):
+            if vname in vnames and isinstance(vdesc.definition, str):
                 try:
                     pdef = parse_definition(vdesc.definition)
                     vnode = self._construct_flow_(pdef, datnodes=datnodes)
@@ -222,18 +361,19 @@ class DataFlow(object):
                 o2imap[out_dim] = inp_dim
                 i2omap[inp_dim] = out_dim
 
+        return i2omap, o2imap
+
+    def _set_output_dimensions_(self):
         # Now that we know how dimensions are mapped, compute the output
         # dimension sizes
         for dname, ddesc in self._ods.dimensions.items():
-            if dname in o2imap and o2imap[dname] in self._ids.dimensions:
-                idd = self._ids.dimensions[o2imap[dname]]
+            if dname in self._o2imap and self._o2imap[dname] in self._ids.dimensions:
+                idd = self._ids.dimensions[self._o2imap[dname]]
                 if (
                     ddesc.is_set() and ddesc.stringlen and ddesc.size < idd.size
                 ) or not ddesc.is_set():
                     ddesc.set(idd)
 
-        return i2omap, o2imap
-
     @property
     def dimension_map(self):
         """The internally generated input-to-output dimension name map"""
@@ -249,10 +389,12 @@ class DataFlow(object):
             mapnodes[vname] = MapNode(name, dnode, self._i2omap)
         return mapnodes
 
-    def _create_validate_nodes_(self, datnodes, defnodes):
+    def _create_validate_nodes_(self, datnodes, defnodes, vnames):
         valid_vars = tuple(datnodes.keys()) + tuple(defnodes.keys())
         valnodes = {}
         for vname in valid_vars:
+            if vname not in vnames:
+                continue
             vdesc = self._ods.variables[vname]
             vnode = datnodes[vname] if vname in datnodes else defnodes[vname]
 
@@ -281,9 +423,9 @@ class DataFlow(object):
             self._i2omap[d] for d in unmapped_sumlike_dimensions if d in self._i2omap
         )
 
-    def _create_write_nodes_(self):
+    def _create_write_nodes_(self, fnames):
         writenodes = {}
-        for fname in self._ods.files:
+        for fname in fnames:
             fdesc = self._ods.files[fname]
             vmissing = tuple(
                 vname for vname in fdesc.variables if vname not in self._valnodes
@@ -323,6 +465,10 @@ class DataFlow(object):
         scomm=None,
         deflate=None,
         debug=False,
+        prefetch=0,
+        resume=False,
+        fanout=0,
+        fanout_memory=None,
     ):
         """
         Execute the Data Flow
@@ -339,90 +485,321 @@ class DataFlow(object):
             scomm (SimpleComm): An externally created SimpleComm object to use for managing
                 parallel operation
             deflate (int): Override all output file deflate levels with given value
-            debug (bool): Whether to enable some rudimentary debugging features
+            debug (bool): Whether to enable some rudimentary debugging features, including
+                verification that every element of every output variable was written
+            prefetch (int): The number of chunks of input data to read ahead in a background
+                thread while the current chunk is computed and written (0 disables prefetching)
+            resume (bool): Whether to skip the output files completely written by a previous
+                execution with the same specification, and to write the signature of the
+                specification to each output file so that later executions can skip them
+            fanout (int): The maximum number of output files reading the same input data to
+                write together, reading each chunk of input data needed by several of them only
+                once (0 writes one file at a time)
+            fanout_memory (int): The approximate maximum number of bytes of input data read per
+                chunk for the output files written together (None for no limit)
         """
-        # Check chunks type
-        if not isinstance(chunks, dict):
-            raise TypeError("Chunks must be specified with a dictionary")
-
-        # Make sure that the specified chunking dimensions are valid
-        for odname, odsize in chunks.items():
-            if odname not in self._o2imap:
-                raise ValueError(
-                    "Cannot chunk over unknown output dimension {!r}".format(odname)
-                )
-            if not isinstance(odsize, int):
-                raise TypeError(
-                    ("Chunk size invalid for output dimension {!r}: " "{}").format(
-                        odname, odsize
-                    )
-                )
+        execute_dataflows(
+            [self],
+            chunks=chunks,
+            serial=serial,
+            history=history,
+            scomm=scomm,
+            deflate=deflate,
+            debug=debug,
+            prefetch=prefetch,
+            resume=resume,
+            fanout=fanout,
+            fanout_memory=fanout_memory,
+        )
 
-        # Check that we are not chunking over any "sum-like" dimensions
-        sumlike_chunk_dims = sorted(d for d in chunks if d in self._sumlike_dimensions)
-        if len(sumlike_chunk_dims) > 0:
-            if debug:
-                for d in sumlike_chunk_dims:
-                    chunks.pop(d)
-            else:
-                raise ValueError(
-                    'Cannot chunk over dimensions that are summed over (or "sum-like")'
-                    ": {}".format(", ".join(sumlike_chunk_dims))
-                )
 
-        # Create the simple communicator, if necessary
-        if scomm is None:
-            scomm = create_comm(serial=bool(serial))
-        elif isinstance(scomm, SimpleComm):
-            if scomm.is_manager():
-                print(
-                    "Inheriting SimpleComm object from parent.  (Ignoring serial argument.)"
+def group_files(plans, chunks={}, fanout=0, memory=None):
+    """
+    Group the output files of one or more DataFlows to be written together
+
+    Output files are grouped together only if they are chunked alike (i.e., the chunked output
+    dimensions have the same sizes and are mapped from the same input dimensions) and they read
+    some of the same input data (i.e., the same input variables over the same index ranges, such
+    as the same time range).  Each group is filled with the files sharing the most input data
+    with it, up to 'fanout' files and 'memory' bytes of input data read per chunk.
+
+    Parameters:
+        plans (list): The DataFlowPlans of the DataFlows whose output files are grouped
+        chunks (dict): A dictionary of output dimension names and chunk sizes
+        fanout (int): The maximum number of files in each group (0 puts each file in a group
+            of its own)
+        memory (int): The approximate maximum number of bytes of input data read per chunk for
+            the files of each group (None for no limit)
+
+    Returns:
+        list: The groups of output file names, each a list of file names
+    """
+    # The chunking of each file and the bytes of each of its inputs read per chunk
+    files = OrderedDict()
+    for plan in plans:
+        for fname in plan.filesizes:
+            fdims = plan.filedims[fname]
+            cdims = tuple(d for d in chunks if d in fdims)
+            key = tuple((d, fdims[d], plan.o2imap.get(d)) for d in cdims)
+            inputs = {}
+            for ikey, (nbytes, idims) in plan.fileinputs[fname].items():
+                nchunks = 1
+                for d in cdims:
+                    if plan.o2imap.get(d) in idims:
+                        nchunks *= -(-idims[plan.o2imap[d]] // chunks[d])
+                inputs[ikey] = nbytes / nchunks
+            files[fname] = (key, inputs)
+    if fanout == 0:
+        return [[fname] for fname in files]
+
+    # The files chunked alike reading each input
+    readers = {}
+    for fname, (key, inputs) in files.items():
+        for ikey in inputs:
+            readers.setdefault((key, ikey), []).append(fname)
+
+    # Start each group with the first file not grouped yet, and add the file sharing the most
+    # input data with the group until no more files share input data with it or fit in it
+    order = dict((fname, i) for i, fname in enumerate(files))
+    grouped = set()
+    groups = []
+    for first in files:
+        if first in grouped:
+            continue
+        key, inputs = files[first][0], dict(files[first][1])
+        group = [first]
+        grouped.add(first)
+        while len(group) < fanout:
+            best = None
+            for ikey in list(inputs):
+                for fname in readers[(key, ikey)]:
+                    if fname in grouped:
+                        continue
+                    finputs = files[fname][1]
+                    added = sum(b for k, b in finputs.items() if k not in inputs)
+                    if memory is not None and sum(inputs.values()) + added > memory:
+                        continue
+                    shared = [k for k in finputs if k in inputs]
+                    rank = (sum(inputs[k] for k in shared), len(shared), -order[fname])
+                    if best is None or rank > best[0]:
+                        best = (rank, fname)
+            if best is None:
+                break
+            group.append(best[1])
+            grouped.add(best[1])
+            inputs.update(files[best[1]][1])
+        groups.append(group)
+    return groups
+
+
+def execute_dataflows(
+    dataflows,
+    chunks={},
+    serial=False,
+    history=False,
+    scomm=None,
+    deflate=None,
+    debug=False,
+    prefetch=0,
+    resume=False,
+    fanout=0,
+    fanout_memory=None,
+    groups=None,
+):
+    """
+    Execute one or more Data Flows together
+
+    The output files of all of the Data Flows are grouped (see 'group_files') and the groups are
+    partitioned over the parallel ranks together, so that output files of different Data Flows
+    (e.g., constructed from different output specifications) reading the same input data can be
+    written together, with each chunk of the input data read only once.
+
+    Parameters:
+        dataflows (list): The DataFlows to execute
+        chunks (dict): A dictionary of output dimension names and chunk sizes (see
+            'DataFlow.execute')
+        serial (bool): Whether to run in serial (True) or parallel (False)
+        history (bool): Whether to write a history attribute generated during execution
+            for each variable in the file
+        scomm (SimpleComm): An externally created SimpleComm object to use for managing
+            parallel operation
+        deflate (int): Override all output file deflate levels with given value
+        debug (bool): Whether to enable some rudimentary debugging features
+        prefetch (int): The number of chunks of input data to read ahead in a background
+            thread while the current chunk is computed and written (0 disables prefetching)
+        resume (bool): Whether to skip the output files completely written by a previous
+            execution with the same specification, and to write the signature of the
+            specification to each output file so that later executions can skip them
+        fanout (int): The maximum number of output files reading the same input data to write
+            together (0 writes one file at a time)
+        fanout_memory (int): The approximate maximum number of bytes of input data read per
+            chunk for the output files written together (None for no limit)
+        groups (list): The groups of output files to write on this rank, as returned by
+            'group_files' for the plans of the complete DataFlows and partitioned over the ranks,
+            in which case the DataFlows must be constructed for the files of these groups only
+    """
+    # Check chunks type
+    if not isinstance(chunks, dict):
+        raise TypeError("Chunks must be specified with a dictionary")
+
+    # Check prefetch depth
+    if not isinstance(prefetch, int) or prefetch < 0:
+        raise ValueError(
+            "Prefetch depth must be a non-negative integer, not {!r}".format(prefetch)
+        )
+
+    # Check fan-out width
+    if not isinstance(fanout, int) or fanout < 0:
+        raise ValueError(
+            "Fan-out width must be a non-negative integer, not {!r}".format(fanout)
+        )
+
+    # Check that the data flows were constructed for this rank's files, if given its groups
+    if groups is not None and not all(df._local for df in dataflows):
+        raise ValueError("Groups of files require data flows constructed for them")
+
+    # Make sure that the specified chunking dimensions are valid
+    o2imap = {}
+    for df in dataflows:
+        for odname, idname in df._o2imap.items():
+            o2imap.setdefault(odname, idname)
+    for odname, odsize in chunks.items():
+        if odname not in o2imap:
+            raise ValueError(
+                "Cannot chunk over unknown output dimension {!r}".format(odname)
+            )
+        if not isinstance(odsize, int):
+            raise TypeError(
+                ("Chunk size invalid for output dimension {!r}: " "{}").format(
+                    odname, odsize
                 )
-        else:
-            raise TypeError("Communication object is not a SimpleComm!")
+            )
 
-        # Start general output
-        prefix = "[{}/{}]".format(scomm.get_rank(), scomm.get_size())
-        if scomm.is_manager():
-            print("Beginning execution of data flow...")
-            print("Mapping Input Dimensions to Output Dimensions:")
-            for d in sorted(self._i2omap):
-                print("   {} --> {}".format(d, self._i2omap[d]))
-            if len(chunks) > 0:
-                print("Chunking over Output Dimensions:")
-                for d in chunks:
-                    print("   {}: {}".format(d, chunks[d]))
-            else:
-                print("Not chunking output.")
+    # Check that we are not chunking over any "sum-like" dimensions
+    sumlike_dimensions = set()
+    for df in dataflows:
+        sumlike_dimensions.update(df._sumlike_dimensions)
+    sumlike_chunk_dims = sorted(d for d in chunks if d in sumlike_dimensions)
+    if len(sumlike_chunk_dims) > 0:
+        if debug:
+            for d in sumlike_chunk_dims:
+                chunks.pop(d)
+        else:
+            raise ValueError(
+                'Cannot chunk over dimensions that are summed over (or "sum-like")'
+                ": {}".format(", ".join(sumlike_chunk_dims))
+            )
 
-        # Partition the output files/variables over available parallel (MPI)
-        # ranks
-        fnames = scomm.partition(
-            list(self._filesizes.items()), func=WeightBalanced(), involved=True
-        )
+    # Create the simple communicator, if necessary
+    if scomm is None:
+        scomm = create_comm(serial=bool(serial))
+    elif isinstance(scomm, SimpleComm):
         if scomm.is_manager():
             print(
-                "Writing {} files across {} MPI processes.".format(
-                    len(self._filesizes), scomm.get_size()
-                )
+                "Inheriting SimpleComm object from parent.  (Ignoring serial argument.)"
             )
-        scomm.sync()
+    else:
+        raise TypeError("Communication object is not a SimpleComm!")
+
+    # Start general output
+    prefix = "[{}/{}]".format(scomm.get_rank(), scomm.get_size())
+    if scomm.is_manager():
+        print("Beginning execution of data flow...")
+        print("Mapping Input Dimensions to Output Dimensions:")
+        for d, od in sorted(
+            set((d, od) for df in dataflows for d, od in df._i2omap.items())
+        ):
+            print("   {} --> {}".format(d, od))
+        if len(chunks) > 0:
+            print("Chunking over Output Dimensions:")
+            for d in chunks:
+                print("   {}: {}".format(d, chunks[d]))
+        else:
+            print("Not chunking output.")
+
+    # The WriteNodes and sizes of the output files, and the data flows writing them
+    writenodes = OrderedDict()
+    filesizes = {}
+    fileflows = {}
+    for df in dataflows:
+        for fname, wnode in df._writenodes.items():
+            writenodes[fname] = wnode
+            filesizes[fname] = df._filesizes[fname]
+            fileflows[fname] = df
+
+    # Group the output files to write together, and partition the groups over available
+    # parallel (MPI) ranks, unless the data flows were constructed for this rank's files only,
+    # skipping the files already completed if resuming
+    if groups is None:
+        plans = [df._plan for df in dataflows]
+        groups = group_files(plans, chunks=chunks, fanout=fanout, memory=fanout_memory)
+        groups = [[f for f in group if f in writenodes] for group in groups]
+    if any(df._local for df in dataflows):
+        nfiles = sum(len(df._plan.filesizes) for df in dataflows)
+        if resume:
+            groups = [
+                [f for f in group if not writenodes[f].is_complete()]
+                for group in groups
+            ]
+        groups = [group for group in groups if len(group) > 0]
+    else:
+        if resume and scomm.is_manager():
+            complete = set(f for f, wn in writenodes.items() if wn.is_complete())
+            print("Skipping {} completed files.".format(len(complete)))
+            groups = [[f for f in group if f not in complete] for group in groups]
+        groups = [group for group in groups if len(group) > 0]
+        nfiles = sum(len(group) for group in groups)
+        weights = [(tuple(g), sum(filesizes[f] for f in g)) for g in groups]
+        groups = scomm.partition(weights, func=WeightBalanced(), involved=True)
+    fnames = [fname for group in groups for fname in group]
+    if scomm.is_manager():
+        print(
+            "Writing {} files across {} MPI processes.".format(nfiles, scomm.get_size())
+        )
+    scomm.sync()
 
-        # Standard output
-        print("{}: Writing {} files: {}".format(prefix, len(fnames), ", ".join(fnames)))
-        scomm.sync()
+    # Standard output
+    print("{}: Writing {} files: {}".format(prefix, len(fnames), ", ".join(fnames)))
+    scomm.sync()
 
-        # Loop over output files and write using given chunking
-        for fname in fnames:
+    # Loop over the groups of output files and write each group using given chunking
+    for group in groups:
+        for fname in group:
             print("{}: Writing file: {}".format(prefix, fname))
             if history:
-                self._writenodes[fname].enable_history()
+                writenodes[fname].enable_history()
             else:
-                self._writenodes[fname].disable_history()
-            self._writenodes[fname].execute(chunks=chunks, deflate=deflate)
-            print("{}: Finished writing file: {}".format(prefix, fname))
+                writenodes[fname].disable_history()
+            if resume:
+                writenodes[fname].enable_signature()
+            else:
+                writenodes[fname].disable_signature()
+
+        # Coalesce the reads of input variables from the same file, for all files of the group
+        dmap = {}
+        for fname in group:
+            for odname, idname in fileflows[fname]._o2imap.items():
+                dmap.setdefault(odname, idname)
+        if prefetch > 0:
+            scheduler = ReadPrefetcher(dmap, depth=prefetch)
+        else:
+            scheduler = ReadScheduler(dmap)
+
+        WriteNode.execute_group(
+            [writenodes[fname] for fname in group],
+            chunks=chunks,
+            deflate=deflate,
+            debug=debug,
+            scheduler=scheduler,
+        )
+        for fname in group:
+            print(
+                "{}: Finished writing file: {}".format(prefix, writenodes[fname].label)
+            )
+            for vname, vstats in writenodes[fname].write_stats.items():
+                print("{}:    {}: {}".format(prefix, vname, _write_stats_str_(vstats)))
 
-        scomm.sync()
-        if scomm.is_manager():
-            print("All output variables written.")
-            print()
+    scomm.sync()
+    if scomm.is_manager():
+        print("All output variables written.")
+        print()
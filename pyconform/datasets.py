@@ -30,13 +30,19 @@ def _group_by_name_(*descs):
     Return a dictionary of the objects elements, grouped by name
 
     This is a simple group-by implementation for the Desc objects, used when making the
-    objects unique by name.
+    objects unique by name.  Repeated references to the same object (such as a descriptor
+    shared by many files) are only included once, so that each distinct object is compared
+    only once.
 
     Parameters:
         descs: A list of Desc objects (with a 'name' attribute)
     """
     grp = OrderedDict()
+    seen = set()
     for desc in descs:
+        if id(desc) in seen:
+            continue
+        seen.add(id(desc))
         if desc.name in grp:
             grp[desc.name].append(desc)
         else:
@@ -44,6 +50,25 @@ def _group_by_name_(*descs):
     return grp
 
 
+# Types of attribute values that can be shared between copies of an attributes dictionary
+_IMMUTABLE_TYPES_ = (str, int, float, bool, type(None))
+
+
+def _copy_attributes_(attributes):
+    """
+    Copy an attributes dictionary
+
+    Dictionaries with only immutable (string, numeric or None) values are copied shallowly,
+    which is much faster than a deep copy.
+
+    Parameters:
+        attributes (dict): The attributes dictionary to copy
+    """
+    if all(type(v) in _IMMUTABLE_TYPES_ for v in attributes.values()):
+        return attributes.copy()
+    return deepcopy(attributes)
+
+
 def _is_list_of_type_(obj, typ):
     """
     Check that an object is a list/tuple of a given type
@@ -57,6 +82,48 @@ def _is_list_of_type_(obj, typ):
     return all([isinstance(o, typ) for o in obj])
 
 
+# Byte-order options accepted by NetCDF4 variable creation
+_ENDIANS_ = ("native", "little", "big")
+
+
+def _check_storage_(name, chunksizes=None, contiguous=None, shuffle=None, endian=None):
+    """
+    Check the on-disk storage settings of a file or variable descriptor
+
+    Parameters:
+        name (str): Name of the file or variable (for error messages)
+        chunksizes: None, 'auto', a dict of dimension names and chunk sizes, or a list/tuple
+            of chunk sizes
+        contiguous (bool): Whether to use contiguous storage (or None)
+        shuffle (bool): Whether to apply the shuffle filter (or None)
+        endian (str): Byte-order of the stored data (or None)
+    """
+    if chunksizes is not None and chunksizes != "auto":
+        if isinstance(chunksizes, dict):
+            csizes = list(chunksizes.values())
+        elif isinstance(chunksizes, (list, tuple)):
+            csizes = list(chunksizes)
+        else:
+            err_msg = (
+                "Chunk sizes for {!r} must be 'auto', a dict or a list, not {!r}"
+            ).format(name, chunksizes)
+            raise TypeError(err_msg)
+        if not all(isinstance(c, int) and c > 0 for c in csizes):
+            err_msg = "Chunk sizes for {!r} must be positive integers: {!r}".format(
+                name, chunksizes
+            )
+            raise ValueError(err_msg)
+    if contiguous is not None and not isinstance(contiguous, bool):
+        raise TypeError("Contiguous flag for {!r} must be a bool".format(name))
+    if shuffle is not None and not isinstance(shuffle, bool):
+        raise TypeError("Shuffle flag for {!r} must be a bool".format(name))
+    if endian is not None and endian not in _ENDIANS_:
+        err_msg = "Endianness for {!r} must be one of {}, not {!r}".format(
+            name, ", ".join(_ENDIANS_), endian
+        )
+        raise ValueError(err_msg)
+
+
 class DimensionDesc(object):
     """
     Descriptor for a dimension in a DatasetDesc
@@ -65,6 +132,8 @@ class DimensionDesc(object):
     unlimited.
     """
 
+    __slots__ = ("_name", "_size", "_unlimited", "_stringlen")
+
     def __init__(self, name, size=None, unlimited=False, stringlen=False):
         """
         Initializer
@@ -197,6 +266,20 @@ class VariableDesc(object):
     the data is contained in the variable declaration).
     """
 
+    __slots__ = (
+        "_name",
+        "_ntype",
+        "_dtype",
+        "_dimensions",
+        "_definition",
+        "_attributes",
+        "_chunksizes",
+        "_contiguous",
+        "_shuffle",
+        "_endian",
+        "_files",
+    )
+
     # Elemental NetCDF datatypes
     _NTYPES_ = (
         "byte",
@@ -228,7 +311,16 @@ class VariableDesc(object):
     )
 
     def __init__(
-        self, name, datatype=None, dimensions=(), definition=None, attributes={}
+        self,
+        name,
+        datatype=None,
+        dimensions=(),
+        definition=None,
+        attributes={},
+        chunksizes=None,
+        contiguous=None,
+        shuffle=None,
+        endian=None,
     ):
         """
         Initializer
@@ -239,6 +331,11 @@ class VariableDesc(object):
             dimensions (tuple): Tuple of DimensionDesc objects for the variable
             definition: String or data definition of variable
             attributes (dict): Dictionary of variable attributes
+            chunksizes: On-disk chunk sizes, given as 'auto', a list of sizes (one per
+                dimension) or a dict of dimension names and sizes (None inherits from the file)
+            contiguous (bool): Whether to store the variable contiguously (None inherits)
+            shuffle (bool): Whether to apply the shuffle filter (None inherits)
+            endian (str): Byte-order of the stored data (None inherits)
         """
         self._name = name
 
@@ -272,7 +369,29 @@ class VariableDesc(object):
         # Attributes are modifiable after the variable descriptor is constructed
         if not isinstance(attributes, dict):
             raise TypeError("Attributes for variable {!r} not dict".format(name))
-        self._attributes = deepcopy(attributes)
+        self._attributes = _copy_attributes_(attributes)
+
+        # Storage settings only apply to output variables, and are inherited when None
+        _check_storage_(
+            name,
+            chunksizes=chunksizes,
+            contiguous=contiguous,
+            shuffle=shuffle,
+            endian=endian,
+        )
+        if isinstance(chunksizes, (list, tuple)) and len(chunksizes) != len(
+            self._dimensions
+        ):
+            err_msg = (
+                "Chunk sizes {!r} do not match dimensions of variable {!r}".format(
+                    chunksizes, name
+                )
+            )
+            raise ValueError(err_msg)
+        self._chunksizes = chunksizes
+        self._contiguous = contiguous
+        self._shuffle = shuffle
+        self._endian = endian
 
         # Initially, no files are associated with the variables, but it is modifiable after construction
         self._files = {}
@@ -311,6 +430,26 @@ class VariableDesc(object):
         """Dictionary of file descriptors for files containing this variable"""
         return self._files
 
+    @property
+    def chunksizes(self):
+        """On-disk chunk sizes of the variable (None if inherited)"""
+        return self._chunksizes
+
+    @property
+    def contiguous(self):
+        """Whether the variable is stored contiguously (None if inherited)"""
+        return self._contiguous
+
+    @property
+    def shuffle(self):
+        """Whether the shuffle filter is applied to the variable (None if inherited)"""
+        return self._shuffle
+
+    @property
+    def endian(self):
+        """Byte-order of the variable's stored data (None if inherited)"""
+        return self._endian
+
     def __eq__(self, other):
         if not isinstance(other, VariableDesc):
             return False
@@ -420,6 +559,20 @@ class FileDesc(object):
     file, a dict of DimensionDesc objects, and a dict of VariableDesc objects.
     """
 
+    __slots__ = (
+        "_name",
+        "_format",
+        "_deflate",
+        "_chunksizes",
+        "_contiguous",
+        "_shuffle",
+        "_endian",
+        "_dimensions",
+        "_variables",
+        "_attributes",
+        "autoparse_time_variable",
+    )
+
     def __init__(
         self,
         name,
@@ -428,6 +581,10 @@ class FileDesc(object):
         variables=(),
         attributes={},
         autoparse_time_variable=None,
+        chunksizes=None,
+        contiguous=False,
+        shuffle=True,
+        endian="native",
     ):  # @ReservedAssignment
         """
         Initializer
@@ -442,6 +599,11 @@ class FileDesc(object):
             attributes (dict):  Dict of global attributes in the file
             autoparse_time_variable (str):  The name of an output variable that should be used
                 to represent the 'time' when autoparsing the output filename
+            chunksizes: Default on-disk chunk sizes of the variables in the file, given as 'auto'
+                or a dict of dimension names and sizes (None uses the NetCDF library defaults)
+            contiguous (bool): Whether to store uncompressed variables contiguously by default
+            shuffle (bool): Whether to apply the shuffle filter to variables by default
+            endian (str): Default byte-order of the stored data ('native', 'little' or 'big')
         """
         self._name = name
 
@@ -467,6 +629,23 @@ class FileDesc(object):
             )
         self._deflate = deflate
 
+        if isinstance(chunksizes, (list, tuple)):
+            err_msg = (
+                "Chunk sizes in file {!r} must be 'auto' or a dict of dimension sizes"
+            ).format(name)
+            raise TypeError(err_msg)
+        _check_storage_(
+            name,
+            chunksizes=chunksizes,
+            contiguous=contiguous,
+            shuffle=shuffle,
+            endian=endian,
+        )
+        self._chunksizes = chunksizes
+        self._contiguous = contiguous
+        self._shuffle = shuffle
+        self._endian = endian
+
         if not _is_list_of_type_(variables, VariableDesc):
             err_msg = (
                 "Variables in file {!r} must be a list or tuple of type " "VariableDesc"
@@ -491,7 +670,7 @@ class FileDesc(object):
                 "Attributes in file {!r} cannot be of type {!r}, needs to be a " "dict"
             ).format(name, type(attributes))
             raise TypeError(err_msg)
-        self._attributes = deepcopy(attributes)
+        self._attributes = _copy_attributes_(attributes)
 
         if autoparse_time_variable:
             if autoparse_time_variable not in self._variables:
@@ -521,6 +700,26 @@ class FileDesc(object):
         """Deflate level for variables in the file"""
         return self._deflate
 
+    @property
+    def chunksizes(self):
+        """Default on-disk chunk sizes for variables in the file"""
+        return self._chunksizes
+
+    @property
+    def contiguous(self):
+        """Whether variables in the file are stored contiguously by default"""
+        return self._contiguous
+
+    @property
+    def shuffle(self):
+        """Whether the shuffle filter is applied to variables in the file by default"""
+        return self._shuffle
+
+    @property
+    def endian(self):
+        """Default byte-order of the stored data in the file"""
+        return self._endian
+
     @property
     def attributes(self):
         """Dictionary of global attributes of the file"""
@@ -621,12 +820,16 @@ class DatasetDesc(object):
             dimensions.extend(fdesc.dimensions.values())
         self._dimensions = DimensionDesc.unique(dimensions)
 
+        # Variables shared by several files only need their dimensions replaced once
+        replaced = set()
         for fdesc in files:
             for dname in fdesc.dimensions:
                 fdesc.dimensions[dname] = self._dimensions[dname]
             for vdesc in fdesc.variables.values():
-                for dname in vdesc.dimensions:
-                    vdesc.dimensions[dname] = self._dimensions[dname]
+                if id(vdesc) not in replaced:
+                    replaced.add(id(vdesc))
+                    for dname in vdesc.dimensions:
+                        vdesc.dimensions[dname] = self._dimensions[dname]
 
         variables = []
         for fdesc in files:
@@ -766,7 +969,13 @@ class OutputDatasetDesc(DatasetDesc):
             one of 'NETCDF4', 'NETCDF4_CLASSIC', 'NETCDF3_CLASSIC', 'NETCDF3_64BIT_OFFSET' or
             'NETCDF3_64BIT_DATA'), a dictionary of 'attributes', and a list of 'metavars' specifying
             the names of other variables that should be added to the file, in addition to obvious
-            metadata variables and the variable containing the 'file' section.
+            metadata variables and the variable containing the 'file' section.  The 'file'
+            section may also give default 'chunksizes' ('auto' or a dictionary of dimension
+            names and sizes), 'contiguous', 'shuffle' and 'endian' storage settings.
+
+    Each 'variable' dictionary may also contain 'chunksizes' ('auto', a list of sizes or a
+    dictionary of dimension names and sizes), 'contiguous', 'shuffle' and 'endian' keys, which
+    override the storage settings of the files containing the variable.
     """
 
     _NC_TYPES_ = {
@@ -805,6 +1014,15 @@ class OutputDatasetDesc(DatasetDesc):
         # Initialize a dictionary of file sections
         files = {}
 
+        # Dimension descriptors shared by all variables with the same dimension settings
+        dimdescs = {}
+
+        def dimdesc(dname, size=None, stringlen=False):
+            key = (dname, size, stringlen)
+            if key not in dimdescs:
+                dimdescs[key] = DimensionDesc(dname, size=size, stringlen=stringlen)
+            return dimdescs[key]
+
         # Look over all variables in the dataset dictionary
         variables = OrderedDict()
         metavars = []
@@ -820,6 +1038,11 @@ class OutputDatasetDesc(DatasetDesc):
             if "datatype" in vdict:
                 vkwds["datatype"] = vdict["datatype"]
 
+            # Get the storage settings of the variable, otherwise inherited from the file
+            for skey in ("chunksizes", "contiguous", "shuffle", "endian"):
+                if skey in vdict:
+                    vkwds[skey] = vdict[skey]
+
             # Get either the 'definition' (string definition or data) of the variables
             def_wrn = ""
             if "definition" in vdict:
@@ -852,11 +1075,11 @@ class OutputDatasetDesc(DatasetDesc):
                 sldim = vdims[-1] if vkwds["datatype"] == "char" else None
                 if vshape is None:
                     vkwds["dimensions"] = tuple(
-                        DimensionDesc(d, stringlen=(sldim == d)) for d in vdims
+                        dimdesc(d, stringlen=(sldim == d)) for d in vdims
                     )
                 else:
                     vkwds["dimensions"] = tuple(
-                        DimensionDesc(d, size=s, stringlen=(sldim == d))
+                        dimdesc(d, size=s, stringlen=(sldim == d))
                         for d, s in zip(vdims, vshape)
                     )
             else:
@@ -896,6 +1119,10 @@ class OutputDatasetDesc(DatasetDesc):
                 if "deflate" in fdict:
                     files[fname]["deflate"] = fdict["deflate"]
 
+                for skey in ("chunksizes", "contiguous", "shuffle", "endian"):
+                    if skey in fdict:
+                        files[fname][skey] = fdict[skey]
+
                 if "autoparse_time_variable" in fdict:
                     files[fname]["autoparse_time_variable"] = fdict[
                         "autoparse_time_variable"
@@ -914,7 +1141,18 @@ class OutputDatasetDesc(DatasetDesc):
             else:
                 metavars.append(vname)
 
-        # Loop through all character type variables and get the
+        # Dimension names of the metadata variables that can be added to files (scalar
+        # variables are excluded and must be included as metadata explicitly)
+        metadims = OrderedDict()
+        for mvname in metavars:
+            if len(variables[mvname].dimensions) > 0:
+                metadims[mvname] = set(variables[mvname].dimensions)
+
+        # Names of the bounds and coordinates variables referenced by each variable, and the
+        # pairs of datatypes and file formats already validated
+        references = {}
+        validated = set()
+
         # Loop through all found files and create the file descriptors
         filedescs = []
         for fname, fdict in files.items():
@@ -931,42 +1169,20 @@ class OutputDatasetDesc(DatasetDesc):
                 for dname in vdesc.dimensions:
                     fdims.add(dname)
 
-            # Loop through all the variable names identified as metadata (i.e., no 'file')
-            for mvname in metavars:
-                if mvname not in fdict["variables"]:
-                    vdesc = variables[mvname]
-
-                    # Include this variable in the file only if all of its dimensions are included
-                    # (Scalar variables are excluded and must be included as metadata explicitly)
-                    if len(vdesc.dimensions) > 0 and set(
-                        vdesc.dimensions.keys()
-                    ).issubset(fdims):
-                        vlist[mvname] = vdesc
+            # Loop through all the variable names identified as metadata (i.e., no 'file'),
+            # and include them in the file only if all of their dimensions are included
+            for mvname, mvdims in metadims.items():
+                if mvname not in vlist and mvdims.issubset(fdims):
+                    vlist[mvname] = variables[mvname]
 
             # Loop through the current list of variables and check for any "bounds" or "coordinates" attributes
             mvnames = set()
             for vname in vlist:
-                vdesc = vlist[vname]
-                if "bounds" in vdesc.attributes:
-                    mvname = vdesc.attributes["bounds"]
-                    if mvname not in variables:
-                        raise ValueError(
-                            (
-                                "Variable {} references a bounds variable {} that is not "
-                                "found"
-                            ).format(vdesc.name, mvname)
-                        )
-                    mvnames.add(mvname)
-                if "coordinates" in vdesc.attributes:
-                    for mvname in vdesc.attributes["coordinates"].split():
-                        if mvname not in variables:
-                            raise ValueError(
-                                (
-                                    "Variable {} references a coordinates variable {} that is not "
-                                    "found"
-                                ).format(vdesc.name, mvname)
-                            )
-                        mvnames.add(mvname)
+                if vname not in references:
+                    references[vname] = OutputDatasetDesc._references_(
+                        vlist[vname], variables
+                    )
+                mvnames.update(references[vname])
 
             # Add the bounds and coordinates to the list of variables
             for mvname in mvnames:
@@ -982,8 +1198,11 @@ class OutputDatasetDesc(DatasetDesc):
                 vdesc = vlist[vname]
                 vdtype = vdesc.datatype
                 fformat = fdesc.format
+                if (vdtype, fformat) in validated:
+                    continue
                 try:
                     OutputDatasetDesc._validate_netcdf_type_(vdtype, fformat)
+                    validated.add((vdtype, fformat))
                 except:
                     vname = vdesc.name
                     raise ValueError(
@@ -999,6 +1218,38 @@ class OutputDatasetDesc(DatasetDesc):
         # Call the base class to run self-consistency checks
         super(OutputDatasetDesc, self).__init__(name, files=filedescs)
 
+    @staticmethod
+    def _references_(vdesc, variables):
+        """
+        Names of the bounds and coordinates variables referenced by a variable
+
+        Parameters:
+            vdesc (VariableDesc): The variable descriptor
+            variables (dict): All variable descriptors in the dataset
+        """
+        mvnames = []
+        if "bounds" in vdesc.attributes:
+            mvname = vdesc.attributes["bounds"]
+            if mvname not in variables:
+                raise ValueError(
+                    (
+                        "Variable {} references a bounds variable {} that is not "
+                        "found"
+                    ).format(vdesc.name, mvname)
+                )
+            mvnames.append(mvname)
+        if "coordinates" in vdesc.attributes:
+            for mvname in vdesc.attributes["coordinates"].split():
+                if mvname not in variables:
+                    raise ValueError(
+                        (
+                            "Variable {} references a coordinates variable {} that is not "
+                            "found"
+                        ).format(vdesc.name, mvname)
+                    )
+                mvnames.append(mvname)
+        return mvnames
+
     @staticmethod
     def _validate_netcdf_type_(t, f):
         """
@@ -9,9 +9,13 @@ LICENSE: See the LICENSE.rst file for details
 
 from collections import OrderedDict
 from datetime import datetime
+from hashlib import sha256
+from json import dumps as json_dumps
 from os import makedirs, rename
 from os.path import dirname, exists
+from time import time
 from warnings import warn
+from weakref import WeakKeyDictionary
 
 import numpy
 from cf_units import Unit, num2date
@@ -20,7 +24,12 @@ from netCDF4 import Dataset
 from pyconform.datasets import FileDesc, VariableDesc
 from pyconform.functions import Function
 from pyconform.indexing import align_index, index_str, index_tuple, join
+from pyconform.locking import NETCDF_LOCK
 from pyconform.physarray import CharArray, PhysArray
+from pyconform.tracing import span
+
+# First and last values of the time variables used to autoparse filenames, by time variable node
+_TIME_BOUNDS_ = WeakKeyDictionary()
 
 
 class ValidationWarning(Warning):
@@ -179,14 +188,11 @@ class ReadNode(FlowNode):
                 "File path not found for input variable: {!r}".format(variable.name)
             )
 
-        # Check that the variable exists in the file
-        with Dataset(self._filepath, "r") as ncfile:
-            if variable.name not in ncfile.variables:
-                raise OSError(
-                    "Variable {!r} not found in NetCDF file: {!r}".format(
-                        variable.name, self._filepath
-                    )
-                )
+        # Store the storage layout of the variable, as described by the file header (the
+        # variables of a file are described in the order in which they are stored)
+        self._dimensions0 = tuple(variable.dimensions)
+        self._shape0 = tuple(d.size for d in variable.dimensions.values())
+        self._varid = list(fdesc.variables).index(variable.name)
         self._variable = variable.name
 
         # Check if the index means "all"
@@ -201,6 +207,9 @@ class ReadNode(FlowNode):
         # Store the reading index
         self._index = index
 
+        # No read scheduler until one is attached
+        self._scheduler = None
+
         # Call the base class initializer
         if is_all:
             label = variable.name
@@ -208,70 +217,115 @@ class ReadNode(FlowNode):
             label = "{}[{}]".format(variable.name, index_str(index))
         super(ReadNode, self).__init__(label)
 
-    def __getitem__(self, index):
-        """
-        Read PhysArray from file
-        """
-        with Dataset(self._filepath, "r") as ncfile:
+    @property
+    def filepath(self):
+        """Path of the file from which the data is read"""
+        return self._filepath
 
-            # Get a reference to the variable
-            ncvar = ncfile.variables[self._variable]
+    @property
+    def variable(self):
+        """Name of the variable read from the file"""
+        return self._variable
 
-            # Get the attributes into a dictionary, for convenience
-            attrs = {a: ncvar.getncattr(a) for a in ncvar.ncattrs()}
+    @property
+    def varid(self):
+        """NetCDF variable ID in the file (i.e., the variable's order of storage in the file)"""
+        return self._varid
 
-            # Read the variable units
-            units_attr = attrs.get("units", 1)
-            calendar_attr = attrs.get("calendar", None)
-            try:
-                units = Unit(units_attr, calendar=calendar_attr)
-            except ValueError:
-                msg = "Units {!r} unrecognized in UDUNITS.  Assuming unitless.".format(
-                    units_attr
-                )
-                warn(msg, UnitsWarning)
-                units = Unit(1)
-            except:
-                raise
+    @property
+    def scheduler(self):
+        """The read scheduler providing coalesced reads for this ReadNode (or None)"""
+        return self._scheduler
 
-            # Read the original variable dimensions
-            dimensions0 = ncvar.dimensions
+    @scheduler.setter
+    def scheduler(self, scheduler):
+        self._scheduler = scheduler
 
-            # Read the original variable shape
-            shape0 = ncvar.shape
+    def _read_index_(self, index):
+        """
+        Compute the file-local index to read and the dimensions of the data read
 
-            # Align the read-indices on dimensions
-            index1 = align_index(self._index, dimensions0)
+        Parameters:
+            index: The index requested of the ReadNode
 
-            # Get the dimensions after application of the first index
-            dimensions1 = tuple(
-                d for d, i in zip(dimensions0, index1) if isinstance(i, slice)
-            )
+        Returns:
+            tuple: The joined (file-local) index and the dimensions of the data read
+        """
+        # Align the read-indices on dimensions
+        index1 = align_index(self._index, self._dimensions0)
+
+        # Get the dimensions after application of the first index
+        dimensions1 = tuple(
+            d for d, i in zip(self._dimensions0, index1) if isinstance(i, slice)
+        )
+
+        # Align the second index on the intermediate dimensions
+        index2 = align_index(index, dimensions1)
 
-            # Align the second index on the intermediate dimensions
-            index2 = align_index(index, dimensions1)
+        # Get the dimensions after application of the second index
+        dimensions2 = tuple(
+            d for d, i in zip(dimensions1, index2) if isinstance(i, slice)
+        )
 
-            # Get the dimensions after application of the second index
-            dimensions2 = tuple(
-                d for d, i in zip(dimensions1, index2) if isinstance(i, slice)
+        # Compute the joined index object
+        return join(self._shape0, index1, index2), dimensions2
+
+    def _read_(self, ncfile, index):
+        """
+        Read PhysArray from an open file
+
+        Parameters:
+            ncfile (Dataset): The open NetCDF file from which to read
+            index: The index requested of the ReadNode
+        """
+        # Get a reference to the variable
+        ncvar = ncfile.variables[self._variable]
+
+        # Get the attributes into a dictionary, for convenience
+        attrs = {a: ncvar.getncattr(a) for a in ncvar.ncattrs()}
+
+        # Read the variable units
+        units_attr = attrs.get("units", 1)
+        calendar_attr = attrs.get("calendar", None)
+        try:
+            units = Unit(units_attr, calendar=calendar_attr)
+        except ValueError:
+            msg = "Units {!r} unrecognized in UDUNITS.  Assuming unitless.".format(
+                units_attr
             )
+            warn(msg, UnitsWarning)
+            units = Unit(1)
+        except:
+            raise
 
-            # Compute the joined index object
-            index12 = join(shape0, index1, index2)
+        # Compute the joined index object and resulting dimensions
+        index12, dimensions2 = self._read_index_(index)
 
-            data = ncvar[index12]
+        data = ncvar[index12]
 
-            # Upconvert, if possible
-            if issubclass(ncvar.dtype.type, numpy.float) and ncvar.dtype.itemsize < 8:
-                data = data.astype(numpy.float64)
+        # Upconvert, if possible
+        if issubclass(ncvar.dtype.type, numpy.float) and ncvar.dtype.itemsize < 8:
+            data = data.astype(numpy.float64)
 
-            # Read the positive attribute, if available
-            pos = attrs.get("positive", None)
+        # Read the positive attribute, if available
+        pos = attrs.get("positive", None)
 
         return PhysArray(
             data, name=self.label, units=units, dimensions=dimensions2, positive=pos
         )
 
+    def __getitem__(self, index):
+        """
+        Read PhysArray from file
+        """
+        if index is not None and self._scheduler is not None:
+            data = self._scheduler.fetch(self, index)
+            if data is not None:
+                return data
+
+        with NETCDF_LOCK, Dataset(self._filepath, "r") as ncfile:
+            return self._read_(ncfile, index)
+
 
 class EvalNode(FlowNode):
     """
@@ -593,6 +647,12 @@ class WriteNode(FlowNode):
     method to write data efficiently once (and only once).
     """
 
+    # Target size (in bytes) of the on-disk chunks chosen with 'auto' chunking
+    _AUTO_CHUNK_BYTES_ = 1048576
+
+    # Name of the global attribute storing the signature of the file specification
+    _SIGNATURE_ATTRIBUTE_ = "pyconform_signature"
+
     def __init__(self, filedesc, inputs=()):
         """
         Initializer
@@ -644,10 +704,8 @@ class WriteNode(FlowNode):
                     ).format(filedesc.name, inp.label)
                 )
 
-        # Construct the proper filename
-        fname = self._autoparse_filename_(self.label)
-        self._label = fname
-        self._filedesc._name = fname
+        # Find the time variable used to autoparse the filename (parsed when executed)
+        self._tnode = self._find_time_node_(self.label)
         self._tmp_ext = ".tmp.nc"
 
         # Set the filehandle
@@ -659,64 +717,85 @@ class WriteNode(FlowNode):
         # Initialize set of unwritten attributes
         self._unwritten_attributes = {"_FillValue", "direction", "history"}
 
-    def _autoparse_filename_(self, fname):
+        # Whether to write the signature of the file specification to the file
+        self._signed = False
+
+        # Initialize the per-variable write statistics
+        self._write_stats = OrderedDict()
+
+    def _find_time_node_(self, fname):
         """
-        Determine if autoparsing the filename needs to be done
+        Find the input node of the time variable used to autoparse the filename, if needed
 
         Parameters:
             fname (str): The original name of the file
 
         Returns:
-            str: The new name for the file
+            FlowNode: The time variable node (None if no autoparsing can be done)
         """
 
-        if "{" in fname:
+        if "{" not in fname:
+            return None
 
-            possible_tvars = []
-            possible_inputs = list(self.inputs)
-            if self._filedesc.autoparse_time_variable:
-                possible_tvars.append(self._filedesc.autoparse_time_variable)
-                possible_inputs += self._hidden_inputs
-            else:
-                for var in self._filedesc.variables:
-                    vdesc = self._filedesc.variables[var]
-                    if var in ("time", "time1", "time2", "time3"):
-                        possible_tvars.append(var)
-                    elif (
-                        vdesc.cfunits().is_time_reference()
-                        and len(vdesc.dimensions) == 1
-                    ):
-                        possible_tvars.append(var)
-                    elif (
-                        "standard_name" in vdesc.attributes
-                        and vdesc.attributes["standard_name"] == "time"
-                    ):
-                        possible_tvars.append(var)
-                    elif "axis" in vdesc.attributes and vdesc.attributes["axis"] == "T":
-                        possible_tvars.append(var)
-            if len(possible_tvars) == 0:
-                msg = "Could not identify a time variable to autoparse filename {!r}".format(
+        possible_tvars = []
+        possible_inputs = list(self.inputs)
+        if self._filedesc.autoparse_time_variable:
+            possible_tvars.append(self._filedesc.autoparse_time_variable)
+            possible_inputs += self._hidden_inputs
+        else:
+            for var in self._filedesc.variables:
+                vdesc = self._filedesc.variables[var]
+                if var in ("time", "time1", "time2", "time3"):
+                    possible_tvars.append(var)
+                elif vdesc.cfunits().is_time_reference() and len(vdesc.dimensions) == 1:
+                    possible_tvars.append(var)
+                elif (
+                    "standard_name" in vdesc.attributes
+                    and vdesc.attributes["standard_name"] == "time"
+                ):
+                    possible_tvars.append(var)
+                elif "axis" in vdesc.attributes and vdesc.attributes["axis"] == "T":
+                    possible_tvars.append(var)
+        if len(possible_tvars) == 0:
+            msg = (
+                "Could not identify a time variable to autoparse filename {!r}".format(
                     fname
                 )
-                warn(msg, DateTimeAutoParseWarning)
-                return fname
-            possible_tnodes = {
-                vnode.label: vnode
-                for vnode in possible_inputs
-                if vnode.label in possible_tvars
-            }
-            if len(possible_tnodes) == 0:
-                raise ValueError(
-                    "Time variable input missing for file {!r}".format(fname)
-                )
-            tnode = (
-                possible_tnodes["time"]
-                if "time" in possible_tnodes
-                else tuple(possible_tnodes.values())[0]
             )
+            warn(msg, DateTimeAutoParseWarning)
+            return None
+        possible_tnodes = {
+            vnode.label: vnode
+            for vnode in possible_inputs
+            if vnode.label in possible_tvars
+        }
+        if len(possible_tnodes) == 0:
+            raise ValueError("Time variable input missing for file {!r}".format(fname))
+        return (
+            possible_tnodes["time"]
+            if "time" in possible_tnodes
+            else tuple(possible_tnodes.values())[0]
+        )
+
+    def _autoparse_filename_(self, fname):
+        """
+        Determine if autoparsing the filename needs to be done
+
+        The first and last values of the time variable are cached with the time variable node,
+        so that they are computed only once for all files sharing the same time variable.
 
-            t1 = tnode[0:1]
-            t2 = tnode[-1:]
+        Parameters:
+            fname (str): The original name of the file
+
+        Returns:
+            str: The new name for the file
+        """
+
+        if self._tnode is not None:
+
+            if self._tnode not in _TIME_BOUNDS_:
+                _TIME_BOUNDS_[self._tnode] = (self._tnode[0:1], self._tnode[-1:])
+            t1, t2 = _TIME_BOUNDS_[self._tnode]
 
             while "{" in fname:
                 beg = fname.find("{")
@@ -744,6 +823,16 @@ class WriteNode(FlowNode):
 
         return fname
 
+    def _parse_filename_(self):
+        """
+        Replace the filename with the autoparsed filename, if not done already
+        """
+        if self._tnode is not None:
+            fname = self._autoparse_filename_(self.label)
+            self._label = fname
+            self._filedesc._name = fname
+            self._tnode = None
+
     def enable_history(self):
         """
         Enable writing of the history attribute to the file
@@ -757,9 +846,212 @@ class WriteNode(FlowNode):
         """
         self._unwritten_attributes.add("history")
 
-    def _open_(self, deflate=None):
+    def enable_signature(self):
+        """
+        Enable writing of the signature of the file specification to the file
+        """
+        self._signed = True
+
+    def disable_signature(self):
+        """
+        Disable writing of the signature of the file specification to the file
+        """
+        self._signed = False
+
+    @property
+    def signature(self):
+        """
+        Hash of the file specification (format, global attributes, and the datatypes, dimensions,
+        definitions and attributes of all variables), including the sizes of the dimensions
+        """
+        fdesc = self._filedesc
+        spec = {
+            "name": self.label,
+            "format": fdesc.format,
+            "attributes": {
+                a: v for a, v in fdesc.attributes.items() if a != "creation_date"
+            },
+            "variables": {
+                vname: {
+                    "datatype": vdesc.datatype,
+                    "dimensions": [
+                        (d, vdesc.dimensions[d].size) for d in vdesc.dimensions
+                    ],
+                    "definition": vdesc.definition,
+                    "attributes": vdesc.attributes,
+                }
+                for vname, vdesc in fdesc.variables.items()
+            },
+        }
+        spec_str = json_dumps(
+            spec, sort_keys=True, default=lambda obj: numpy.asarray(obj).tolist()
+        )
+        return sha256(spec_str.encode("utf-8")).hexdigest()
+
+    def is_complete(self):
+        """
+        Whether the file was completely written by a previous execution with the same signature
+
+        Files are only given their final names once they are completely written, and the
+        filename is autoparsed (if necessary) to find the file.
+        """
+        self._parse_filename_()
+        if not exists(self.label):
+            return False
+        with NETCDF_LOCK:
+            try:
+                with Dataset(self.label, "r") as ncfile:
+                    signature = getattr(ncfile, WriteNode._SIGNATURE_ATTRIBUTE_, None)
+            except:
+                return False
+        return signature == self.signature
+
+    @property
+    def write_stats(self):
+        """
+        Per-variable write statistics from the last execution
+
+        Each variable name maps to a dictionary containing the number of uncompressed 'bytes'
+        written, the number of 'seconds' spent writing them, and the 'storage' size of the
+        variable on disk (None if it cannot be determined).
+        """
+        return self._write_stats
+
+    @staticmethod
+    def _auto_chunksizes_(dsizes, itemsize, fixed=()):
+        """
+        Compute balanced chunk sizes suitable for both time-series and spatial-slice access
+
+        Every dimension is shrunk by the same fraction of its length until the chunk fits in
+        the target chunk size, so that reading the full time-series at a point and reading a
+        single time-slice both touch a comparable (and small) number of chunks.
+
+        Parameters:
+            dsizes (OrderedDict): Dimension names and sizes of the variable
+            itemsize (int): Size of a single data element in bytes
+            fixed (tuple): Names of dimensions that must not be split (e.g., string lengths)
+        """
+        if not isinstance(dsizes, OrderedDict):
+            raise TypeError(
+                "Dimensions must be an ordered dictionary of names and sizes"
+            )
+        shape = [max(int(dsizes[d]), 1) for d in dsizes]
+        nelems = max(WriteNode._AUTO_CHUNK_BYTES_ // max(int(itemsize), 1), 1)
+        csizes = list(shape)
+        whole = set(i for i, d in enumerate(dsizes) if d in fixed)
+        while numpy.prod(csizes, dtype=float) > nelems:
+            free = [i for i in range(len(shape)) if i not in whole]
+            if len(free) == 0:
+                break
+            budget = float(nelems) / numpy.prod([csizes[i] for i in whole], dtype=float)
+            nfree = numpy.prod([shape[i] for i in free], dtype=float)
+            factor = (budget / nfree) ** (1.0 / len(free))
+            tiny = [i for i in free if shape[i] * factor < 1]
+            if len(tiny) == 0:
+                for i in free:
+                    csizes[i] = max(int(shape[i] * factor), 1)
+                break
+            for i in tiny:
+                csizes[i] = 1
+                whole.add(i)
+        return csizes
+
+    def _storage_kwds_(self, vdesc, zlib):
+        """
+        Compute the storage keyword arguments for creating a variable in the file
+
+        Variable-level settings override the file-level settings.  File-level contiguous storage
+        is only used for variables without their own chunk sizes that can be stored contiguously
+        (i.e., uncompressed variables without unlimited dimensions).
+
+        Parameters:
+            vdesc (VariableDesc): The descriptor of the variable to create
+            zlib (bool): Whether the variable will be compressed
+        """
+        fdesc = self._filedesc
+        shuffle = fdesc.shuffle if vdesc.shuffle is None else vdesc.shuffle
+        endian = fdesc.endian if vdesc.endian is None else vdesc.endian
+        kwds = {"shuffle": shuffle, "endian": endian}
+        if len(vdesc.dimensions) == 0:
+            return kwds
+
+        ddescs = [fdesc.dimensions[d] for d in vdesc.dimensions]
+        can_contiguous = not zlib and not any(dd.unlimited for dd in ddescs)
+        if vdesc.contiguous:
+            if not can_contiguous:
+                raise ValueError(
+                    (
+                        "Variable {!r} in file {!r} cannot be stored contiguously when "
+                        "compressed or with unlimited dimensions"
+                    ).format(vdesc.name, self.label)
+                )
+            kwds["contiguous"] = True
+            return kwds
+        elif (
+            vdesc.contiguous is None
+            and vdesc.chunksizes is None
+            and fdesc.contiguous
+            and can_contiguous
+        ):
+            kwds["contiguous"] = True
+            return kwds
+
+        chunksizes = fdesc.chunksizes if vdesc.chunksizes is None else vdesc.chunksizes
+        dsizes = OrderedDict((dd.name, dd.size) for dd in ddescs)
+        if chunksizes is None:
+            return kwds
+        elif chunksizes == "auto":
+            fixed = tuple(dd.name for dd in ddescs if dd.stringlen)
+            itemsize = 8 if vdesc.dtype is None else vdesc.dtype.itemsize
+            csizes = WriteNode._auto_chunksizes_(dsizes, itemsize, fixed=fixed)
+        elif isinstance(chunksizes, dict):
+            csizes = [chunksizes.get(d, dsizes[d]) for d in dsizes]
+        else:
+            csizes = list(chunksizes)
+        kwds["chunksizes"] = [
+            max(min(c, s), 1) for c, s in zip(csizes, dsizes.values())
+        ]
+        return kwds
+
+    def _storage_sizes_(self):
+        """
+        Return a dictionary of on-disk storage sizes (in bytes) of the variables in the file
+
+        Storage sizes can only be determined for HDF5-based files, and only if the optional
+        h5py package is available.  Otherwise, the storage sizes are None.
+        """
+        vnames = [vnode.label for vnode in self.inputs]
+        sizes = {vname: None for vname in vnames}
+        if not self._filedesc.format.startswith("NETCDF4") or not exists(self.label):
+            return sizes
+        try:
+            import h5py
+        except ImportError:
+            return sizes
+        try:
+            h5file = h5py.File(self.label, "r")
+        except OSError:
+            return sizes
+        with h5file:
+            for vname in vnames:
+                try:
+                    sizes[vname] = int(h5file[vname].id.get_storage_size())
+                except Exception as err:
+                    msg = (
+                        "Could not determine the storage size of variable {!r} in file "
+                        "{!r}: {}"
+                    ).format(vname, self.label, err)
+                    warn(msg, RuntimeWarning)
+        return sizes
+
+    def _open_(self, deflate=None, nofill=False):
         """
         Open the file for writing, if not open already
+
+        Parameters:
+            deflate (int): Override the output file deflate level with given value
+            nofill (bool): Whether to disable pre-filling variables with fill values (only
+                safe if every element of every variable will be written)
         """
         if self._file is None:
 
@@ -791,11 +1083,17 @@ class WriteNode(FlowNode):
             except:
                 raise IOError("Failed to open output file {!r}".format(fname))
 
+            # Avoid writing every variable twice if all of the data will be written
+            if nofill:
+                self._file.set_fill_off()
+
             # Write the global attributes
             self._filedesc.attributes["creation_date"] = datetime.utcnow().strftime(
                 "%Y-%m-%dT%H:%M:%SZ"
             )
             self._file.setncatts(self._filedesc.attributes)
+            if self._signed:
+                self._file.setncattr(WriteNode._SIGNATURE_ATTRIBUTE_, self.signature)
 
             # Scan over variables for coordinates and dimension information
             req_dims = set()
@@ -869,8 +1167,15 @@ class WriteNode(FlowNode):
                         raise TypeError("Override deflate value range from 0 to 9")
                     zlib = deflate > 0
                     clev = deflate if zlib else 1
+                skwds = self._storage_kwds_(vdesc, zlib)
                 ncvar = self._file.createVariable(
-                    vname, vdtype, vdims, fill_value=fillval, zlib=zlib, complevel=clev
+                    vname,
+                    vdtype,
+                    vdims,
+                    fill_value=fillval,
+                    zlib=zlib,
+                    complevel=clev,
+                    **skwds,
                 )
 
                 for aname in vattrs:
@@ -957,27 +1262,54 @@ class WriteNode(FlowNode):
         else:
             return None
 
-    def execute(self, chunks={}, deflate=None):
+    @staticmethod
+    def _chunks_cover_(shape, chunks):
         """
-        Execute the writing of the WriteNode file at once
+        Check whether a collection of chunks covers every element of an array
 
-        This method efficiently writes all of the data for each file only once, chunking
-        the data according to the 'chunks' parameter, as needed.
+        The chunks must form a regular grid (i.e., the Cartesian product of non-overlapping
+        slices along each dimension), as generated by '_chunk_iter_'.
 
         Parameters:
-            chunks (dict): A dictionary of output dimension names and chunk sizes for each
-                dimension given.  Output dimensions not included in the dictionary will not be
-                chunked.  (Use OrderedDict to preserve order of dimensions, where the first
-                dimension will be assumed to correspond to the fastest-varying index and the last
-                dimension will be assumed to correspond to the slowest-varying index.)
-            deflate (int): Override the output file deflate level with given value
+            shape (tuple): The shape of the array
+            chunks: An iterable of tuples of slices, one slice per dimension of the array
         """
+        if any(s == 0 for s in shape):
+            return True
+        bounds = [set() for _ in shape]
+        regions = set()
+        for chunk in chunks:
+            region = tuple(c.indices(s)[:2] for c, s in zip(chunk, shape))
+            regions.add(region)
+            for b, r in zip(bounds, region):
+                b.add(r)
+        if len(regions) != int(numpy.prod([len(b) for b in bounds])):
+            return False
+        for b, s in zip(bounds, shape):
+            pos = 0
+            for lb, ub in sorted(b):
+                if lb != pos:
+                    return False
+                pos = ub
+            if pos != s:
+                return False
+        return True
+
+    def _start_(self, chunks={}, deflate=None):
+        """
+        Open the file, write the header information and compute the chunks to write
 
-        # Open the file and write the header information
-        self._open_(deflate=deflate)
+        Parameters:
+            chunks (dict): A dictionary of output dimension names and chunk sizes
+            deflate (int): Override the output file deflate level with given value
 
-        # Create data structure to keep track of which variable chunks we have written
-        vchunks = {vnode.label: set() for vnode in self.inputs}
+        Returns:
+            list: The pairs of write-chunks and read-chunks (with inverted dimensions), in the
+                order in which they are written
+        """
+
+        # Autoparse the filename from the time variable
+        self._parse_filename_()
 
         # Compute the Global Dimension Sizes dictionary from the input variable nodes
         inputdims = []
@@ -987,29 +1319,199 @@ class WriteNode(FlowNode):
                     inputdims.append(d)
         gdims = OrderedDict((d, self._filedesc.dimensions[d].size) for d in inputdims)
 
-        # Iterate over the global dimension space
-        for chunk in WriteNode._chunk_iter_(gdims, chunks=chunks):
+        # Compute the chunks to write, which tile the global dimension space
+        gchunks = list(WriteNode._chunk_iter_(gdims, chunks=chunks))
 
-            # Invert the necessary dimensions to get the read-chunk
-            rchunk = self._invert_dims_(gdims, chunk, idims=self._idims)
+        # Open the file and write the header information, without pre-filling the variables
+        # since every element of every variable is written (and verified, if debugging)
+        with span("open", file=self.label), NETCDF_LOCK:
+            self._open_(deflate=deflate, nofill=True)
 
-            # Loop over all variables and write the data, if necessary
-            for vnode in self.inputs:
-                vname = vnode.label
-                vdesc = self._filedesc.variables[vname]
-                ncvar = self._file.variables[vname]
+        # Create data structure to keep track of which variable chunks we have written
+        self._vchunks = {vnode.label: OrderedDict() for vnode in self.inputs}
 
-                # Compute the write-chunk for the given variable
-                wchunk = tuple(chunk[d] for d in vdesc.dimensions)
+        # Reset the write statistics for each variable
+        self._write_stats = OrderedDict(
+            (vnode.label, {"bytes": 0, "seconds": 0.0, "storage": None})
+            for vnode in self.inputs
+        )
+
+        # Invert the necessary dimensions to get the read-chunks
+        return [
+            (chunk, self._invert_dims_(gdims, chunk, idims=self._idims))
+            for chunk in gchunks
+        ]
+
+    def _write_chunk_(self, chunk, rchunk, computed=None):
+        """
+        Write the data of all variables for a single chunk
 
-                # Write the data to the variable, if it hasn't already been
-                # written
-                if repr(wchunk) not in vchunks[vname]:
-                    vdata = vnode[rchunk]
+        Parameters:
+            chunk (OrderedDict): The write-chunk, as dimension names and slices
+            rchunk (OrderedDict): The read-chunk, with the inverted dimensions reversed
+            computed (dict): The data already computed for this chunk by other files written
+                together with this file, by variable node (updated with the data computed)
+        """
+        # Loop over all variables and write the data, if necessary
+        for vnode in self.inputs:
+            vname = vnode.label
+            vdesc = self._filedesc.variables[vname]
+            ncvar = self._file.variables[vname]
+
+            # Compute the write-chunk for the given variable
+            wchunk = tuple(chunk[d] for d in vdesc.dimensions)
+
+            # Write the data to the variable, if it hasn't already been
+            # written
+            if repr(wchunk) not in self._vchunks[vname]:
+                if computed is None or vnode not in computed:
+                    with span("compute", file=self.label, variable=vname):
+                        vdata = vnode[rchunk]
+                    if computed is not None:
+                        computed[vnode] = vdata
+                else:
+                    vdata = computed[vnode]
+                wstart = time()
+                with span("write", file=self.label, variable=vname), NETCDF_LOCK:
                     if isinstance(vdata, CharArray):
                         vdata = vdata.stretch(ncvar.shape[-1])
                     ncvar[wchunk] = vdata
-                    vchunks[vname].add(repr(wchunk))
+                self._write_stats[vname]["seconds"] += time() - wstart
+                self._write_stats[vname]["bytes"] += numpy.asarray(vdata).nbytes
+
+                # Record the region actually written, which can be shorter than the chunk
+                # along an unlimited dimension
+                vshape = numpy.shape(vdata)
+                if len(vshape) == len(wchunk):
+                    written = tuple(
+                        slice(c.start, c.start + n) for c, n in zip(wchunk, vshape)
+                    )
+                else:
+                    written = wchunk
+                self._vchunks[vname][repr(wchunk)] = written
+
+    def _finish_(self, debug=False):
+        """
+        Verify the writing of all variables, if debugging, and close the file
+
+        Parameters:
+            debug (bool): Whether to verify that every element of every variable was written
+        """
+        # Verify that no unwritten regions remain in any variable (of the sizes described,
+        # since the size of an unlimited dimension in the file is the extent written)
+        if debug:
+            for vname in self._vchunks:
+                vdims = self._filedesc.variables[vname].dimensions
+                vshape = tuple(self._filedesc.dimensions[d].size for d in vdims)
+                if not WriteNode._chunks_cover_(vshape, self._vchunks[vname].values()):
+                    raise RuntimeError(
+                        "Variable {!r} in file {!r} was not completely written".format(
+                            vname, self.label
+                        )
+                    )
+
+        # Close the file after completion and record the on-disk storage size of each variable
+        with span("close", file=self.label), NETCDF_LOCK:
+            self._close_()
+            vsizes = self._storage_sizes_()
+        for vname, vsize in vsizes.items():
+            self._write_stats[vname]["storage"] = vsize
+
+    def execute(self, chunks={}, deflate=None, debug=False, scheduler=None):
+        """
+        Execute the writing of the WriteNode file at once
+
+        This method efficiently writes all of the data for each file only once, chunking
+        the data according to the 'chunks' parameter, as needed.  The chunks cover every
+        element of the output variables, so the file is written without pre-filling the
+        variables with fill values.
+
+        Parameters:
+            chunks (dict): A dictionary of output dimension names and chunk sizes for each
+                dimension given.  Output dimensions not included in the dictionary will not be
+                chunked.  (Use OrderedDict to preserve order of dimensions, where the first
+                dimension will be assumed to correspond to the fastest-varying index and the last
+                dimension will be assumed to correspond to the slowest-varying index.)
+            deflate (int): Override the output file deflate level with given value
+            debug (bool): Whether to verify that every element of every variable was written
+            scheduler (ReadScheduler): A read scheduler used to coalesce the reads of all input
+                variables from the same file for each chunk (and possibly read ahead)
+        """
+        WriteNode.execute_group(
+            [self], chunks=chunks, deflate=deflate, debug=debug, scheduler=scheduler
+        )
 
-        # Close the file after completion
-        self._close_()
+    @staticmethod
+    def execute_group(wnodes, chunks={}, deflate=None, debug=False, scheduler=None):
+        """
+        Execute the writing of a group of WriteNode files together
+
+        All of the files are opened at once.  Files that are chunked alike (i.e., with the same
+        chunked dimensions and sizes, and the same inverted dimensions) are written in lockstep,
+        one chunk at a time, so that each chunk of input data needed by several of the files is
+        read only once (with a read scheduler) and pushed through to all of them.
+
+        Parameters:
+            wnodes (list): The WriteNodes to execute
+            chunks (dict): A dictionary of output dimension names and chunk sizes for each
+                dimension given (see 'execute')
+            deflate (int): Override the output file deflate level with given value
+            debug (bool): Whether to verify that every element of every variable was written
+            scheduler (ReadScheduler): A read scheduler used to coalesce the reads of all input
+                variables from the same file for each chunk (and possibly read ahead)
+        """
+
+        # Open all of the files and group them by their chunking
+        groups = OrderedDict()
+        for wnode in wnodes:
+            wchunks = wnode._start_(chunks=chunks, deflate=deflate)
+            vdescs = [wnode._filedesc.variables[vnode.label] for vnode in wnode.inputs]
+            cdims = tuple(d for d in chunks if any(d in vd.dimensions for vd in vdescs))
+            key = (
+                tuple((d, wnode._filedesc.dimensions[d].size) for d in cdims),
+                len(wchunks),
+                frozenset(wnode._idims),
+            )
+            if len(wnodes) > 1:
+                wchunks.sort(key=lambda c: tuple(c[0][d].start for d in cdims[::-1]))
+            groups.setdefault(key, []).append((wnode, wchunks))
+
+        for group in groups.values():
+
+            # Read-chunks covering the read-chunks of all files in the group
+            rchunks = []
+            for i in range(len(group[0][1])):
+                rchunk = OrderedDict()
+                for _, wchunks in group:
+                    rchunk.update(wchunks[i][1])
+                rchunks.append(rchunk)
+
+            # Schedule the reads of the input variables, in the order in which they will be
+            # needed
+            if scheduler is not None:
+                scheduler.register(*[vn for wnode, _ in group for vn in wnode.inputs])
+                scheduler.plan(rchunks)
+
+            try:
+                # Iterate over the global dimension space
+                for i, rchunk in enumerate(rchunks):
+                    with span("chunk", chunk=i, files=len(group)):
+
+                        # Read the input data for the chunk all at once
+                        if scheduler is not None:
+                            with span("read", chunk=i):
+                                scheduler.schedule(rchunk)
+
+                        # Write the chunk of each file, computing the data of the variables
+                        # shared by several files only once
+                        computed = {}
+                        for wnode, wchunks in group:
+                            wnode._write_chunk_(*wchunks[i], computed=computed)
+
+            finally:
+                # Stop scheduling the reads of the input variables
+                if scheduler is not None:
+                    scheduler.unregister()
+
+            for wnode, _ in group:
+                wnode._finish_(debug=debug)
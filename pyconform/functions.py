@@ -6,6 +6,8 @@ LICENSE: See the LICENSE.rst file for details
 """
 
 from abc import ABCMeta, abstractmethod
+from importlib import import_module
+from weakref import WeakSet
 
 import numpy as np
 from cf_units import Unit
@@ -214,33 +216,86 @@ __OPERATORS__ = {
 }
 
 
-def _all_subclasses_(cls):
-    return cls.__subclasses__() + [
-        c for s in cls.__subclasses__() for c in _all_subclasses_(s)
-    ]
+# Function classes defined so far, keyed by function name.  Classes are weakly referenced, so
+# that functions defined only temporarily are forgotten once they are deleted.
+__FUNCTIONS__ = {}
+
+# Entry point group through which installed packages can provide modules of functions
+ENTRY_POINT_GROUP = "pyconform.functions"
+
+# Names of the modules that define functions not yet loaded, keyed by function name
+_plugins = None
+
+# Names of the modules imported on demand by find_function
+_loaded_plugins = set()
+
+
+def _entry_points_():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return eps.select(group=ENTRY_POINT_GROUP)
+    return eps.get(ENTRY_POINT_GROUP, [])
+
+
+def list_plugins():
+    """
+    Names of the modules that provide each function that can be loaded on demand
+
+    The functions of the pyconform.modules package are listed in its FUNCTIONS manifest, and
+    installed packages can provide more with "pyconform.functions" entry points, each named
+    after a function and pointing to the module that defines it.
+
+    Returns:
+        Dictionary of module names keyed by function name
+    """
+    global _plugins
+    if _plugins is None:
+        from pyconform.modules import FUNCTIONS
+
+        plugins = {}
+        for module, keys in FUNCTIONS.items():
+            for key in keys:
+                plugins.setdefault(key, "pyconform.modules.{}".format(module))
+        for ep in _entry_points_():
+            plugins.setdefault(ep.name, ep.value.split(":")[0])
+        _plugins = plugins
+    return _plugins
 
 
 def find_function(key):
-    func = None
-    for c in _all_subclasses_(Function):
-        if c.key == key:
-            if func is None:
-                func = c
-            else:
-                raise RuntimeError("Function {!r} is multiply defined".format(key))
-    if func is None:
+    if not __FUNCTIONS__.get(key) and key in list_plugins():
+        module = list_plugins()[key]
+        import_module(module)
+        _loaded_plugins.add(module)
+    funcs = list(__FUNCTIONS__.get(key, ()))
+    if len(funcs) > 1:
+        # Functions defined in modules imported explicitly take precedence over functions of
+        # the same name defined in modules imported on demand (for other functions)
+        funcs = [f for f in funcs if f.__module__ not in _loaded_plugins] or funcs
+    if len(funcs) == 0:
         raise KeyError("Function {!r} not found".format(key))
+    elif len(funcs) > 1:
+        raise RuntimeError("Function {!r} is multiply defined".format(key))
     else:
-        return func
+        return funcs[0]
 
 
 def list_functions():
-    return [c.key for c in _all_subclasses_(Function)]
+    loaded = [key for key in __FUNCTIONS__ for _ in __FUNCTIONS__[key]]
+    return loaded + [key for key in list_plugins() if not __FUNCTIONS__.get(key)]
 
 
 class Function(FunctionBase):
     key = "func"
 
+    def __init_subclass__(cls, **kwds):
+        super(Function, cls).__init_subclass__(**kwds)
+        __FUNCTIONS__.setdefault(cls.key, WeakSet()).add(cls)
+
     def __init__(self, *args, **kwds):
         super(Function, self).__init__(*args, **kwds)
         self._sumlike_dimensions = set()
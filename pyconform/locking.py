@@ -0,0 +1,15 @@
+"""
+Shared Locks
+
+This module contains the locks shared by the modules that call into the NetCDF library, which is
+not thread-safe, so that NetCDF files can be read in background threads.
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+from threading import RLock
+
+# Lock serializing calls into the NetCDF library, which is not thread-safe, so that input data
+# can be read in background threads while output data is computed and written
+NETCDF_LOCK = RLock()
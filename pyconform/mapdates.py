@@ -4,108 +4,118 @@ Date Evaluator
 This evaluates the time slices in the file(s) to define the time period
 between steps and verifies consistancy and sequential steps between files.
 
+The time values of each file are decoded with calendar-aware, vectorized
+cftime conversions, and the file headers can be read by a pool of threads.
+The result is a TimeIndex object, which can be reused to locate time steps
+in the ordered sequence of files.
+
 Copyright 2017-2020, University Corporation for Atmospheric Research
 LICENSE: See the LICENSE.rst file for details
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cftime
+import numpy
+from netCDF4 import Dataset
+
+from pyconform.locking import NETCDF_LOCK
+
+# Units of the time values used to compare files with different time units
+_STANDARD_UNITS_ = "days since 0001-01-01 00:00:00"
 
-import cf_units
-from dateutil import parser
+# Tolerance (in days) used when comparing time values in standard units
+_TOLERANCE_ = 1e-8
 
-from . import climIO
 
+def __decode__(values, units, calendar):
+    return numpy.atleast_1d(
+        cftime.num2date(
+            values, units, calendar=calendar, only_use_cftime_datetimes=True
+        )
+    )
 
-def __get_time_info__(f, io):
+
+def __get_time_info__(fpath):
     """
-    Evaluates the time slices in the input files to verify
-    that there are the correct number of slices in the file
-    and that the slices are contiguous.  It also pulls off
-    other information, such as start/en times, time period/spacing,
-    slice count, and the average of the slices (for ordering purposes).
+    Evaluates the time slices in an input file.  It pulls off information,
+    such as start/end times, time period/spacing, slice count, and the
+    average of the slices (for ordering purposes).
 
     Parameters:
-        f (climIO file): A pointer to an open netCDF file.
-        io (climIO): An object that contains a setof io commands to use.
+        fpath (str): The path to the netCDF file
 
     Returns:
+        average (float): The average of the first and last time slices.
         date_info (dict): Contains file information, such as time period(t_per), time step(t_step),
             first/last step(t0 and tn), slice counts(cnt).
-        average (int): The average of all time slices.
     """
-    date_info = {}
-    _tc, _dim, att = io.get_var_info(f, "time")
-    stand_cal = cf_units.Unit("days since 1-1-1 0:0:0", calendar=att["calendar"])
-    cal_unit = cf_units.Unit(att["units"], calendar=att["calendar"])
-    if "bounds" in att.keys():
-        # print 'Using bounds'
-        tb = f.variables[att["bounds"]]
-        j = len(tb)
-        d0 = tb[0, 0]
-        d1 = tb[1, 0]
-        d2 = tb[2, 0]
-        dn = tb[j - 1, 1] - 1
-        time = tb[:, 0]
+    # Hold the lock only while calling into the NetCDF library, so that the dates of one file
+    # are decoded while the next file is read
+    with NETCDF_LOCK, Dataset(fpath, "r") as f:
+        tvar = f.variables["time"]
+        att = dict((n, tvar.getncattr(n)) for n in tvar.ncattrs())
+        if "bounds" in att:
+            tb = f.variables[att["bounds"]][...]
+        else:
+            tb = tvar[...]
+    if "bounds" in att:
+        time = numpy.asarray(tb[:, 0])
+        dn = tb[-1, 1] - 1
     else:
-        # print 'Using time'
-        tb = f.variables["time"]
-        j = len(tb)
-        d0 = tb[0]
-        d1 = tb[1]
-        d2 = tb[2]
-        dn = tb[j - 1]
-        time = tb[:]
-    date_info["time"] = time
+        time = numpy.asarray(tb)
+        dn = time[-1]
+    units = att["units"]
+    calendar = att.get("calendar", "standard")
 
-    # Get second and third time bounds to figure out the time period
-    t1 = parser.parse(
-        str(cf_units.num2date(d1, att["units"], calendar=att["calendar"]))
-    ).timetuple()
-    t2 = parser.parse(
-        str(cf_units.num2date(d2, att["units"], calendar=att["calendar"]))
-    ).timetuple()
-    # Get time difference between the steps
-    t_step = d2 - d1
-    h = t2[3] - t1[3]
-    if t1[3] != t2[3]:
-        t_per = str(h) + "hour"
-    elif t1[2] != t2[2]:
+    date_info = {}
+    date_info["time"] = time
+    date_info["dates"] = __decode__(time, units, calendar)
+    date_info["units"] = units
+    date_info["calendar"] = calendar
+    date_info["cnt"] = len(time)
+
+    # Get second and third time steps to figure out the time period
+    if len(time) > 2:
+        i1, i2 = 1, 2
+    else:
+        i1, i2 = 0, len(time) - 1
+    t1 = date_info["dates"][i1]
+    t2 = date_info["dates"][i2]
+    date_info["t_step"] = time[i2] - time[i1]
+    if t1.hour != t2.hour:
+        t_per = str(t2.hour - t1.hour) + "hour"
+    elif t1.day != t2.day:
         t_per = "day"
-    elif t1[1] != t2[1]:
+    elif t1.month != t2.month:
         t_per = "mon"
-    elif t1[0] != t2[0]:
+    elif t1.year != t2.year:
         t_per = "year"
     else:
         t_per = "UNKNOWN"
     date_info["t_per"] = t_per
-    date_info["t_step"] = t_step
-    # Get first and last dates
-    # t0 = (parser.parse(str(cf_units.num2date(d0, att['units'],
-    #                                          calendar=att['calendar']))).timetuple())
-    # tn = (parser.parse(str(cf_units.num2date(dn, att['units'],
-    #                                          calendar=att['calendar']))).timetuple())
-    date_info["t0"] = cal_unit.convert(d0, stand_cal)
-    date_info["tn"] = cal_unit.convert(dn, stand_cal)
-    date_info["cnt"] = j
+
+    # Get first and last dates, and their values in standard units
+    d0n = __decode__([time[0], dn], units, calendar)
+    t0n = cftime.date2num(d0n, _STANDARD_UNITS_, calendar=calendar)
+    date_info["date0"], date_info["daten"] = d0n
+    date_info["t0"], date_info["tn"] = t0n
+    date_info["step"] = (
+        cftime.date2num(t2, _STANDARD_UNITS_, calendar=calendar)
+        - cftime.date2num(t1, _STANDARD_UNITS_, calendar=calendar)
+        if i1 != i2
+        else 0.0
+    )
     average = (date_info["t0"] + date_info["tn"]) / 2
-    date_info["units"] = att["units"]
-    date_info["calendar"] = att["calendar"]
-
-    # Check to see if the number of slices matches how many should be in the
-    # date range
-    # if t_per == 'year':
-    #     _ok = (tn[0] - t0[0] == j)
-    # elif t_per == 'mon':
-    #     _ok = (((tn[0] - t0[0]) * 12) + (tn[1] - t0[1] + 1) == j)
-    # elif t_per == 'day':
-    #     _ok = ((dn - d0 + 1) == j)
-    # elif 'hour' in t_per:
-    #     cnt_per_day = 24.0 / h
-    #     _ok = (((dn - d0) * cnt_per_day + 1) == j)
 
     return average, date_info
 
 
+def __next_month__(month):
+    return month % 12 + 1
+
+
 def __check_date_alignment__(keys, date_info):
     """
     Evaluates the dates between files to verify that
@@ -116,70 +126,20 @@ def __check_date_alignment__(keys, date_info):
         date_info (dict): Contains file information, such as time period(t_per), time step(t_step),
             first/last step(t0 and tn), slice counts(cnt).
     """
-    prev_last = date_info[keys[0]]["tn"]
-    t_step = date_info[keys[0]]["t_step"]
-
-    if date_info[keys[0]]["t_per"] == "mon":
-        date = parser.parse(
-            str(
-                cf_units.num2date(
-                    date_info[keys[0]]["tn"],
-                    date_info[keys[0]]["units"],
-                    calendar=date_info[keys[0]]["calendar"],
-                )
-            )
-        ).timetuple()
-        if date[1] == 12:
-            next_val = 1
-        else:
-            next_val = date[1] + 1
-
-    else:
-        next_val = prev_last + t_step
-
-    for i in range(1, len(keys)):
-        if date_info[keys[i]]["t_per"] == "mon":
-            new_date = parser.parse(
-                str(
-                    cf_units.num2date(
-                        date_info[keys[i]]["t0"],
-                        date_info[keys[i]]["units"],
-                        calendar=date_info[keys[i]]["calendar"],
-                    )
-                )
-            ).timetuple()
-            if next_val == new_date[1]:
-                date = parser.parse(
-                    str(
-                        cf_units.num2date(
-                            date_info[keys[i]]["tn"],
-                            date_info[keys[i]]["units"],
-                            calendar=date_info[keys[i]]["calendar"],
-                        )
-                    )
-                ).timetuple()
-                if date[1] == 12:
-                    next_val = 1
-                else:
-                    next_val = date[1] + 1
-            else:
-                print("Disconnect? Expected: ", next_val, " Got: ", new_date[1])
-                return 1
+    for prev, curr in zip(keys[:-1], keys[1:]):
+        prev_info = date_info[prev]
+        curr_info = date_info[curr]
+        if curr_info["t_per"] == "mon":
+            next_val = __next_month__(prev_info["daten"].month)
+            new_val = curr_info["date0"].month
+            ok = next_val == new_val
         else:
-            if next_val == date_info[keys[i]]["t0"]:
-                # print "Looks
-                # okay",date_info[keys[i]]['t0'],'-',date_info[keys[i]]['tn']
-                prev_last = date_info[keys[i]]["tn"]
-                next_val = prev_last + t_step
-            else:
-                print(
-                    "Disconnect? Expected: ",
-                    next_val,
-                    " Got: ",
-                    date_info[keys[i]]["t0"],
-                )
-                return 1
-
+            next_val = prev_info["tn"] + prev_info["step"]
+            new_val = curr_info["t0"]
+            ok = abs(next_val - new_val) < _TOLERANCE_
+        if not ok:
+            print("Disconnect? Expected: ", next_val, " Got: ", new_val)
+            return 1
     return 0
 
 
@@ -193,69 +153,182 @@ def __check_date_alignment_in_file__(date):
                           first/last step(t0 and tn), slice counts(cnt).
 
     """
-    t_step = date["t_step"]
-    t_per = date["t_per"]
     t = date["time"]
-    prev_time = t[0]
-
-    # If the time period in monthly, then the time difference between slices is not uniform and
-    # requires looking into the month length array to get correct day #'s
-    # between slices.
-    if t_per == "mon":
-        if t_per == "mon":
-            date1 = parser.parse(
-                str(cf_units.num2date(t[0], date["units"], calendar=date["calendar"]))
-            ).timetuple()
-            if date1[1] == 12:
-                next_val = 1
-            else:
-                next_val = date1[1] + 1
-        for i in range(1, len(t)):
-            new_date = parser.parse(
-                str(cf_units.num2date(t[i], date["units"], calendar=date["calendar"]))
-            ).timetuple()
-            if next_val == new_date[1]:
-                date1 = parser.parse(
-                    str(
-                        cf_units.num2date(
-                            t[i], date["units"], calendar=date["calendar"]
-                        )
-                    )
-                ).timetuple()
-                if date1[1] == 12:
-                    next_val = 1
-                else:
-                    next_val = date1[1] + 1
-            else:
-                print(
-                    "Disconnect? Expected: ",
-                    next_val,
-                    " Got: ",
-                    new_date[1],
-                    " around time step: ",
-                    i,
-                )
-                return 1
-    # All other time periods should have the same number of days between
-    # slices.
+    if len(t) < 2:
+        return 0
+
+    # If the time period in monthly, then the time difference between slices is not uniform,
+    # so only the month numbers are compared.  All other time periods should have the same
+    # number of days between slices.
+    if date["t_per"] == "mon":
+        months = numpy.array([d.month for d in date["dates"]])
+        expected = months[:-1] % 12 + 1
+        actual = months[1:]
     else:
-        for i in range(1, len(t)):
-            if prev_time + t_step == t[i]:
-                # Time step looks okay
-                prev_time = t[i]
-            else:
-                print(
-                    "Disconnect? Expected: ",
-                    str(prev_time + t_step),
-                    " Got: ",
-                    t[i],
-                    " around time step: ",
-                    i,
-                )
-                return 1
+        expected = t[:-1] + date["t_step"]
+        actual = t[1:]
+    bad = numpy.flatnonzero(expected != actual)
+    if len(bad) > 0:
+        i = bad[0]
+        print(
+            "Disconnect? Expected: ",
+            expected[i],
+            " Got: ",
+            actual[i],
+            " around time step: ",
+            i + 1,
+        )
+        return 1
     return 0
 
 
+class TimeIndex(object):
+    """
+    Index of the time steps in a sequence of files, ordered in time
+    """
+
+    def __init__(self, infos, error=0):
+        """
+        Initializer
+
+        Parameters:
+            infos (list): The date information (dict) of each file, in time order
+            error (int): Nonzero if a gap in the time steps was found
+        """
+        self._infos = infos
+        self._error = error
+        self._offsets = numpy.cumsum([0] + [info["cnt"] for info in infos])
+        self._times = None
+        self._dates = None
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    @property
+    def error(self):
+        """Nonzero if a gap in the time steps was found"""
+        return self._error
+
+    @property
+    def files(self):
+        """File names, in time order"""
+        return [info["fn"] for info in self._infos]
+
+    @property
+    def paths(self):
+        """File paths, in time order"""
+        return [info["path"] for info in self._infos]
+
+    @property
+    def counts(self):
+        """Number of time steps in each file, in time order"""
+        return [info["cnt"] for info in self._infos]
+
+    @property
+    def offsets(self):
+        """Index of the first time step of each file in the full sequence"""
+        return self._offsets[:-1]
+
+    @property
+    def periods(self):
+        """Time period between steps of each file (e.g., 'day', 'mon', '6hour')"""
+        return [info["t_per"] for info in self._infos]
+
+    @property
+    def times(self):
+        """Time values of all time steps, in days since 0001-01-01 in the file calendar"""
+        if self._times is None:
+            self._times = numpy.concatenate(
+                [
+                    cftime.date2num(
+                        info["dates"], _STANDARD_UNITS_, calendar=info["calendar"]
+                    )
+                    for info in self._infos
+                ]
+            )
+        return self._times
+
+    @property
+    def dates(self):
+        """Dates of all time steps, as an array of cftime datetime objects"""
+        if self._dates is None:
+            self._dates = numpy.concatenate([info["dates"] for info in self._infos])
+        return self._dates
+
+    def locate(self, step):
+        """
+        Find the file containing a time step of the full sequence
+
+        Parameters:
+            step (int): Index of the time step in the full sequence
+
+        Returns:
+            str: The name of the file containing the time step
+            int: The index of the time step in that file
+        """
+        if step < 0:
+            step += len(self)
+        if step < 0 or step >= len(self):
+            raise IndexError("Time step {} out of range".format(step))
+        i = int(numpy.searchsorted(self._offsets, step, side="right")) - 1
+        return self._infos[i]["fn"], int(step - self._offsets[i])
+
+    def file_slice(self, fname):
+        """
+        Find the range of time steps of the full sequence contained in a file
+
+        Parameters:
+            fname (str): The name of the file
+
+        Returns:
+            slice: The slice of the full sequence of time steps contained in the file
+        """
+        for i, info in enumerate(self._infos):
+            if info["fn"] == fname:
+                return slice(int(self._offsets[i]), int(self._offsets[i + 1]))
+        raise KeyError("File {!r} not in time index".format(fname))
+
+
+def get_time_index(files, alignment=True, nthreads=4):
+    """
+    Examine the file list and build an index of the files in
+    sequential order.
+
+    Parameters:
+        files (list): A list of file names to put into sequential order.
+        alignment (bool): Whether to check for gaps between the time steps in each file
+        nthreads (int): The number of threads used to read the file headers
+
+    Returns:
+        TimeIndex: The index of the time steps in the files, ordered in time
+    """
+    if len(files) == 0:
+        return TimeIndex([])
+    if nthreads > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=min(nthreads, len(files))) as pool:
+            results = list(pool.map(__get_time_info__, files))
+    else:
+        results = [__get_time_info__(fl) for fl in files]
+
+    error = 0
+    for fl, (_, date) in zip(files, results):
+        date["fn"] = os.path.basename(fl)
+        date["path"] = fl
+        if alignment and error == 0:
+            error = __check_date_alignment_in_file__(date)
+
+    order = sorted(range(len(results)), key=lambda i: results[i][0])
+    infos = [results[i][1] for i in order]
+
+    # If there are more than 1 files, make sure the dates are aligned correctly
+    if error == 0 and len(infos) > 1:
+        error = __check_date_alignment__(
+            list(range(len(infos))), dict(enumerate(infos))
+        )
+
+    return TimeIndex(infos, error=error)
+
+
 def get_files_in_order(files, alignment=True):
     """
     Examine the file list and put the files in
@@ -270,32 +343,7 @@ def get_files_in_order(files, alignment=True):
         counts (list): A list containing the time slice counts for each of the
             files.  The order should match the order in which the
             file_list lists the files.
+        error (int): Nonzero if a gap in the time steps was found.
     """
-    ncdf = climIO.init_climIO(override="netCDF4")
-
-    date_info = {}
-    counts = []
-    file_list = []
-
-    for fl in files:
-        fn = os.path.basename(fl)
-        f = ncdf.open_file(fl)
-        ave, date = __get_time_info__(f, ncdf)
-        date["fn"] = fn
-        date_info[ave] = date
-        if alignment:
-            error = __check_date_alignment_in_file__(date)
-            if error != 0:
-                return file_list, counts, error
-
-    for d in sorted(date_info.keys()):
-        file_list.append(date_info[d]["fn"])
-        counts.append(date_info[d]["cnt"])
-
-    # If there are more than 1 files, make sure the dates are aligned correctly
-    if len(fl) > 1:
-        error = __check_date_alignment__(sorted(date_info.keys()), date_info)
-        if error != 0:
-            return file_list, counts, error
-
-    return file_list, counts, error
+    tindex = get_time_index(files, alignment=alignment)
+    return tindex.files, tindex.counts, tindex.error
@@ -1,10 +1,9 @@
 #! /usr/bin/env python
 
 
-import sys
-
 import numpy as np
 
+import pyconform.modules.clmmaps as clmmaps
 from pyconform.functions import Function
 from pyconform.physarray import PhysArray
 
@@ -111,107 +110,29 @@ class CLM_landunit_to_CMIP6_Lut_Function(Function):
         crop = 2
         urban = 3
 
-        # Tolerance check for weights summing to 1
-        eps = 1.0e-5
+        # Sparse maps from landunits to the 2d grid, shared by all variables of the same file
+        maps = clmmaps.cached_maps(
+            "landunit_lut",
+            clmmaps.landunit_lut_maps,
+            len(nlat),
+            len(nlon),
+            grid1d_ixy,
+            grid1d_jxy,
+            grid1d_lon,
+            grid1d_lat,
+            land1d_lon,
+            land1d_lat,
+            land1d_ityplunit,
+            land1d_active,
+            land1d_wtgcell,
+        )
 
         # Will contain landunit variables for veg, crop, pasture, and urban on 2d grid
-        # varo_lut_temp = np.full([len(ntim),4,len(nlat),len(nlon)],fill_value=missing)
-        # varo_lut = np.ma.masked_values(varo_lut_temp, missing)
-        varo_lut = np.zeros([len(ntim), 4, len(nlat), len(nlon)])
-        # Set pasture to fill value
-        varo_lut[:, pasture, :, :] = 1e20
-
-        # If 1, landunit is active
-        active_lunit = 1
-        # If 1, landunit is veg
-        veg_lunit = 1
-        # If 2, landunit is crop
-        crop_lunit = 2
-        # If 7,8, or 9, landunit is urban
-        beg_urban_lunit = 7
-        end_urban_lunit = 9
-
-        # Set up numpy array to compare against
-        t = np.stack((land1d_lon, land1d_lat, land1d_active, land1d_ityplunit), axis=1)
-        tu = np.stack((land1d_lon, land1d_lat, land1d_active), axis=1)
-
-        ind = np.stack((grid1d_ixy, grid1d_jxy), axis=1)
-
-        # Loop over lat/lons
-        for ixy in range(len(nlon)):
-            for jxy in range(len(nlat)):
-
-                grid_indx = -99
-                # 1d grid index
-                ind_comp = (ixy + 1, jxy + 1)
-                gi = np.where(np.all(ind == ind_comp, axis=1))[0]
-                if len(gi) > 0:
-                    grid_indx = gi[0]
-
-                landunit_indx_veg = 0.0
-                landunit_indx_crop = 0.0
-                landunit_indx_urban = 0.0
-                # Check for valid land gridcell
-                if grid_indx != -99:
-
-                    # Gridcell lat/lons
-                    grid1d_lon_pt = grid1d_lon[grid_indx]
-                    grid1d_lat_pt = grid1d_lat[grid_indx]
-
-                    # veg landunit index for this gridcell
-                    t_var = (grid1d_lon_pt, grid1d_lat_pt, active_lunit, veg_lunit)
-                    landunit_indx_veg = np.where(
-                        np.all(t_var == t, axis=1) * (land1d_wtgcell > 0)
-                    )[0]
-
-                    # crop landunit index for this gridcell
-                    t_var = (grid1d_lon_pt, grid1d_lat_pt, active_lunit, crop_lunit)
-                    landunit_indx_crop = np.where(
-                        np.all(t_var == t, axis=1) * (land1d_wtgcell > 0)
-                    )[0]
-
-                    # urban landunit indices for this gridcell
-                    t_var = (grid1d_lon_pt, grid1d_lat_pt, active_lunit)
-                    landunit_indx_urban = np.where(
-                        np.all(t_var == tu, axis=1)
-                        * (land1d_ityplunit >= beg_urban_lunit)
-                        * (land1d_ityplunit <= end_urban_lunit)
-                        * (land1d_wtgcell > 0)
-                    )[0]
-
-                    # Check for valid veg landunit
-                    if landunit_indx_veg.size > 0:
-                        varo_lut[:, veg, jxy, ixy] = EFLX_LH_TOT[
-                            :, landunit_indx_veg
-                        ].squeeze()
-                    else:
-                        varo_lut[:, veg, jxy, ixy] = 1e20
-
-                    # Check for valid crop landunit
-                    if landunit_indx_crop.size > 0:
-                        varo_lut[:, crop, jxy, ixy] = EFLX_LH_TOT[
-                            :, landunit_indx_crop
-                        ].squeeze()
-                    else:
-                        varo_lut[:, crop, jxy, ixy] = 1e20
-
-                    # Check for valid urban landunit and compute weighted-average
-                    if landunit_indx_urban.size > 0:
-                        # dum = EFLX_LH_TOT[:,landunit_indx_urban].squeeze()
-                        dum = EFLX_LH_TOT[:, landunit_indx_urban]
-                        land1d_wtgcell_pts = (
-                            land1d_wtgcell[landunit_indx_urban]
-                        ).astype(np.float32)
-                        weights = land1d_wtgcell_pts / np.sum(land1d_wtgcell_pts)
-                        if np.absolute(1.0 - np.sum(weights)) > eps:
-                            print("Weights do not sum to 1, exiting")
-                            sys.exit(-1)
-                        # varo_lut[:,urban,jxy,ixy] = np.sum(dum * weights)
-                        varo_lut[:, urban, jxy, ixy] = np.sum(dum * weights, axis=1)
-                    else:
-                        varo_lut[:, urban, jxy, ixy] = 1e20
-                else:
-                    varo_lut[:, :, jxy, ixy] = 1e20
+        # (urban is the weighted-average of all urban landunits, and pasture is not set)
+        varo_lut = np.full([len(ntim), 4, len(nlat), len(nlon)], 1e20)
+        varo_lut[:, veg, :, :] = maps["veg"].scatter(EFLX_LH_TOT)
+        varo_lut[:, crop, :, :] = maps["crop"].scatter(EFLX_LH_TOT)
+        varo_lut[:, urban, :, :] = maps["urban"].scatter(EFLX_LH_TOT)
 
         new_name = "CLM_landunit_to_CMIP6_Lut({}{}{}{}{}{}{}{}{}{}{}{}{})".format(
             pEFLX_LH_TOT.name,
@@ -1,10 +1,11 @@
 #! /usr/bin/env python
 
-import sys
+from functools import partial
 
 import netCDF4 as nc
 import numpy as np
 
+import pyconform.modules.clmmaps as clmmaps
 from pyconform.functions import Function
 from pyconform.physarray import PhysArray
 
@@ -90,7 +91,6 @@ class CLM_pft_to_CMIP6_vegtype_Function(Function):
             )
 
         GPP = pGPP.data
-        time = ptime.data
         lat = plat.data
         lon = plon.data
         grid1d_ixy = pgrid1d_ixy.data
@@ -107,136 +107,55 @@ class CLM_pft_to_CMIP6_vegtype_Function(Function):
         pfts1d_wtgcell = ppfts1d_wtgcell.data
         pfts1d_wtlunit = ppfts1d_wtlunit.data
 
-        # Tolerance check for weights summing to 1
-        eps = 1.0e-5
-
-        # If 1, pft is active
-        active_pft = 1
-
-        # If 1, landunit is veg
-        veg_lunit = 1
-
-        # C3 arctic grass,
-        # C3 non-arctic grass,
-        # C4 grass
-        beg_grass_pfts = 12
-        end_grass_pfts = 14
-
-        # broadleaf evergreen shrub - temperate,
-        # broadleaf deciduous shrub - temperate,
-        # broadleaf deciduous shrub - boreal
-        beg_shrub_pfts = 9
-        end_shrub_pfts = 11
-
-        # needleleaf evergreen tree - temperate,
-        # needleleaf evergreen tree - boreal,
-        # needleleaf deciduous tree - boreal,
-        # broadleaf evergreen tree - tropical,
-        # broadleaf evergreen tree - temperate,
-        # broadleaf deciduous tree - tropical,
-        # broadleaf deciduous tree - temperate,
-        # broadleaf deciduous tree - boreal
-        beg_tree_pfts = 1
-        end_tree_pfts = 8
-
-        # Will contain weighted average for grass pfts on 2d grid
-        varo_vegType = np.zeros([len(time), len(lat), len(lon)])
-        tu = np.stack((pfts1d_lon, pfts1d_lat, pfts1d_active), axis=1)
-
-        ind = np.stack((grid1d_ixy, grid1d_jxy), axis=1)
-
-        lu = np.stack((land1d_lon, land1d_lat, land1d_ityplunit), axis=1)
-
-        # Loop over lat/lons
-        for ixy in range(len(lon)):
-            for jxy in range(len(lat)):
-                grid_indx = -99
-                # 1d grid index
-                ind_comp = (ixy + 1, jxy + 1)
-                gi = np.where(np.all(ind == ind_comp, axis=1))[0]
-                if len(gi) > 0:
-                    grid_indx = gi[0]
-
-                # Check for valid land gridcell
-                if grid_indx != -99:
-
-                    # Gridcell lat/lons
-                    grid1d_lon_pt = grid1d_lon[grid_indx]
-                    grid1d_lat_pt = grid1d_lat[grid_indx]
-
-                    # veg landunit index for this gridcell
-                    t_var = (grid1d_lon_pt, grid1d_lat_pt, veg_lunit)
-                    landunit_indx = np.where(np.all(t_var == lu, axis=1))[0]
-
-                    # Check for valid veg landunit
-                    if landunit_indx.size > 0:
-                        if "grass" in vegType:
-                            t_var = (grid1d_lon_pt, grid1d_lat_pt, active_pft)
-                            pft_indx = np.where(
-                                np.all(t_var == tu, axis=1)
-                                * (pfts1d_wtgcell > 0.0)
-                                * (pfts1d_itype_veg >= beg_grass_pfts)
-                                * (pfts1d_itype_veg <= end_grass_pfts)
-                            )[0]
-                        elif "shrub" in vegType:
-                            t_var = (grid1d_lon_pt, grid1d_lat_pt, active_pft)
-                            pft_indx = np.where(
-                                np.all(t_var == tu, axis=1)
-                                * (pfts1d_wtgcell > 0.0)
-                                * (pfts1d_itype_veg >= beg_shrub_pfts)
-                                * (pfts1d_itype_veg <= end_shrub_pfts)
-                            )[0]
-                        elif "tree" in vegType:
-                            t_var = (grid1d_lon_pt, grid1d_lat_pt, active_pft)
-                            pft_indx = np.where(
-                                np.all(t_var == tu, axis=1)
-                                * (pfts1d_wtgcell > 0.0)
-                                * (pfts1d_itype_veg >= beg_tree_pfts)
-                                * (pfts1d_itype_veg <= end_tree_pfts)
-                            )[0]
-
-                        # Check for valid pfts and compute weighted average
-                        if pft_indx.size > 0:
-                            for t in range(len(time)):
-                                if "grass" in vegType:
-                                    pfts1d_wtlunit_grass = (
-                                        pfts1d_wtlunit[pft_indx]
-                                    ).astype(np.float32)
-                                    dum = GPP[t, pft_indx]
-                                    weights = pfts1d_wtlunit_grass / np.sum(
-                                        pfts1d_wtlunit_grass
-                                    )
-                                    if np.absolute(1.0 - np.sum(weights)) > eps:
-                                        print("Weights do not sum to 1, exiting")
-                                        sys.exit(-1)
-                                    varo_vegType[t, jxy, ixy] = np.sum(dum * weights)
-
-                                elif "shrub" in vegType:
-                                    pfts1d_wtlunit_shrub = (
-                                        pfts1d_wtlunit[pft_indx]
-                                    ).astype(np.float32)
-                                    dum = GPP[t, pft_indx]
-                                    weights = pfts1d_wtlunit_shrub / np.sum(
-                                        pfts1d_wtlunit_shrub
-                                    )
-                                    varo_vegType[t, jxy, ixy] = np.sum(dum * weights)
-
-                                elif "tree" in vegType:
-                                    pfts1d_wtlunit_tree = (
-                                        pfts1d_wtlunit[pft_indx]
-                                    ).astype(np.float32)
-                                    dum = GPP[t, pft_indx]
-                                    weights = pfts1d_wtlunit_tree / np.sum(
-                                        pfts1d_wtlunit_tree
-                                    )
-                                    varo_vegType[t, jxy, ixy] = np.sum(dum * weights)
-
-                        else:
-                            varo_vegType[:, jxy, ixy] = 1e20
-                    else:
-                        varo_vegType[:, jxy, ixy] = 1e20
-                else:
-                    varo_vegType[:, jxy, ixy] = 1e20
+        # First and last CLM pft of each vegetation type
+        vegtypes = {
+            # C3 arctic grass,
+            # C3 non-arctic grass,
+            # C4 grass
+            "grass": (12, 14),
+            # broadleaf evergreen shrub - temperate,
+            # broadleaf deciduous shrub - temperate,
+            # broadleaf deciduous shrub - boreal
+            "shrub": (9, 11),
+            # needleleaf evergreen tree - temperate,
+            # needleleaf evergreen tree - boreal,
+            # needleleaf deciduous tree - boreal,
+            # broadleaf evergreen tree - tropical,
+            # broadleaf evergreen tree - temperate,
+            # broadleaf deciduous tree - tropical,
+            # broadleaf deciduous tree - temperate,
+            # broadleaf deciduous tree - boreal
+            "tree": (1, 8),
+        }
+        vname = [v for v in ("grass", "shrub", "tree") if v in vegType]
+        if len(vname) == 0:
+            raise ValueError(
+                "CLM_pft_to_CMIP6_vegtype: Unknown vegetation type {!r}".format(vegType)
+            )
+
+        # Sparse maps from pfts to the 2d grid, shared by all variables of the same file
+        maps = clmmaps.cached_maps(
+            "pft_vegtype",
+            partial(clmmaps.pft_vegtype_maps, vegtypes),
+            len(lat),
+            len(lon),
+            grid1d_ixy,
+            grid1d_jxy,
+            grid1d_lon,
+            grid1d_lat,
+            land1d_lon,
+            land1d_lat,
+            land1d_ityplunit,
+            pfts1d_lon,
+            pfts1d_lat,
+            pfts1d_active,
+            pfts1d_itype_veg,
+            pfts1d_wtgcell,
+            pfts1d_wtlunit,
+        )
+
+        # Weighted average of the pfts of the vegetation type on the 2d grid
+        varo_vegType = maps[vname[0]].scatter(GPP, fill_value=1e20)
 
         new_name = (
             "CLM_pft_to_CMIP6_vegtype({}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{})".format(
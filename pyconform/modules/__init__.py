@@ -0,0 +1,64 @@
+"""
+Modules of PyConform functions
+
+The functions defined in each module are listed in the FUNCTIONS manifest, so that a module is
+only imported when one of its functions is first used.  The atm_funcs module redefines some
+functions of commonfunctions, and it is only loaded when imported explicitly, in which case its
+functions take precedence over those of commonfunctions imported on demand.
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+# Names of the functions defined in each module of this package
+FUNCTIONS = {
+    "commonfunctions": (
+        "zonalmean",
+        "oclim",
+        "oclim_time",
+        "oclim_timebnds",
+        "monthtoyear_noleap",
+        "monthtoyear_noleap_time",
+        "monthtoyear_noleap_timebnds",
+        "bounds",
+        "ageofair",
+        "yeartomonth_data",
+        "yeartomonth_data3D",
+        "yeartomonth_time",
+        "POP_bottom_layer",
+        "diff_axis1_ind0bczero_4d",
+        "rsdoabsorb",
+        "POP_surf_mean",
+        "POP_3D_mean",
+        "sftof",
+        "POP_bottom_layer_multadd",
+        "POP_layer_sum_mult",
+        "masked_invalid",
+        "hemisphere",
+        "cice_where",
+        "cice_regions",
+        "burntFraction",
+        "reduce_lu",
+        "get_soilpools",
+        "get_nonwoodyveg",
+        "expand_latlon",
+        "ocean_basin",
+        "emilnox",
+        "delp",
+        "rho",
+        "pm25",
+    ),
+    "dynvarmipfunctions": (
+        "dynvarmip_wtem",
+        "dynvarmip_utendwtem",
+        "dynvarmip_vtem",
+        "dynvarmip_utendvtem",
+        "dynvarmip_epfy",
+        "dynvarmip_epfz",
+        "dynvarmip_utendepfd",
+        "dynvarmip_psitem",
+    ),
+    "pnglfunctions": ("vinth2p",),
+    "CLM_landunit_to_CMIP6_Lut": ("CLM_landunit_to_CMIP6_Lut",),
+    "CLM_pft_to_CMIP6_vegtype": ("CLM_pft_to_CMIP6_vegtype",),
+}
@@ -5,6 +5,7 @@ LICENSE: See the LICENSE.rst file for details
 
 import numpy as np
 
+import pyconform.modules.hybridpres as hpres
 from pyconform.functions import Function
 from pyconform.physarray import PhysArray
 
@@ -32,30 +33,26 @@ class delpFunction(Function):
                 ],
             )
 
-        PO = p_PO.data
-        PS = p_PS.data
-        hyai = p_hyai.data
-        hybi = p_hybi.data
+        dp = hpres.thickness(p_PO.data, p_PS.data, p_hyai.data, p_hybi.data)
+        delp = np.zeros(dp.shape[:-3] + (len(p_hybi),) + dp.shape[-2:])
+        delp[..., :-1, :, :] = dp
 
-        p = (hyai * PO) + (hybi * PS)
-        j = len(hybi)
-        delp = np.ma.zeros(
-            (
+        new_name = "delp({}{}{}{})".format(
+            p_PO.name, p_PS.name, p_hyai.name, p_hybi.name
+        )
+
+        return PhysArray(
+            delp,
+            name=new_name,
+            units="Pa",
+            dimensions=[
                 p_PS.dimensions[0],
                 p_hybi.dimensions[0],
                 p_PS.dimensions[1],
                 p_PS.dimensions[2],
-            )
-        )
-        for i in range(0, j - 1):
-            delp[:, i, :, :] = p[:, i + 1, :, :] - p[:, i, :, :]
-
-        new_name = "delp({}{}{}{})".format(
-            p_PO.name, p_PS.name, p_hyai.name, p_hybi.name
+            ],
         )
 
-        return PhysArray(delp, name=new_name, units="Pa")
-
 
 class rhoFunction(Function):
     key = "rho"
@@ -81,20 +78,15 @@ class rhoFunction(Function):
                 ],
             )
 
-        PO = p_PO.data
-        PS = p_PS.data
-        hyam = p_hyam.data
-        hybm = p_hybm.data
+        p = hpres.pressure(p_PO.data, p_PS.data, p_hyam.data, p_hybm.data)
         T = p_T.data
-
-        p = (hyam * PO) + (hybm * PS)
         rho = p / (287.04 * T)
 
         new_name = "rho({}{}{}{}{})".format(
             p_PO.name, p_PS.name, p_hyam.name, p_hybm.name, p_T.name
         )
 
-        return PhysArray(rho, name=new_name, units="cm-3")
+        return PhysArray(rho, name=new_name, units="cm-3", dimensions=p_T.dimensions)
 
 
 class pm25Function(Function):
@@ -122,21 +114,16 @@ class pm25Function(Function):
                 ],
             )
 
-        PO = p_PO.data
-        PS = p_PS.data
-        hyam = p_hyam.data
-        hybm = p_hybm.data
+        p = hpres.pressure(p_PO.data, p_PS.data, p_hyam.data, p_hybm.data)
         T = p_T.data
         PM25_o = p_PM25_o.data
-
-        p = (hyam * PO) + (hybm * PS)
         pm25 = PM25_o * 287.0 * T / p
 
         new_name = "pm25({}{}{}{}{}{})".format(
             p_PO.name, p_PS.name, p_hyam.name, p_hybm.name, p_T.name, p_PM25_o.name
         )
 
-        return PhysArray(pm25, name=new_name, units="kg/kg")
+        return PhysArray(pm25, name=new_name, units="kg/kg", dimensions=p_T.dimensions)
 
 
 # class tozFunction(Function):
@@ -0,0 +1,108 @@
+"""
+Sea ice transports through the CICE passages on the gx1 grid
+
+Each passage is a transect of grid points, listed in a table with the faces of the cells that
+the ice crosses.  The transport through each face is computed for all points of all transects
+and all times at once, and the transport through each passage is the sum over its points,
+computed as a single dot product with the (precomputed) matrix mapping points to passages.
+
+NOTE:  All of these functions return numpy arrays!
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import numpy
+
+# Transects of the passages, as (passage, j, i, east, north): the index of the passage, the
+# grid indices of the points (as a range and a single index), and whether the transport
+# through the east face (with uvel) and through the north face (with vvel) is included
+TRANSECTS = [
+    (0, range(370, 381), 92, True, False),
+    (1, range(375, 377), 214, True, True),
+    (1, 366, range(240, 244), True, True),
+    (2, range(344, 366), 85, True, False),
+    (3, 333, range(198, 201), False, True),
+]
+
+
+def _points_(transects):
+    passage, j, i, east, north = [], [], [], [], []
+    for p, js, is_, e, n in transects:
+        js, is_ = numpy.broadcast_arrays(numpy.array(js), numpy.array(is_))
+        j.extend(js.ravel())
+        i.extend(is_.ravel())
+        passage.extend([p] * js.size)
+        east.extend([e] * js.size)
+        north.extend([n] * js.size)
+    npassages = max(passage) + 1
+    weights = numpy.zeros((len(passage), npassages))
+    weights[numpy.arange(len(passage)), passage] = 1.0
+    return (
+        numpy.array(j),
+        numpy.array(i),
+        numpy.array(east),
+        numpy.array(north),
+        weights,
+    )
+
+
+# Grid indices of all transect points, the faces included at each point, and the matrix
+# summing the transports of the points into the transports of the passages
+_J_, _I_, _EAST_, _NORTH_, _WEIGHTS_ = _points_(TRANSECTS)
+
+
+def transports(aice, uvel, vvel, HTE, HTN):
+    """
+    Ice transports through each passage
+
+    Points where the ice area of the cell (or of a neighbor across an included face) is
+    missing are skipped, with one warning summarizing the number of points skipped.
+
+    Parameters:
+        aice (array): Ice area fraction, with dimensions (time, nj, ni)
+        uvel (array): Eastward ice velocity, with dimensions (time, nj, ni)
+        vvel (array): Northward ice velocity, with dimensions (time, nj, ni)
+        HTE (array): Length of the east face of each cell, with dimensions (nj, ni)
+        HTN (array): Length of the north face of each cell, with dimensions (nj, ni)
+
+    Returns:
+        Array with dimensions (time, passage)
+    """
+    j, i = _J_, _I_
+    uvel0 = numpy.where(uvel[:, j, i] >= 1e16, 0.0, uvel[:, j, i])
+    uvel1 = numpy.where(uvel[:, j - 1, i] >= 1e16, 0.0, uvel[:, j - 1, i])
+    vvel0 = numpy.where(vvel[:, j, i] >= 1e16, 0.0, vvel[:, j, i])
+    vvel1 = numpy.where(vvel[:, j, i - 1] >= 1e16, 0.0, vvel[:, j, i - 1])
+    aice0 = aice[:, j, i]
+    aice_east = aice[:, j, i + 1]
+    aice_north = aice[:, j + 1, i]
+
+    missing = aice0 >= 1e16
+    missing |= _EAST_ & (aice_east >= 1e16)
+    missing |= _NORTH_ & (aice_north >= 1e16)
+    if missing.any():
+        t, p = numpy.nonzero(missing)
+        print(
+            "CICE aice WARNING: {} transect points contain missing values and were "
+            "skipped, the first at the point (t, j, i) = ({}, {}, {})".format(
+                len(t), t[0], j[p[0]], i[p[0]]
+            )
+        )
+
+    with numpy.errstate(invalid="ignore", over="ignore"):
+        east = (
+            0.5
+            * (aice0 + aice_east).astype("d")
+            * 0.5
+            * (HTE[j, i] * uvel0 + HTE[j, i] * uvel1).astype("d")
+        )
+        north = (
+            0.5
+            * (aice0 + aice_north).astype("d")
+            * 0.5
+            * (HTN[j, i] * vvel0 + HTN[j, i] * vvel1).astype("d")
+        )
+    points = numpy.where(_EAST_, east, 0.0) + numpy.where(_NORTH_, north, 0.0)
+    points[missing] = 0.0
+    return numpy.dot(points, _WEIGHTS_)
@@ -0,0 +1,426 @@
+"""
+Sparse maps from CLM 1D vectors to 2D grid cells
+
+CLM history files store PFT- and landunit-level variables as 1D vectors, together with the
+coordinates and types of each PFT and landunit.  A ScatterMap records, for each 2D grid cell,
+which elements of a 1D vector contribute to that cell and with what weight.  Building the map
+only depends on the 1D coordinate and type variables, so a map is built once and then applied
+to every time step of every variable that shares the same CLM history file with a single
+weighted sum.
+
+Maps are cached in memory, keyed by the contents of the variables they are built from.  If the
+PYCONFORM_CACHE_DIR environment variable (or the module-level CACHE_DIR) names a directory, the
+maps are also saved there and reused by later runs.
+
+NOTE:  All of these functions return numpy arrays!
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import os
+from hashlib import sha1
+from tempfile import mkstemp
+
+import numpy
+
+# Directory in which to save built maps (None to keep maps in memory only)
+CACHE_DIR = os.environ.get("PYCONFORM_CACHE_DIR")
+
+# Maps built during this run, keyed by the digest of the variables they are built from
+_cache = {}
+
+# Tolerance check for weights summing to 1
+_EPS_ = 1.0e-5
+
+# Arrays saved for each ScatterMap
+_MAP_ARRAYS_ = ("shape", "cells", "sources", "weights")
+
+
+class ScatterMap(object):
+    """
+    Sparse, weighted mapping from the elements of a 1D vector to the cells of a 2D grid
+    """
+
+    def __init__(self, shape, cells, sources, weights):
+        """
+        Initializer
+
+        Parameters:
+            shape (tuple): The shape of the 2D grid (nlat, nlon)
+            cells (array): The flat grid cell index of each map entry, sorted
+            sources (array): The 1D vector index of each map entry
+            weights (array): The weight of each map entry
+        """
+        self._shape = tuple(int(s) for s in shape)
+        self._cells = numpy.asarray(cells, dtype=numpy.intp)
+        self._sources = numpy.asarray(sources, dtype=numpy.intp)
+        self._weights = numpy.asarray(weights)
+        if len(self._cells) > 0:
+            first = numpy.concatenate(([True], self._cells[1:] != self._cells[:-1]))
+            self._starts = numpy.flatnonzero(first)
+        else:
+            self._starts = numpy.zeros(0, dtype=numpy.intp)
+
+    @property
+    def shape(self):
+        """The shape of the 2D grid"""
+        return self._shape
+
+    @property
+    def cells(self):
+        """The flat indices of the grid cells with at least one map entry"""
+        return self._cells[self._starts]
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, ScatterMap)
+            and self._shape == other._shape
+            and numpy.array_equal(self._cells, other._cells)
+            and numpy.array_equal(self._sources, other._sources)
+            and numpy.array_equal(self._weights, other._weights)
+        )
+
+    def scatter(self, data, fill_value=1e20):
+        """
+        Compute the weighted sum of the 1D data mapped to each grid cell
+
+        Parameters:
+            data (array): Data with shape (nt, n) or (n,)
+            fill_value (float): The value of grid cells without map entries
+
+        Returns:
+            Double-precision array with shape (nt, nlat, nlon) or (nlat, nlon)
+        """
+        data = numpy.asarray(data)
+        lead = data.shape[:-1]
+        data = data.reshape((-1, data.shape[-1]))
+        out = numpy.full(
+            (data.shape[0], self._shape[0] * self._shape[1]), fill_value, dtype="d"
+        )
+        if len(self._starts) > 0:
+            values = data[:, self._sources] * self._weights
+            out[:, self.cells] = numpy.add.reduceat(values, self._starts, axis=1)
+        return out.reshape(lead + self._shape)
+
+
+def save_maps(fname, maps):
+    """
+    Save ScatterMaps to a file
+
+    The maps are written to a temporary file in the same directory, which then replaces the
+    named file, so that other processes never load a partially written file.
+
+    Parameters:
+        fname (str): The name of the file (in numpy .npz format)
+        maps (dict): The ScatterMaps, by name
+    """
+    arrays = {}
+    for name, smap in maps.items():
+        arrays["{}.shape".format(name)] = numpy.array(smap._shape)
+        arrays["{}.cells".format(name)] = smap._cells
+        arrays["{}.sources".format(name)] = smap._sources
+        arrays["{}.weights".format(name)] = smap._weights
+    fd, tmpname = mkstemp(dir=os.path.dirname(os.path.abspath(fname)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            numpy.savez(f, **arrays)
+        os.replace(tmpname, fname)
+    except BaseException:
+        os.remove(tmpname)
+        raise
+
+
+def load_maps(fname):
+    """
+    Load ScatterMaps from a file
+
+    Parameters:
+        fname (str): The name of the file (in numpy .npz format)
+
+    Returns:
+        dict: The ScatterMaps, by name
+    """
+    with numpy.load(fname) as f:
+        names = sorted(set(k.rsplit(".", 1)[0] for k in f.files))
+        return dict(
+            (n, ScatterMap(*[f["{}.{}".format(n, a)] for a in _MAP_ARRAYS_]))
+            for n in names
+        )
+
+
+def _digest_(*args):
+    h = sha1()
+    for arg in args:
+        arr = numpy.asarray(arg)
+        h.update(repr((arr.dtype.str, arr.shape)).encode())
+        h.update(numpy.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+def cached_maps(kind, build, *args):
+    """
+    Retrieve the maps built from the given variables, building them if not yet cached
+
+    Parameters:
+        kind (str): A name for the kind of maps
+        build: A function of the given variables returning a dictionary of ScatterMaps
+        args: The variables from which the maps are built
+
+    Returns:
+        dict: The ScatterMaps, by name
+    """
+    key = "{}-{}".format(kind, _digest_(*args))
+    if key in _cache:
+        return _cache[key]
+    fname = None if CACHE_DIR is None else os.path.join(CACHE_DIR, key + ".npz")
+    if fname is not None and os.path.exists(fname):
+        maps = load_maps(fname)
+    else:
+        maps = build(*args)
+        if fname is not None:
+            save_maps(fname, maps)
+    _cache[key] = maps
+    return maps
+
+
+def clear_cache():
+    """Discard all maps cached in memory"""
+    _cache.clear()
+
+
+def grid_cells(grid1d_ixy, grid1d_jxy, nlat, nlon):
+    """
+    Find the first 1D gridcell of each 2D grid cell
+
+    Parameters:
+        grid1d_ixy (array): The (1-based) longitude index of each 1D gridcell
+        grid1d_jxy (array): The (1-based) latitude index of each 1D gridcell
+        nlat (int): The number of latitudes of the 2D grid
+        nlon (int): The number of longitudes of the 2D grid
+
+    Returns:
+        cells (array): The flat indices of the 2D grid cells with a 1D gridcell
+        gridcells (array): The index of the first 1D gridcell of each of those cells
+    """
+    ixy = numpy.asarray(grid1d_ixy)
+    jxy = numpy.asarray(grid1d_jxy)
+    valid = (
+        (ixy == numpy.round(ixy))
+        & (jxy == numpy.round(jxy))
+        & (ixy >= 1)
+        & (ixy <= nlon)
+        & (jxy >= 1)
+        & (jxy <= nlat)
+    )
+    gridcells = numpy.flatnonzero(valid)
+    flat = (
+        (jxy[valid].astype(numpy.intp) - 1) * nlon + ixy[valid].astype(numpy.intp) - 1
+    )
+    cells, first = numpy.unique(flat, return_index=True)
+    return cells, gridcells[first]
+
+
+def _coord_ids_(lon, lat):
+    """Integer ids of coordinate pairs, equal for (and only for) equal pairs"""
+    lon = numpy.asarray(lon, dtype="d")
+    lat = numpy.asarray(lat, dtype="d")
+    order = numpy.lexsort((lon, lat))
+    new = numpy.ones(len(order), dtype=bool)
+    new[1:] = (lon[order][1:] != lon[order][:-1]) | (lat[order][1:] != lat[order][:-1])
+    ids = numpy.empty(len(order), dtype=numpy.intp)
+    ids[order] = numpy.cumsum(new) - 1
+    return ids
+
+
+def match_coords(cell_lon, cell_lat, lon, lat):
+    """
+    Find all pairs of grid cells and 1D elements with equal coordinates
+
+    Parameters:
+        cell_lon (array): The longitude of each grid cell
+        cell_lat (array): The latitude of each grid cell
+        lon (array): The longitude of each 1D element
+        lat (array): The latitude of each 1D element
+
+    Returns:
+        cells (array): The (position in the given cells of the) grid cell of each pair, sorted
+        elements (array): The 1D element of each pair
+    """
+    ncells = len(cell_lon)
+    ids = _coord_ids_(
+        numpy.concatenate((cell_lon, lon)), numpy.concatenate((cell_lat, lat))
+    )
+    cell_ids = ids[:ncells]
+    elem_ids = ids[ncells:]
+    corder = numpy.argsort(cell_ids, kind="stable")
+    lo = numpy.searchsorted(cell_ids[corder], elem_ids, side="left")
+    hi = numpy.searchsorted(cell_ids[corder], elem_ids, side="right")
+    counts = hi - lo
+    elements = numpy.repeat(numpy.arange(len(lon)), counts)
+    offsets = numpy.arange(counts.sum()) - numpy.repeat(
+        numpy.cumsum(counts) - counts, counts
+    )
+    cells = corder[numpy.repeat(lo, counts) + offsets]
+    order = numpy.lexsort((elements, cells))
+    return cells[order], elements[order]
+
+
+def _first_per_cell_(cells, elements):
+    keep = numpy.ones(len(cells), dtype=bool)
+    keep[1:] = cells[1:] != cells[:-1]
+    return cells[keep], elements[keep]
+
+
+def _normalized_weights_(cells, weights, check=False):
+    """
+    Weights (as float32) normalized by their sum over each cell
+
+    Parameters:
+        cells (array): The flat grid cell index of each weight, sorted
+        weights (array): The weights
+        check (bool): Whether to raise a ValueError if the normalized weights of any cell do
+            not sum to 1 (e.g., if the weights of the cell sum to 0)
+    """
+    weights = numpy.asarray(weights).astype(numpy.float32)
+    if len(cells) == 0:
+        return weights
+    first = numpy.concatenate(([True], cells[1:] != cells[:-1]))
+    starts = numpy.flatnonzero(first)
+    sums = numpy.add.reduceat(weights, starts)
+    counts = numpy.diff(numpy.append(starts, len(cells)))
+    weights = weights / numpy.repeat(sums, counts)
+    if check:
+        wsums = numpy.add.reduceat(weights, starts)
+        bad = ~(numpy.absolute(1.0 - wsums) <= _EPS_)
+        if numpy.any(bad):
+            raise ValueError(
+                "Weights do not sum to 1 in grid cells (flat indices) {}".format(
+                    cells[starts][bad].tolist()
+                )
+            )
+    return weights
+
+
+def pft_vegtype_maps(
+    vegtypes,
+    nlat,
+    nlon,
+    grid1d_ixy,
+    grid1d_jxy,
+    grid1d_lon,
+    grid1d_lat,
+    land1d_lon,
+    land1d_lat,
+    land1d_ityplunit,
+    pfts1d_lon,
+    pfts1d_lat,
+    pfts1d_active,
+    pfts1d_itype_veg,
+    pfts1d_wtgcell,
+    pfts1d_wtlunit,
+):
+    """
+    Build the maps from PFTs to grid cells, for each range of vegetation types
+
+    Each grid cell with a vegetated landunit is mapped to the active PFTs (with nonzero
+    gridcell weight) of each range of vegetation types at the same coordinates, weighted by the
+    PFT weights on the landunit normalized to sum to 1.
+
+    Parameters:
+        vegtypes (dict): The first and last vegetation type of each range, by name
+
+    Returns:
+        dict: The ScatterMap of each range of vegetation types, by name
+    """
+    cells, gridcells = grid_cells(grid1d_ixy, grid1d_jxy, nlat, nlon)
+    cell_lon = numpy.asarray(grid1d_lon)[gridcells]
+    cell_lat = numpy.asarray(grid1d_lat)[gridcells]
+
+    # Grid cells with a vegetated landunit
+    veg = numpy.flatnonzero(numpy.asarray(land1d_ityplunit) == 1)
+    vcells, _ = match_coords(
+        cell_lon,
+        cell_lat,
+        numpy.asarray(land1d_lon)[veg],
+        numpy.asarray(land1d_lat)[veg],
+    )
+    has_veg = numpy.zeros(len(cells), dtype=bool)
+    has_veg[vcells] = True
+
+    itype = numpy.asarray(pfts1d_itype_veg)
+    active = (numpy.asarray(pfts1d_active) == 1) & (numpy.asarray(pfts1d_wtgcell) > 0.0)
+    maps = {}
+    for name, (beg, end) in vegtypes.items():
+        pfts = numpy.flatnonzero(active & (itype >= beg) & (itype <= end))
+        pcells, elems = match_coords(
+            cell_lon,
+            cell_lat,
+            numpy.asarray(pfts1d_lon)[pfts],
+            numpy.asarray(pfts1d_lat)[pfts],
+        )
+        keep = has_veg[pcells]
+        pcells = cells[pcells[keep]]
+        sources = pfts[elems[keep]]
+        weights = _normalized_weights_(
+            pcells, numpy.asarray(pfts1d_wtlunit)[sources], check=(name == "grass")
+        )
+        maps[name] = ScatterMap((nlat, nlon), pcells, sources, weights)
+    return maps
+
+
+def landunit_lut_maps(
+    nlat,
+    nlon,
+    grid1d_ixy,
+    grid1d_jxy,
+    grid1d_lon,
+    grid1d_lat,
+    land1d_lon,
+    land1d_lat,
+    land1d_ityplunit,
+    land1d_active,
+    land1d_wtgcell,
+):
+    """
+    Build the maps from landunits to grid cells, for each land use tile
+
+    Each grid cell is mapped to the active (with nonzero gridcell weight) vegetated ("veg") and
+    crop ("crop") landunits at the same coordinates, and to the weighted average of the active
+    urban landunits ("urban") at the same coordinates.
+
+    Returns:
+        dict: The ScatterMap of each land use tile, by name
+    """
+    cells, gridcells = grid_cells(grid1d_ixy, grid1d_jxy, nlat, nlon)
+    cell_lon = numpy.asarray(grid1d_lon)[gridcells]
+    cell_lat = numpy.asarray(grid1d_lat)[gridcells]
+
+    ityp = numpy.asarray(land1d_ityplunit)
+    active = (numpy.asarray(land1d_active) == 1) & (numpy.asarray(land1d_wtgcell) > 0)
+    selections = {
+        "veg": active & (ityp == 1),
+        "crop": active & (ityp == 2),
+        "urban": active & (ityp >= 7) & (ityp <= 9),
+    }
+    maps = {}
+    for name, selected in selections.items():
+        lunits = numpy.flatnonzero(selected)
+        lcells, elems = match_coords(
+            cell_lon,
+            cell_lat,
+            numpy.asarray(land1d_lon)[lunits],
+            numpy.asarray(land1d_lat)[lunits],
+        )
+        if name == "urban":
+            lcells = cells[lcells]
+            sources = lunits[elems]
+            weights = _normalized_weights_(
+                lcells, numpy.asarray(land1d_wtgcell)[sources], check=True
+            )
+        else:
+            lcells, elems = _first_per_cell_(cells[lcells], elems)
+            sources = lunits[elems]
+            weights = numpy.ones(len(sources), dtype=numpy.float32)
+        maps[name] = ScatterMap((nlat, nlon), lcells, sources, weights)
+    return maps
@@ -1,10 +1,17 @@
 #!/usr/bin/env python
 
 import math
+import operator
 
 import numpy as np
 from numpy import diff, empty, mean
 
+import pyconform.modules.cicetransports as ct
+import pyconform.modules.gridfields as gf
+import pyconform.modules.hybridpres as hpres
+import pyconform.modules.landuse as lu
+import pyconform.modules.popkernels as popk
+import pyconform.modules.resample as rs
 from pyconform.functions import Function, is_constant
 from pyconform.physarray import DimensionsError, PhysArray
 
@@ -26,77 +33,32 @@ class ZonalMeanFunction(Function):
 class OclimFunction(Function):
     key = "oclim"
 
-    def __init__(self, data):
-        super(OclimFunction, self).__init__(data)
+    def __init__(self, data, years=rs.YEARS_PER_CHUNK):
+        super(OclimFunction, self).__init__(data, years=years)
         data_info = data if is_constant(data) else data[None]
         if not isinstance(data_info, PhysArray):
             raise TypeError("oclim: Data must be a PhysArray")
+        if not isinstance(years, int) or years < 1:
+            raise ValueError("oclim: Number of years read at a time must be positive")
 
     def __getitem__(self, index):
-
-        data = self.arguments[0][index]
+        data = self.arguments[0][None]
         new_name = "oclim({})".format(data.name)
 
         if index is None:
-            if len(data.dimensions) == 3:
-                return PhysArray(
-                    np.zeros((0, 0, 0)),
-                    dimensions=[
-                        data.dimensions[0],
-                        data.dimensions[1],
-                        data.dimensions[2],
-                    ],
-                    units=data.units,
-                )
-            elif len(data.dimensions) == 4:
-                return PhysArray(
-                    np.zeros((0, 0, 0, 0)),
-                    units=data.units,
-                    dimensions=[
-                        data.dimensions[0],
-                        data.dimensions[1],
-                        data.dimensions[2],
-                        data.dimensions[3],
-                    ],
-                )
-
-        if len(data.dimensions) == 3:
-            a = np.ma.zeros((12, data.data.shape[1], data.data.shape[2]))
-        elif len(data.dimensions) == 4:
-            a = np.ma.zeros(
-                (12, data.data.shape[1], data.data.shape[2], data.data.shape[3])
-            )
-
-        dim_count = len(data.dimensions)
-        dataD = data.data
-
-        for i in range(12):
-            a[i, ...] = np.ma.mean(dataD[i::12, ...], axis=0)
-
-        a[a >= 1e16] = 1e20
-        a = np.ma.masked_values(a, 1e20)
-
-        if dim_count == 3:
-            a = PhysArray(
-                a,
-                name=new_name,
-                units=data.units,
-                dimensions=[data.dimensions[0], data.dimensions[1], data.dimensions[2]],
-            )
-        elif dim_count == 4:
-            a = PhysArray(
-                a,
-                name=new_name,
+            return PhysArray(
+                np.zeros((0,) * len(data.dimensions)),
+                dimensions=data.dimensions,
                 units=data.units,
-                dimensions=[
-                    data.dimensions[0],
-                    data.dimensions[1],
-                    data.dimensions[2],
-                    data.dimensions[3],
-                ],
             )
 
-        return a
+        tindex, full_index, dimensions = rs.time_index(index, data.dimensions)
+        chunks = rs.read_years(
+            lambda t: self.arguments[0][full_index(t)], years=self.keywords["years"]
+        )
+        a = rs.mask_fill(rs.monthly_climatology(chunks)[tindex])
+
+        return PhysArray(a, name=new_name, units=data.units, dimensions=dimensions)
 
 
 class oclim_timeFunction(Function):
@@ -106,7 +68,7 @@ class oclim_timeFunction(Function):
         super(oclim_timeFunction, self).__init__(time_bnds)
 
     def __getitem__(self, index):
-        p_time_bnds = self.arguments[0][index]
+        p_time_bnds = self.arguments[0][None]
 
         if index is None:
             return PhysArray(
@@ -116,11 +78,10 @@ class oclim_timeFunction(Function):
                 calendar="noleap",
             )
 
-        time_bnds = p_time_bnds.data
+        tindex, full_index, _ = rs.time_index(index, p_time_bnds.dimensions)
+        time_bnds = self.arguments[0][full_index(slice(0, 12))].data
 
-        b = np.zeros((12))
-        for i in range(12):
-            b[i] = (time_bnds[i][0] + time_bnds[i][1]) / 2
+        b = ((time_bnds[:, 0] + time_bnds[:, 1]) / 2)[tindex]
 
         new_name = "oclim_time({})".format(p_time_bnds.name)
 
@@ -140,7 +101,7 @@ class oclim_timebndsFunction(Function):
         super(oclim_timebndsFunction, self).__init__(time, bdim="d2")
 
     def __getitem__(self, index):
-        p_time = self.arguments[0][index]
+        p_time = self.arguments[0][None]
         bdim = self.keywords["bdim"]
 
         bnds = PhysArray([1, 1], dimensions=(bdim,))
@@ -153,27 +114,11 @@ class oclim_timebndsFunction(Function):
                 calendar="noleap",
             )
 
-        b = np.zeros((12, 2))
-        time = p_time.data
-
-        monLens = [
-            31.0,
-            28.0,
-            31.0,
-            30.0,
-            31.0,
-            30.0,
-            31.0,
-            31.0,
-            30.0,
-            31.0,
-            30.0,
-            31.0,
-        ]
+        tindex, full_index, _ = rs.time_index(index, p_time.dimensions)
+        first = self.arguments[0][full_index(slice(0, 12))].data
+        last = self.arguments[0][full_index(slice(-12, None))].data
 
-        for i in range(11, -1, -1):
-            b[i][0] = time[i] - monLens[i]
-            b[i][1] = time[-(12 - i)]
+        b = np.stack([first - rs.DAYS_PER_MONTH, last], axis=1)[tindex]
         new_name = "oclim_timebnds({})".format(p_time.name)
 
         return PhysArray(
@@ -195,83 +140,28 @@ class monthtoyear_noleapFunction(Function):
             raise TypeError("monthtoyear_noleap: Data must be a PhysArray")
 
     def __getitem__(self, index):
-
-        data = self.arguments[0][index]
+        data = self.arguments[0][None]
         new_name = "monthtoyear_noleap({})".format(data.name)
 
         if index is None:
-            if len(data.dimensions) == 3:
-                return PhysArray(
-                    np.zeros((0, 0, 0)),
-                    dimensions=[
-                        data.dimensions[0],
-                        data.dimensions[1],
-                        data.dimensions[2],
-                    ],
-                    units=data.units,
-                )
-            elif len(data.dimensions) == 4:
-                return PhysArray(
-                    np.zeros((0, 0, 0, 0)),
-                    units=data.units,
-                    dimensions=[
-                        data.dimensions[0],
-                        data.dimensions[1],
-                        data.dimensions[2],
-                        data.dimensions[3],
-                    ],
-                )
-
-        if len(data.dimensions) == 3:
-            a = np.ma.zeros(
-                (data.data.shape[0] / 12, data.data.shape[1], data.data.shape[2])
-            )
-        elif len(data.dimensions) == 4:
-            a = np.ma.zeros(
-                (
-                    data.data.shape[0] / 12,
-                    data.data.shape[1],
-                    data.data.shape[2],
-                    data.data.shape[3],
-                )
+            return PhysArray(
+                np.zeros((0,) * len(data.dimensions)),
+                dimensions=data.dimensions,
+                units=data.units,
             )
 
-        dim_count = len(data.dimensions)
-        time = data.data.shape[0]
-        dataD = data.data
+        tindex, full_index, dimensions = rs.time_index(index, data.dimensions)
+        y0, y1, yindex = rs.slice_range(tindex)
 
-        days_in_month = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+        def read(t):
+            return self.arguments[0][full_index(t)]
 
-        for i in range(time / 12):
-            start = i * 12
-            a[i, ...] = np.ma.average(
-                dataD[start : start + 12, ...], axis=0, weights=days_in_month
-            )
+        means = [rs.annual_mean(c) for c in rs.read_years(read, y0, y1)]
+        if len(means) == 0:
+            means = [rs.annual_mean(read(slice(0, 0)))]
+        a = rs.mask_fill(np.ma.concatenate(means)[yindex])
 
-        a[a >= 1e16] = 1e20
-        a = np.ma.masked_values(a, 1e20)
-
-        if dim_count == 3:
-            a1 = PhysArray(
-                a,
-                name=new_name,
-                units=data.units,
-                dimensions=[data.dimensions[0], data.dimensions[1], data.dimensions[2]],
-            )
-        elif dim_count == 4:
-            a1 = PhysArray(
-                a,
-                name=new_name,
-                units=data.units,
-                dimensions=[
-                    data.dimensions[0],
-                    data.dimensions[1],
-                    data.dimensions[2],
-                    data.dimensions[3],
-                ],
-            )
-
-        return a1
+        return PhysArray(a, name=new_name, units=data.units, dimensions=dimensions)
 
 
 class monthtoyear_noleap_timeFunction(Function):
@@ -281,7 +171,7 @@ class monthtoyear_noleap_timeFunction(Function):
         super(monthtoyear_noleap_timeFunction, self).__init__(time_bnds)
 
     def __getitem__(self, index):
-        p_time_bnds = self.arguments[0][index]
+        p_time_bnds = self.arguments[0][None]
 
         if index is None:
             return PhysArray(
@@ -291,14 +181,13 @@ class monthtoyear_noleap_timeFunction(Function):
                 calendar="noleap",
             )
 
-        time_bnds = p_time_bnds.data
+        tindex, full_index, _ = rs.time_index(index, p_time_bnds.dimensions)
+        y0, y1, yindex = rs.slice_range(tindex)
+        mslice = slice(12 * y0, None if y1 is None else 12 * y1)
+        time_bnds = self.arguments[0][full_index(mslice)].data
 
-        b = np.zeros((time_bnds.shape[0] / 12))
-        time = time_bnds.shape[0]
-        for i in range(time / 12):
-            start = i * 12
-            end = (i * 12) + 11
-            b[i] = ((time_bnds[start][0] + time_bnds[end][1]) / 2) - 365
+        first, last = rs.first_and_last_of_year(time_bnds)
+        b = (((first[:, 0] + last[:, 1]) / 2) - 365)[yindex]
 
         new_name = "monthtoyear_noleap_time({})".format(p_time_bnds.name)
 
@@ -318,7 +207,7 @@ class monthtoyear_noleap_timebndsFunction(Function):
         super(monthtoyear_noleap_timebndsFunction, self).__init__(time_bound, bdim="d2")
 
     def __getitem__(self, index):
-        p_time_bound = self.arguments[0][index]
+        p_time_bound = self.arguments[0][None]
         bdim = self.keywords["bdim"]
 
         bnds = PhysArray([1, 1], dimensions=(bdim,))
@@ -331,12 +220,13 @@ class monthtoyear_noleap_timebndsFunction(Function):
                 calendar="noleap",
             )
 
-        time_bound = p_time_bound.data
-        b = np.zeros((time_bound.shape[0] / 12, 2))
+        tindex, full_index, _ = rs.time_index(index, p_time_bound.dimensions)
+        y0, y1, yindex = rs.slice_range(tindex)
+        mslice = slice(12 * y0, None if y1 is None else 12 * y1)
+        time_bound = self.arguments[0][full_index(mslice)].data
 
-        for i in range(len(time_bound) / 12):
-            b[i][0] = time_bound[i * 12][0] - 365
-            b[i][1] = time_bound[(i * 12) + 11][1] - 365
+        first, last = rs.first_and_last_of_year(time_bound)
+        b = np.stack([first[:, 0] - 365, last[:, 1] - 365], axis=1)[yindex]
         new_name = "monthtoyear_noleap_timebnds({})".format(p_time_bound.name)
 
         return PhysArray(
@@ -507,10 +397,10 @@ class YeartoMonth_dataFunction(Function):
         super(YeartoMonth_dataFunction, self).__init__(data, time, lat, lon)
 
     def __getitem__(self, index):
-        p_data = self.arguments[0][index]
-        p_time = self.arguments[1][index]
-        p_lat = self.arguments[2][index]
-        p_lon = self.arguments[3][index]
+        p_data = self.arguments[0][None]
+        p_time = self.arguments[1][None]
+        p_lat = self.arguments[2][None]
+        p_lon = self.arguments[3][None]
 
         if index is None:
             return PhysArray(
@@ -522,25 +412,14 @@ class YeartoMonth_dataFunction(Function):
                 ],
             )
 
-        data = p_data.data
-        time = p_time.data
-        lat = p_lat.data
-        lon = p_lon.data
-
-        if time[0] == 0:
-            a = np.ma.zeros(((len(time) - 1) * 12, len(lat), len(lon)))
-        else:
-            a = np.ma.zeros((len(time) * 12, len(lat), len(lon)))
+        _, full_index, _ = rs.time_index(index, p_data.dimensions)
+        tindex = rs.time_index(index, p_time.dimensions)[0]
 
-        k = 0
-        for i in range(len(time)):
-            if time[i] != 0:
-                for j in range(12):
-                    a[((k * 12) + j), :, :] = data[i, :, :]
-                k += 1
+        def read(t):
+            idx = full_index(t)
+            return self.arguments[1][idx].data, self.arguments[0][idx]
 
-        a[a >= 1e16] = 1e20
-        a = np.ma.masked_values(a, 1e20)
+        a = rs.mask_fill(rs.monthly_from_annual(read, tindex, rs.monthly_repeat))
         new_name = "yeartomonth_data({}{}{}{})".format(
             p_data.name, p_time.name, p_lat.name, p_lon.name
         )
@@ -560,11 +439,11 @@ class YeartoMonth_data3DFunction(Function):
         super(YeartoMonth_data3DFunction, self).__init__(data, time, lat, lon, v)
 
     def __getitem__(self, index):
-        p_data = self.arguments[0][index]
-        p_time = self.arguments[1][index]
-        p_lat = self.arguments[2][index]
-        p_lon = self.arguments[3][index]
-        p_v = self.arguments[4][index]
+        p_data = self.arguments[0][None]
+        p_time = self.arguments[1][None]
+        p_lat = self.arguments[2][None]
+        p_lon = self.arguments[3][None]
+        p_v = self.arguments[4][None]
 
         if index is None:
             return PhysArray(
@@ -577,26 +456,14 @@ class YeartoMonth_data3DFunction(Function):
                 ],
             )
 
-        data = p_data.data
-        time = p_time.data
-        lat = p_lat.data
-        lon = p_lon.data
-        v = p_v.data
-
-        if time[0] == 0:
-            a = np.ma.zeros(((len(time) - 1) * 12, len(v), len(lat), len(lon)))
-        else:
-            a = np.ma.zeros((len(time) * 12, len(v), len(lat), len(lon)))
+        _, full_index, _ = rs.time_index(index, p_data.dimensions)
+        tindex = rs.time_index(index, p_time.dimensions)[0]
 
-        k = 0
-        for i in range(len(time)):
-            if time[i] != 0:
-                for j in range(12):
-                    a[((k * 12) + j), :, :, :] = data[i, :, :, :]
-                k += 1
+        def read(t):
+            idx = full_index(t)
+            return self.arguments[1][idx].data, self.arguments[0][idx]
 
-        a[a >= 1e16] = 1e20
-        a = np.ma.masked_values(a, 1e20)
+        a = rs.mask_fill(rs.monthly_from_annual(read, tindex, rs.monthly_repeat))
         new_name = "yeartomonth_data({}{}{}{}{})".format(
             p_data.name, p_time.name, p_lat.name, p_lon.name, p_v.name
         )
@@ -621,7 +488,7 @@ class YeartoMonth_timeFunction(Function):
         super(YeartoMonth_timeFunction, self).__init__(time)
 
     def __getitem__(self, index):
-        p_time = self.arguments[0][index]
+        p_time = self.arguments[0][None]
 
         if index is None:
             return PhysArray(
@@ -631,39 +498,13 @@ class YeartoMonth_timeFunction(Function):
                 calendar="noleap",
             )
 
-        time = p_time.data
-        monLens = [
-            31.0,
-            28.0,
-            31.0,
-            30.0,
-            31.0,
-            30.0,
-            31.0,
-            31.0,
-            30.0,
-            31.0,
-            30.0,
-            31.0,
-        ]
+        tindex, full_index, _ = rs.time_index(index, p_time.dimensions)
 
-        a = np.zeros((len(time) * 12))
-
-        k = 0
-        for i in range(len(time)):
-            prev = 0
-            if time[i] != 0:
-                for j in range(12):
-                    a[((k * 12) + j)] = float(
-                        (time[i] - 365) + prev + float(monLens[j] / 2.0)
-                    )
-                    prev += monLens[j]
-                k += 1
-
-        if a[-1] == 0 and not np.all(a == 0):
-            b = np.resize(a, ((len(time) - 1) * 12))
-        else:
-            b = a
+        def read(t):
+            time = self.arguments[0][full_index(t)].data
+            return time, time
+
+        b = rs.monthly_from_annual(read, tindex, rs.monthly_times)
         new_name = "yeartomonth_time({})".format(p_time.name)
 
         return PhysArray(
@@ -698,11 +539,7 @@ class POP_bottom_layerFunction(Function):
         data = p_data.data
         KMT = p_KMT.data
 
-        a = np.zeros((p_data.shape[0], p_data.shape[2], p_data.shape[3]))
-
-        for j in range(KMT.shape[0]):
-            for i in range(KMT.shape[1]):
-                a[:, j, i] = data[:, KMT[j, i] - 1, j, i]
+        a = popk.bottom_layer(KMT, data).astype("d")
 
         new_name = "POP_bottom_layer({}{})".format(p_KMT.name, p_data.name)
 
@@ -738,9 +575,7 @@ class diff_axis1_ind0bczero_4dFunction(Function):
 
             # fv = data.fill_value
             fv = 1e20
-            for t in range(p_data.shape[0]):
-                for k in range(p_data.shape[1]):
-                    a[t, k, :, :] = np.where(k < KMT, a[t, k, :, :], fv)
+            popk.fill_below_bottom(KMT, a, fv)
 
         ma_a = np.ma.masked_values(a, fv)
         new_name = "{}({}{}{})".format(
@@ -779,22 +614,11 @@ class rsdoabsorbFunction(Function):
             KMT = p_KMT.data
             QSW_3D = p_QSW_3D.data
 
-            a = np.empty((p_QSW_3D.shape))
+            a = popk.level_diff(KMT, QSW_3D, dtype="d")
 
-            nlev = p_QSW_3D.shape[1]
             # fv = QSW_3D.fill_value
             fv = 1e20
-            for t in range(p_QSW_3D.shape[0]):
-                for k in range(p_QSW_3D.shape[1]):
-                    if k < nlev - 1:
-                        a[t, k, :, :] = np.where(
-                            k < KMT - 1,
-                            QSW_3D[t, k, :, :] - QSW_3D[t, k + 1, :, :],
-                            QSW_3D[t, k, :, :],
-                        )
-                    else:
-                        a[t, k, :, :] = QSW_3D[t, k, :, :]
-                    a[t, k, :, :] = np.where(k < KMT, a[t, k, :, :], fv)
+            popk.fill_below_bottom(KMT, a, fv)
 
         ma_a = np.ma.masked_values(a, fv)
         new_name = "{}({}{}{})".format(self.key, p_KMT.name, p_z_t.name, p_QSW_3D.name)
@@ -904,12 +728,7 @@ class sftofFunction(Function):
 
         KMT = p_KMT.data
 
-        a = np.zeros((KMT.shape[0], KMT.shape[1]))
-
-        for j in range(KMT.shape[0]):
-            for i in range(KMT.shape[1]):
-                if KMT[j, i] > 0:
-                    a[j, i] = 1
+        a = (KMT > 0).astype("d")
 
         new_name = "sftof({})".format(p_KMT.name)
 
@@ -936,16 +755,9 @@ class POP_bottom_layer_multaddFunction(Function):
         data2 = p_data2.data
         KMT = p_KMT.data
 
-        a1 = np.zeros((p_data2.shape[0], p_data2.shape[2], p_data2.shape[3]))
+        a1 = popk.bottom_layer_mult(KMT, data1, data2, maxval=1e16)
         a2 = np.zeros((p_data2.shape[0]))
 
-        for t in range(p_data2.shape[0]):
-            for j in range(KMT.shape[0]):
-                for i in range(KMT.shape[1]):
-                    k = KMT[j, i] - 1
-                    if data2[t, k, j, i] < 1e16:
-                        a1[t, j, i] = data1[k] * data2[t, k, j, i]
-                        # print a1[t,j,i],data1[k],data2[t,k,j,i]
         for t in range(p_data2.shape[0]):
             a2[t] = np.ma.sum(a1[t, :, :])
             # print a2[t]
@@ -974,20 +786,11 @@ class POP_layer_sum_multFunction(Function):
         data2 = p_data2.data
         KMT = p_KMT.data
 
-        a1 = np.zeros((p_data2.shape[0], p_data2.shape[2], p_data2.shape[3]))
+        a1 = popk.layer_sum_mult(KMT, data1, data2)
 
         # fv = data2.fill_value
         fv = 1e20
-
-        for t in range(p_data2.shape[0]):
-            for j in range(KMT.shape[0]):
-                for i in range(KMT.shape[1]):
-                    if KMT[j, i] > 0:
-                        a1[t, j, i] = 0.0
-                        for k in range(min(KMT[j, i], p_data2.shape[1])):
-                            a1[t, j, i] += data1[k] * data2[t, k, j, i]
-                    else:
-                        a1[t, j, i] = fv
+        a1[:, KMT <= 0] = fv
 
         ma_a1 = np.ma.masked_values(a1, fv)
         new_name = "POP_layer_sum_mult({}{}{})".format(
@@ -1067,6 +870,16 @@ class hemisphereFunction(Function):
                 return p_data[:, :, 0 : (data.shape[2] / 2)]
 
 
+# Comparison operators of cice_where conditions, in the order they are searched for
+_COMPARISONS_ = [
+    (">=", operator.ge),
+    ("<=", operator.le),
+    ("==", operator.eq),
+    ("<", operator.lt),
+    (">", operator.gt),
+]
+
+
 class cice_whereFunction(Function):
     key = "cice_where"
 
@@ -1087,17 +900,10 @@ class cice_whereFunction(Function):
             )
 
         a = np.ma.zeros(a1.shape)
-        for t in range(a1.data.shape[0]):
-            if ">=" in condition:
-                a[t, :, :] = np.ma.where(a1[t, :, :] >= a2, var, value)
-            elif "<=" in condition:
-                a[t, :, :] = np.ma.where(a1[t, :, :] <= a2, var, value)
-            elif "==" in condition:
-                a[t, :, :] = np.ma.where(a1[t, :, :] == a2, var, value)
-            elif "<" in condition:
-                a[t, :, :] = np.ma.where(a1[t, :, :] < a2, var, value)
-            elif ">" in condition:
-                a[t, :, :] = np.ma.where(a1[t, :, :] > a2, var, value)
+        for op, compare in _COMPARISONS_:
+            if op in condition:
+                a[...] = np.ma.where(compare(a1, a2), var, value)
+                break
 
         new_name = "cice_where()".format()
         return PhysArray(
@@ -1125,149 +931,13 @@ class cice_regionsFunction(Function):
         p_siline = self.arguments[5][index]
         multiple = self.arguments[6]
 
-        aice = p_aice.data
-        uvel = p_uvel.data
-        vvel = p_vvel.data
-        HTE = p_HTE.data
-        HTN = p_HTN.data
-        siline = p_siline.data
-        a = np.ma.zeros((aice.shape[0], siline.shape[0]))
-
-        uvel[uvel >= 1e16] = 0.0
-        vvel[vvel >= 1e16] = 0.0
-
-        for t in range(aice.shape[0]):
-            # 1
-            i = 92
-            for j in range(370, 381):
-                if aice[t, j, i] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j,
-                        i,
-                    )
-                elif aice[t, j, i + 1] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j,
-                        i + 1,
-                    )
-                else:
-                    a[t, 0] += (
-                        0.5
-                        * (aice[t, j, i] + aice[t, j, i + 1])
-                        * 0.5
-                        * (HTE[j, i] * uvel[t, j, i] + HTE[j, i] * uvel[t, j - 1, i])
-                    )
-            # 2
-            i = 214
-            for j in range(375, 377):
-                if aice[t, j, i] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j,
-                        i,
-                    )
-                elif aice[t, j, i + 1] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j,
-                        i + 1,
-                    )
-                elif aice[t, j + 1, i] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j + 1,
-                        i,
-                    )
-                else:
-                    a[t, 1] += 0.5 * (aice[t, j, i] + aice[t, j, i + 1]) * 0.5 * (
-                        HTE[j, i] * uvel[t, j, i] + HTE[j, i] * uvel[t, j - 1, i]
-                    ) + 0.5 * (aice[t, j, i] + aice[t, j + 1, i]) * 0.5 * (
-                        HTN[j, i] * vvel[t, j, i] + HTN[j, i] * vvel[t, j, i - 1]
-                    )
-            j = 366
-            for i in range(240, 244):
-                if aice[t, j, i] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j,
-                        i,
-                    )
-                elif aice[t, j, i + 1] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j,
-                        i + 1,
-                    )
-                elif aice[t, j + 1, i] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j + 1,
-                        i,
-                    )
-                else:
-                    a[t, 1] += 0.5 * (aice[t, j, i] + aice[t, j, i + 1]) * 0.5 * (
-                        HTE[j, i] * uvel[t, j, i] + HTE[j, i] * uvel[t, j - 1, i]
-                    ) + 0.5 * (aice[t, j, i] + aice[t, j + 1, i]) * 0.5 * (
-                        HTN[j, i] * vvel[t, j, i] + HTN[j, i] * vvel[t, j, i - 1]
-                    )
-            # 3
-            i = 85
-            for j in range(344, 366):
-                if aice[t, j, i] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j,
-                        i,
-                    )
-                elif aice[t, j, i + 1] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j,
-                        i + 1,
-                    )
-                else:
-                    a[t, 2] += (
-                        0.5
-                        * (aice[t, j, i] + aice[t, j, i + 1])
-                        * 0.5
-                        * (HTE[j, i] * uvel[t, j, i] + HTE[j, i] * uvel[t, j - 1, i])
-                    )
-            # 4
-            j = 333
-            for i in range(198, 201):
-                if aice[t, j, i] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j,
-                        i,
-                    )
-                elif aice[t, j + 1, i] >= 1e16:
-                    print(
-                        "CICE aice WARNING: this point should not contain a missing value ",
-                        t,
-                        j + 1,
-                        i,
-                    )
-                else:
-                    a[t, 3] += (
-                        0.5
-                        * (aice[t, j, i] + aice[t, j + 1, i])
-                        * 0.5
-                        * (HTN[j, i] * vvel[t, j, i] + HTN[j, i] * vvel[t, j, i - 1])
-                    )
+        a = np.ma.zeros((p_aice.shape[0], p_siline.shape[0]))
+        if a.size > 0:
+            transports = ct.transports(
+                p_aice.data, p_uvel.data, p_vvel.data, p_HTE.data, p_HTN.data
+            )
+            n = min(a.shape[1], transports.shape[1])
+            a[:, :n] = transports[:, :n]
 
         a = a * multiple
 
@@ -1299,24 +969,7 @@ class burntFractionFunction(Function):
                 ],
             )
 
-        data = p_data.data
-
-        ml = [31.0, 28.0, 31.0, 30.0, 31.0, 30.0, 31.0, 31.0, 30.0, 31.0, 30.0, 31.0]
-
-        a = np.ma.zeros((data.shape[0], data.shape[1], data.shape[2]))
-
-        i = 0
-        for t in range(0, data.shape[0]):
-            for x in range(0, data.shape[1]):
-                for y in range(0, data.shape[2]):
-                    if data[t, x, y] < 1e16:
-                        a[t, x, y] = data[t, x, y] * ml[i] * 86400 * 100
-                    else:
-                        a[t, x, y] = 1e20
-            i += 1
-            if i == 12:
-                i = 1
-        a[a >= 1e16] = 1e20
+        a = lu.burnt_fraction(p_data.data)
         new_name = "burntFraction({})".format(p_data.name)
 
         return PhysArray(a, name=new_name, units=p_data.units)
@@ -1332,20 +985,7 @@ class reduce_luFunction(Function):
         p_data = self.arguments[0][index]
         p_lu = self.arguments[1][index]
 
-        data = p_data.data
-
-        data2 = np.ma.zeros((data.shape[0], 4, data.shape[2], data.shape[3]))
-
-        for t in range(data.shape[0]):
-            for x in range(data.shape[2]):
-                for y in range(data.shape[3]):
-                    data2[t, 0, x, y] = data[t, 0, x, y]
-                    data2[t, 1, x, y] = 0
-                    data2[t, 2, x, y] = data[t, 1, x, y]
-                    data2[t, 3, x, y] = (
-                        data[t, 6, x, y] + data[t, 7, x, y] + data[t, 8, x, y]
-                    )
-        data2[data2 >= 1e16] = 1e20
+        data2 = lu.reduce_landuse(p_data.data)
 
         new_name = "reduce_lu({}{})".format(p_data.name, p_lu.name)
         return PhysArray(
@@ -1375,18 +1015,7 @@ class get_soilpoolsFunction(Function):
         p_data3 = self.arguments[2][index]
         p_soilpool = self.arguments[3][index]
 
-        data1 = p_data1.data
-        data2 = p_data2.data
-        data3 = p_data3.data
-
-        data = np.ma.zeros((data1.shape[0], 3, data1.shape[1], data1.shape[2]))
-
-        data[:, 0, :, :] = data1
-        data[:, 1, :, :] = data2
-        data[:, 2, :, :] = data3
-
-        data[data >= 1e16] = 1e20
-        data = np.ma.masked_values(data, 1e20)
+        data = lu.soil_pools(p_data1.data, p_data2.data, p_data3.data)
 
         new_name = "soilpools({}{}{}{})".format(
             p_data1.name, p_data2.name, p_data3.name, p_soilpool.name
@@ -1428,28 +1057,7 @@ class get_nonwoodyvegFunction(Function):
         if index is None:
             return data
 
-        data[:, 0, :, :] = (
-            pct_nat_pft[:, 12, :, :]
-            + pct_nat_pft[:, 13, :, :]
-            + pct_nat_pft[:, 14, :, :]
-        )
-        for t in range(p_pct_nat_pft.shape[0]):
-            for i in range(p_pct_nat_pft.shape[2]):
-                for j in range(p_pct_nat_pft.shape[3]):
-                    if landfrac[i, j] <= 1.0:
-                        data[t, 1, i, j] = 0.0
-                        if pct_crop[t, 1, i, j] > 0.0:
-                            data[t, 2, i, j] = 100.0
-                        else:
-                            data[t, 2, i, j] = 0.0
-                        data[t, 3, i, j] = 0.0
-                    else:
-                        data[t, 1, i, j] = 1e20
-                        data[t, 2, i, j] = 1e20
-                        data[t, 3, i, j] = 1e20
-
-        data[data >= 1e16] = 1e20
-        data = np.ma.masked_values(data, 1e20)
+        data = lu.nonwoody_vegetation(pct_nat_pft, pct_crop, landfrac)
 
         new_name = "get_nonwoodyveg({})".format(p_pct_nat_pft.name)
         return PhysArray(
@@ -1480,14 +1088,7 @@ class expand_latlonFunction(Function):
         lat = p_lat.data
         lon = p_lon.data
 
-        data = np.ma.zeros((data1.shape[0], lat.shape[0], lon.shape[0]))
-
-        for x in range(lat.shape[0]):
-            for y in range(lon.shape[0]):
-                data[:, x, y] = data1
-
-        data[data >= 1e16] = 1e20
-        data = np.ma.masked_values(data, 1e20)
+        data = gf.expand_latlon(data1, lat.shape[0], lon.shape[0])
 
         new_name = "expand_latlon({}{}{})".format(p_data1.name, p_lat.name, p_lon.name)
         return PhysArray(
@@ -1517,19 +1118,7 @@ class ocean_basinFunction(Function):
         comp = int(p_comp)
         basin = p_basin.data
 
-        data = np.ma.zeros(
-            (data1.shape[0], data1.shape[4], data1.shape[3], basin.shape[0])
-        )
-
-        for t in range(data1.shape[0]):
-            for x in range(data1.shape[4]):
-                for y in range(data1.shape[3]):
-                    data[t, x, y, 0] = data1[t, 1, comp, y, x]
-                    data[t, x, y, 1] = data1[t, 0, comp, y, x] - data1[t, 1, comp, y, x]
-                    data[t, x, y, 2] = data1[t, 0, comp, y, x]
-
-        data[data >= 1e16] = 1e20
-        data = np.ma.masked_values(data, 1e20)
+        data = gf.ocean_basin(data1, comp, basin.shape[0])
 
         new_name = "ocean_basin({}{})".format(p_data1.name, p_basin.name)
         return PhysArray(
@@ -1603,15 +1192,14 @@ class emilnoxFunction(Function):
 
         p0 = p_PO.data
         psurf = p_PS.data
-        hyai = np.flip(p_hyai.data)
-        hybi = np.flip(p_hybi.data)
+        hyai = p_hyai.data
+        hybi = p_hybi.data
         hyam = p_hyam.data
         hybm = p_hybm.data
         temp = p_T.data
         lno_prod = p_LNO_PROD.data
         lon = p_lon.data
         lat = p_lat.data
-        timex = p_time.data
 
         Rearth = 6.37e6  # m
         # AEarth = 4.0 * math.pi * (Rearth) ** 2  # m^2
@@ -1626,46 +1214,19 @@ class emilnoxFunction(Function):
         cm3_per_m3 = 1.0e6
         # mw_no = 30.                             # g/mole
 
-        nlon = len(lon)
-        nlat = len(lat)
-        nlev = len(hyam)
-        nmon = len(timex)
-
-        emilnox = np.zeros((nmon, nlev, nlat, nlon))
-
         dlon = lon[1] - lon[0]
         dlat = lat[1] - lat[0]
 
         dx = Rearth * np.cos(lat / deg_rad) * dlon / deg_rad  # m
         dy = Rearth * dlat / deg_rad  # m
+        area = (dx * dy)[:, np.newaxis]  # m2
 
-        pres = np.zeros((nmon, nlev, nlat, nlon))
-        presi = np.zeros((nmon, nlev + 1, nlat, nlon))
-        rho = np.zeros((nmon, nlev, nlat, nlon))
-        delp = np.zeros((nmon, nlev, nlat, nlon))
-        area = np.zeros((nmon, nlev, nlat, nlon))
-
-        # print "Start of main assignment loop:", time.ctime()
-        for imon in range(nmon):
-            for ilon in range(nlon):
-                for ilat in range(nlat):
-                    presi[imon, :, ilat, ilon] = (
-                        hyai[:] * p0 + hybi[:] * psurf[imon, ilat, ilon]
-                    )  # Pa
-                    pres[imon, :, ilat, ilon] = (
-                        hyam[:] * p0 + hybm[:] * psurf[imon, ilat, ilon]
-                    )
-                    area[imon, :, ilat, ilon] = dx[ilat] * dy  # m2
-        # print "End of main assignment loop:", time.ctime()
-
-        # print "Start of rho assignment:", time.ctime()
+        pres = hpres.pressure(p0, psurf, hyam, hybm)  # Pa
         rho = pres / (287.04 * temp)
-        # print "End of rho assignment:", time.ctime()
 
-        # print "Start of delp assignment loop:", time.ctime()
-        for i in range(nlev)[::-1]:
-            delp[:, i, :, :] = presi[:, i, :, :] - presi[:, i + 1, :, :]
-        # print "End of delp assignment loop:", time.ctime()
+        # Interface pressures from the bottom up, so delp is positive
+        presi = hpres.pressure(p0, psurf, hyai, hybi)[:, ::-1]  # Pa
+        delp = presi[:, :-1] - presi[:, 1:]
 
         # print "Start of emilnox assignment:", time.ctime()
         # [molecules/cm3/s] * [moles/molecules]*[Pa]*[s2/m]*[(m2/K/s2)*K/Pa] *[m2] *[cm3/m3]
@@ -1731,22 +1292,16 @@ class delpFunction(Function):
                 dimensions=[p_PS.dimensions[0], p_PS.dimensions[1], p_PS.dimensions[2]],
             )
 
-        PO = p_PO
-        PS = p_PS
-        hyai = p_hyai
-        hybi = p_hybi
-
-        p = (hyai * PO) + (hybi * PS)
-        j = len(hybi)
+        PS = p_PS.convert(p_PO.units) if p_PS.units != p_PO.units else p_PS
+        dp = hpres.thickness(p_PO.data, PS.data, p_hyai.data, p_hybi.data)
 
         delp = PhysArray(
-            np.zeros(hyai.shape + PS.shape),
+            np.zeros(p_hyai.shape + p_PS.shape),
             name="delp",
             units="Pa",
-            dimensions=hyai.dimensions + PS.dimensions,
+            dimensions=p_hyai.dimensions + p_PS.dimensions,
         )
-        for i in range(0, j - 1):
-            delp.data[i, :, :, :] = p.data[i + 1, :, :, :] - p.data[i, :, :, :]
+        delp.data[:-1] = np.moveaxis(dp, -3, 0)
 
         new_name = "delp({}{}{}{})".format(
             p_PO.name, p_PS.name, p_hyai.name, p_hybi.name
@@ -1779,14 +1334,8 @@ class rhoFunction(Function):
                 ],
             )
 
-        PO = p_PO
-        PS = p_PS
-        hyam = p_hyam
-        hybm = p_hybm
-        t = p_T
-
-        p = (hyam * PO) + (hybm * PS)
-        rho = p / (287.04 * t)
+        p = hpres.hybrid_pressure(p_PO, p_PS, p_hyam, p_hybm)
+        rho = p / (287.04 * p_T)
 
         new_name = "rho({}{}{}{}{})".format(
             p_PO.name, p_PS.name, p_hyam.name, p_hybm.name, p_T.name
@@ -1820,15 +1369,8 @@ class pm25Function(Function):
                 ],
             )
 
-        PO = p_PO
-        PS = p_PS
-        hyam = p_hyam
-        hybm = p_hybm
-        t = p_T
-        PM25_o = p_PM25_o
-
-        p = (hyam * PO) + (hybm * PS)
-        pm25 = PM25_o * 287.0 * t / p
+        p = hpres.hybrid_pressure(p_PO, p_PS, p_hyam, p_hybm)
+        pm25 = p_PM25_o * 287.0 * p_T / p
 
         new_name = "pm25({}{}{}{}{}{})".format(
             p_PO.name, p_PS.name, p_hyam.name, p_hybm.name, p_T.name, p_PM25_o.name
@@ -1,12 +1,19 @@
 """
 Basic functions for the DynVarMIP Diagnostics
 
+The diagnostics are computed for all times at once.  The eddy streamfunction (vthzm / dthdp),
+which is needed by most of the diagnostics, is cached by the contents of its inputs so that it is
+computed only once for all of the diagnostics computed from the same data.
+
 NOTE:  All of these functions return numpy arrays!
 
 Copyright 2017-2020, University Corporation for Atmospheric Research
 LICENSE: See the LICENSE.rst file for details
 """
 
+from collections import OrderedDict
+from hashlib import sha1
+
 import numpy
 
 from pyconform.modules.idl import deriv, int_tabulated
@@ -19,25 +26,54 @@ H = 7000.0
 g0 = 9.80665
 
 
-def _init_wtem(time, levi, lat, wzm, vthzm, thzm):
-    ntime = len(time)
+# Maximum number of cached intermediate fields
+_CACHE_SIZE_ = 4
+
+# Intermediate fields shared by the diagnostics, keyed by kind and the digest of their inputs
+_cache = OrderedDict()
+
+
+def _digest_(*args):
+    h = sha1()
+    for arg in args:
+        arr = numpy.ma.asarray(arg)
+        h.update(repr((arr.dtype.str, arr.shape)).encode())
+        h.update(numpy.ascontiguousarray(arr.data).tobytes())
+        h.update(numpy.ma.getmaskarray(arr).tobytes())
+    return h.hexdigest()
+
+
+def clear_cache():
+    """Discard all cached intermediate fields"""
+    _cache.clear()
 
+
+def _psieddy(levi100, vthzm, thzm):
+    key = ("psieddy", _digest_(levi100, vthzm, thzm))
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    dthdp = deriv(levi100, thzm, axis=1)
+    psieddy = vthzm / dthdp
+    _cache[key] = psieddy
+    if len(_cache) > _CACHE_SIZE_:
+        _cache.popitem(last=False)
+    return psieddy
+
+
+def _init_wtem(time, levi, lat, wzm, vthzm, thzm):
     latrad = (lat / 180.0) * numpy.pi
     coslat = numpy.cos(latrad)
     levi100 = 100.0 * levi
 
     _wzm = -1.0 * numpy.einsum("ij...,j->ij...", wzm, levi100) / H
 
-    wtem = numpy.zeros(wzm.shape, dtype="d")
-    for itime in range(ntime):
-        dthdp = deriv(levi100, thzm[itime, ...])
-        psieddy = vthzm[itime, ...] / dthdp
-        tmp = numpy.einsum("ij...,j->ij...", psieddy, coslat)
-        dpsidy = numpy.einsum(
-            "ij...,j->ij...", deriv(latrad, tmp, axis=1), 1.0 / (a * coslat)
-        )
-        wtem[itime, ...] = _wzm[itime, ...] + dpsidy
-    return wtem
+    psieddy = _psieddy(levi100, vthzm, thzm)
+    tmp = numpy.einsum("tij...,j->tij...", psieddy, coslat)
+    dpsidy = numpy.einsum(
+        "tij...,j->tij...", deriv(latrad, tmp, axis=2), 1.0 / (a * coslat)
+    )
+    return numpy.array(_wzm + dpsidy, dtype="d")
 
 
 def wtem(time, levi, lat, wzm, vthzm, thzm):
@@ -48,65 +84,42 @@ def wtem(time, levi, lat, wzm, vthzm, thzm):
 
 
 def vtem(time, levi, lat, vzm, vthzm, thzm):
-    ntime = len(time)
-
     levi100 = 100.0 * levi
 
-    vtem = numpy.zeros(vzm.shape, dtype="d")
-    for itime in range(ntime):
-        dthdp = deriv(levi100, thzm[itime, ...])
-        psieddy = vthzm[itime, ...] / dthdp
-        dpsidp = deriv(levi100, psieddy)
-        vtem[itime, ...] = vzm[itime, ...] - dpsidp
-    return vtem
+    psieddy = _psieddy(levi100, vthzm, thzm)
+    dpsidp = deriv(levi100, psieddy, axis=1)
+    return numpy.array(vzm - dpsidp, dtype="d")
 
 
 def utendvtem(time, levi, lat, uzm, vzm, vthzm, thzm):
-    ntime = len(time)
-
     latrad = (lat / 180.0) * numpy.pi
     coslat = numpy.cos(latrad)
-    fshape = (1, len(lat)) + tuple([1] * (uzm.ndim - 3))
+    fshape = (1, 1, len(lat)) + tuple([1] * (uzm.ndim - 3))
     f = 2 * om * numpy.sin(latrad).reshape(fshape)
     _vtem = vtem(time, levi, lat, vzm, vthzm, thzm)
 
-    utendvtem = numpy.zeros(uzm.shape, dtype="d")
-    for itime in range(ntime):
-        ucos = numpy.einsum("ij...,j->ij...", uzm[itime, ...], coslat)
-        dudphi = deriv(latrad, ucos, axis=1) / a
-        utendvtem[itime, ...] = _vtem[itime, ...] * (f - dudphi)
-    return utendvtem
+    ucos = numpy.einsum("tij...,j->tij...", uzm, coslat)
+    dudphi = deriv(latrad, ucos, axis=2) / a
+    return numpy.array(_vtem * (f - dudphi), dtype="d")
 
 
 def utendwtem(time, levi, lat, uzm, wzm, vthzm, thzm):
-    ntime = len(time)
-
     levi100 = 100.0 * levi
     wtem = _init_wtem(time, levi, lat, wzm, vthzm, thzm)
 
-    utendwtem = numpy.zeros(uzm.shape, dtype="d")
-    for itime in range(ntime):
-        dudp = deriv(levi100, uzm[itime, ...])
-        utendwtem[itime, ...] = -1.0 * wtem[itime, ...] * dudp
-    return utendwtem
+    dudp = deriv(levi100, uzm, axis=1)
+    return numpy.array(-1.0 * wtem * dudp, dtype="d")
 
 
 def _init_epfy(time, levi, lat, uzm, uvzm, vthzm, thzm):
-    ntime = len(time)
-
     latrad = (lat / 180.0) * numpy.pi
     coslat = numpy.cos(latrad)
     levi100 = 100.0 * levi
 
-    epfy = numpy.zeros(uzm.shape, dtype="d")
-    for itime in range(ntime):
-        dthdp = deriv(levi100, thzm[itime, ...])
-        dudp = deriv(levi100, uzm[itime, ...])
-        psieddy = vthzm[itime, ...] / dthdp
-        epfy[itime, ...] = a * numpy.einsum(
-            "j,ij...->ij...", coslat, (dudp * psieddy - uvzm[itime, ...])
-        )
-    return epfy
+    dudp = deriv(levi100, uzm, axis=1)
+    psieddy = _psieddy(levi100, vthzm, thzm)
+    epfy = a * numpy.einsum("j,tij...->tij...", coslat, (dudp * psieddy - uvzm))
+    return numpy.array(epfy, dtype="d")
 
 
 def epfy(time, levi, lat, uzm, uvzm, vthzm, thzm):
@@ -117,26 +130,19 @@ def epfy(time, levi, lat, uzm, uvzm, vthzm, thzm):
 
 
 def _init_epfz(time, levi, lat, uzm, uwzm, vthzm, thzm):
-    ntime = len(time)
-
     latrad = (lat / 180.0) * numpy.pi
     coslat = numpy.cos(latrad)
-    fshape = (1, len(lat)) + tuple([1] * (uzm.ndim - 3))
+    fshape = (1, 1, len(lat)) + tuple([1] * (uzm.ndim - 3))
     f = 2 * om * numpy.sin(latrad).reshape(fshape)
     levi100 = 100.0 * levi
 
     _uwzm = -1.0 * numpy.einsum("ij...,j->ij...", uwzm, levi100) / H
 
-    epfz = numpy.zeros(uzm.shape, dtype="d")
-    for itime in range(ntime):
-        ucos = numpy.einsum("ij...,j->ij...", uzm[itime, ...], coslat)
-        dudphi = deriv(latrad, ucos, axis=1) / a
-        dthdp = deriv(levi100, thzm[itime, ...])
-        psieddy = vthzm[itime, ...] / dthdp
-        epfz[itime, ...] = a * numpy.einsum(
-            "j,ij...->ij...", coslat, (f - dudphi) * psieddy - _uwzm[itime, ...]
-        )
-    return epfz
+    ucos = numpy.einsum("tij...,j->tij...", uzm, coslat)
+    dudphi = deriv(latrad, ucos, axis=2) / a
+    psieddy = _psieddy(levi100, vthzm, thzm)
+    epfz = a * numpy.einsum("j,tij...->tij...", coslat, (f - dudphi) * psieddy - _uwzm)
+    return numpy.array(epfz, dtype="d")
 
 
 def epfz(time, levi, lat, uzm, uwzm, vthzm, thzm):
@@ -146,8 +152,6 @@ def epfz(time, levi, lat, uzm, uwzm, vthzm, thzm):
 
 
 def utendepfd(time, levi, lat, uzm, uvzm, uwzm, vthzm, thzm):
-    ntime = len(time)
-
     latrad = (lat / 180.0) * numpy.pi
     coslat = numpy.cos(latrad)
     levi100 = 100.0 * levi
@@ -156,41 +160,35 @@ def utendepfd(time, levi, lat, uzm, uvzm, uwzm, vthzm, thzm):
     epfy = _init_epfy(time, levi, lat, uzm, uvzm, vthzm, thzm)
     epfz = _init_epfz(time, levi, lat, uzm, uwzm, vthzm, thzm)
 
-    utendepfd = numpy.zeros(uzm.shape, dtype="d")
-    for itime in range(ntime):
-        tmp = numpy.einsum("ij...,j->ij...", epfy[itime, ...], coslat)
-        depfydphi = numpy.einsum("ij...,j->ij...", deriv(latrad, tmp, axis=1), iacoslat)
-        depfzdp = deriv(levi100, epfz[itime, ...])
-        utendepfd[itime, ...] = numpy.einsum(
-            "ij...,j->ij...", depfydphi + depfzdp, iacoslat
-        )
-    return utendepfd
+    tmp = numpy.einsum("tij...,j->tij...", epfy, coslat)
+    depfydphi = numpy.einsum("tij...,j->tij...", deriv(latrad, tmp, axis=2), iacoslat)
+    depfzdp = deriv(levi100, epfz, axis=1)
+    return numpy.einsum("tij...,j->tij...", depfydphi + depfzdp, iacoslat)
 
 
 def psitem(time, levi, lat, vzm, vthzm, thzm):
-    ntime = len(time)
     nlevi = len(levi)
 
     latrad = (lat / 180.0) * numpy.pi
     coslat = numpy.cos(latrad)
     levi100 = levi * 100.0
 
-    psitem = numpy.zeros(vzm.shape, dtype="d")
-    vzm_shape_1 = list(vzm.shape[1:])
-    vzm_shape_1[0] += 1
+    psieddy = _psieddy(levi100, vthzm, thzm)
+    vzm_shape_1 = list(vzm.shape)
+    vzm_shape_1[1] += 1
     vzmwithzero = numpy.zeros(vzm_shape_1, dtype="d")
+    vzmwithzero[:, 1:, ...] = vzm
     levi100withzero = numpy.zeros((nlevi + 1,), dtype="d")
     levi100withzero[1:] = levi100
-    for itime in range(ntime):
-        dthdp = deriv(levi100, thzm[itime, ...])
-        psieddy = vthzm[itime, ...] / dthdp
-        vzmwithzero[1:, ...] = vzm[itime, ...]
-        for ilev in range(1, nlevi + 1):
-            result = int_tabulated(
-                levi100withzero[0 : ilev + 1], vzmwithzero[0 : ilev + 1, ...]
-            )
-            tmp1 = (2 * numpy.pi * a * coslat) / g0
-            tmp2 = result - psieddy[ilev - 1, ...]
-            psitem[itime, ilev - 1, ...] = numpy.einsum("i,i...->i...", tmp1, tmp2)
+
+    # The integral from the top to each level is computed for all times at once
+    psitem = numpy.zeros(vzm.shape, dtype="d")
+    tmp1 = (2 * numpy.pi * a * coslat) / g0
+    for ilev in range(1, nlevi + 1):
+        result = int_tabulated(
+            levi100withzero[0 : ilev + 1], vzmwithzero[:, 0 : ilev + 1, ...], axis=1
+        )
+        tmp2 = result - psieddy[:, ilev - 1, ...]
+        psitem[:, ilev - 1, ...] = numpy.einsum("i,ti...->ti...", tmp1, tmp2)
 
     return psitem
@@ -0,0 +1,58 @@
+"""
+Fields expanded or rearranged onto output grids
+
+Each field is built for all times and grid points at once.  Values not less than 1e16 are
+treated as missing and set to the fill value 1e20.
+
+NOTE:  All of these functions return numpy masked arrays!
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import numpy
+
+from pyconform.modules.resample import mask_fill
+
+
+def expand_latlon(data, nlat, nlon):
+    """
+    Data of each time repeated over every point of a latitude-longitude grid
+
+    Parameters:
+        data (array): Data with time as the only axis
+        nlat (int): The number of latitudes of the grid
+        nlon (int): The number of longitudes of the grid
+
+    Returns:
+        Masked array with dimensions (time, lat, lon), masked where missing
+    """
+    data = numpy.ma.getdata(data)
+    expanded = numpy.ma.zeros((data.shape[0], nlat, nlon))
+    expanded[...] = data[:, numpy.newaxis, numpy.newaxis]
+    return mask_fill(expanded)
+
+
+def ocean_basin(data, comp, nbasins):
+    """
+    Meridional transport in each ocean basin, from the POP transport regions
+
+    The basins are the Atlantic (region 1), the Indo-Pacific (region 0 minus region 1) and
+    the global ocean (region 0).  Any other basins are zero.
+
+    Parameters:
+        data (array): Transport with dimensions (time, region, component, lat, depth)
+        comp (int): The index of the transport component
+        nbasins (int): The number of basins (at least 3)
+
+    Returns:
+        Masked array with dimensions (time, depth, lat, basin), masked where missing
+    """
+    data = numpy.ma.getdata(data)
+    basins = numpy.ma.zeros((data.shape[0], data.shape[4], data.shape[3], nbasins))
+    if basins.size > 0:
+        regions = numpy.swapaxes(data[:, :, comp], -1, -2)
+        basins[..., 0] = regions[:, 1]
+        basins[..., 1] = regions[:, 0] - regions[:, 1]
+        basins[..., 2] = regions[:, 0]
+    return mask_fill(basins)
@@ -0,0 +1,127 @@
+"""
+Pressure fields on hybrid-sigma vertical coordinates
+
+The pressure on hybrid-sigma levels is p = a * p0 + b * ps, computed from the reference
+pressure p0, the surface pressure ps and the hybrid coefficients a and b of the levels.  Many
+atmosphere functions need the pressures (or the layer thicknesses) at the mid-levels or the
+interfaces of the same chunk of the same file, so the fields are computed once, broadcast over
+all columns, and cached by the contents of the arrays they are computed from.
+
+The level dimension of the fields is inserted before the last two (horizontal) dimensions of the
+surface pressure, so that a surface pressure with dimensions (time, lat, lon) gives pressure
+fields with dimensions (time, lev, lat, lon).
+
+NOTE:  All of these functions return read-only numpy arrays (hybrid_pressure returns a
+PhysArray of the read-only cached array), so results must be copied before being modified!
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+from collections import OrderedDict
+from hashlib import sha1
+
+import numpy
+
+from pyconform.physarray import PhysArray
+
+# Maximum total size (in bytes) of the cached pressure fields
+_CACHE_BYTES_ = 512 * 1024 * 1024
+
+# Cached pressure fields, keyed by kind and the digest of the arrays they are computed from
+_cache = OrderedDict()
+
+
+def _digest_(*args):
+    h = sha1()
+    for arg in args:
+        arr = numpy.asarray(arg)
+        h.update(repr((arr.dtype.str, arr.shape)).encode())
+        h.update(numpy.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+def _cached_(kind, build, *args):
+    key = (kind, _digest_(*args))
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    value = build(*args)
+    value.setflags(write=False)
+    if value.nbytes <= _CACHE_BYTES_:
+        _cache[key] = value
+        while sum(v.nbytes for v in _cache.values()) > _CACHE_BYTES_:
+            _cache.popitem(last=False)
+    return value
+
+
+def clear_cache():
+    """Discard all cached pressure fields"""
+    _cache.clear()
+
+
+def _pressure_(p0, ps, a, b):
+    ps = numpy.asarray(ps)
+    a = numpy.asarray(a).reshape(-1, 1, 1)
+    b = numpy.asarray(b).reshape(-1, 1, 1)
+    return a * p0 + b * ps[..., numpy.newaxis, :, :]
+
+
+def pressure(p0, ps, a, b):
+    """
+    Pressure on hybrid-sigma levels
+
+    Parameters:
+        p0: The reference pressure (scalar)
+        ps (array): The surface pressure, with horizontal dimensions last
+        a (array): The hybrid 'a' (pressure) coefficient of each level
+        b (array): The hybrid 'b' (sigma) coefficient of each level
+
+    Returns:
+        Array with shape ps.shape[:-2] + (nlev,) + ps.shape[-2:]
+    """
+    return _cached_("pressure", _pressure_, p0, ps, a, b)
+
+
+def _thickness_(p0, ps, ai, bi):
+    p = pressure(p0, ps, ai, bi)
+    return p[..., 1:, :, :] - p[..., :-1, :, :]
+
+
+def thickness(p0, ps, ai, bi):
+    """
+    Pressure thickness of the layers between hybrid-sigma interfaces
+
+    The thickness of layer k is the pressure at interface k+1 minus the pressure at interface k.
+
+    Parameters:
+        p0: The reference pressure (scalar)
+        ps (array): The surface pressure, with horizontal dimensions last
+        ai (array): The hybrid 'a' (pressure) coefficient of each interface
+        bi (array): The hybrid 'b' (sigma) coefficient of each interface
+
+    Returns:
+        Array with shape ps.shape[:-2] + (nilev - 1,) + ps.shape[-2:]
+    """
+    return _cached_("thickness", _thickness_, p0, ps, ai, bi)
+
+
+def hybrid_pressure(p_p0, p_ps, p_a, p_b):
+    """
+    Pressure on hybrid-sigma levels, as a PhysArray in the units of the reference pressure
+
+    Parameters:
+        p_p0 (PhysArray): The reference pressure (scalar)
+        p_ps (PhysArray): The surface pressure, with horizontal dimensions last
+        p_a (PhysArray): The hybrid 'a' (pressure) coefficient of each level
+        p_b (PhysArray): The hybrid 'b' (sigma) coefficient of each level
+
+    Returns:
+        PhysArray: The (read-only) pressure, with the level dimension before the horizontal
+            dimensions
+    """
+    ps = p_ps.convert(p_p0.units) if p_ps.units != p_p0.units else p_ps
+    p = pressure(p_p0.data, ps.data, p_a.data, p_b.data)
+    dims = p_ps.dimensions[:-2] + p_a.dimensions + p_ps.dimensions[-2:]
+    name = "({}*{}+{}*{})".format(p_a.name, p_p0.name, p_b.name, p_ps.name)
+    return PhysArray(p, name=name, units=p_p0.units, dimensions=dims)
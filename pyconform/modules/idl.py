@@ -16,10 +16,18 @@ Copyright 2017-2020, University Corporation for Atmospheric Research
 LICENSE: See the LICENSE.rst file for details
 """
 
+from collections import OrderedDict
+
 import numpy
 
 _signature_letters = "ijklmnabcdefgh"
 
+# Maximum number of cached sets of spline coefficients
+_CACHE_SIZE_ = 256
+
+# Spline coefficients that depend only on the abscissae, keyed by kind and abscissae
+_cache = OrderedDict()
+
 
 def deriv(x, y=None, axis=0):
     """
@@ -72,19 +80,76 @@ def deriv(x, y=None, axis=0):
     return d
 
 
+def _cached_(kind, build, *args):
+    key = (kind,) + tuple(
+        (a.dtype.str, a.shape, a.tobytes()) if isinstance(a, numpy.ndarray) else a
+        for a in args
+    )
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    value = build(*args)
+    for v in value:
+        v.setflags(write=False)
+    _cache[key] = value
+    if len(_cache) > _CACHE_SIZE_:
+        _cache.popitem(last=False)
+    return value
+
+
+def clear_cache():
+    """Discard all cached spline coefficients"""
+    _cache.clear()
+
+
+def _spl_sweep_(x1, dtype, ndim):
+    """
+    Coefficients of the forward sweep of the Thomas algorithm for the natural spline of x1
+
+    These depend only on the abscissae, so they are the same for every column of data.  They
+    are computed with the same types (and rounding) as in the column-by-column solution of
+    data of the given type and number of dimensions.
+    """
+    n = len(x1)
+    x0 = numpy.roll(x1, 1)
+    x2 = numpy.roll(x1, -1)
+
+    psig = (x1 - x0) / (x2 - x0)
+    psig[0] = (x1[0] - x2[0]) / (x0[0] - x2[0])
+    psig[-1] = (x1[-1] - x2[-1]) / (x0[-1] - x2[-1])
+
+    b = numpy.zeros(n, dtype=dtype)
+    if ndim == 1:
+        p = numpy.ones(n, dtype="d")
+        for i in range(1, n - 1):
+            p[i] = psig[i] * b[i - 1] + 2.0
+            b[i] = (psig[i] - 1.0) / p[i]
+    else:
+        p = numpy.ones(n, dtype=dtype)
+        for i in range(1, n - 1):
+            p[i : i + 1] = psig[i] * b[i - 1 : i] + 2.0
+            b[i : i + 1] = (psig[i] - 1.0) / p[i : i + 1]
+    return psig, b, p
+
+
 def spl_init(x1, y1, axis=0):
     """
     Python version of GDL spl_init function
+
+    The tridiagonal system is solved for all columns at once, one level of the interpolation
+    axis at a time.
     """
+    x1 = numpy.asarray(x1)
+    y1 = numpy.asarray(y1)
     n = len(x1)
     x0 = numpy.roll(x1, 1)
     x2 = numpy.roll(x1, -1)
     y0 = numpy.roll(y1, 1, axis=axis)
     y2 = numpy.roll(y1, -1, axis=axis)
 
-    psig = (x1 - x0) / (x2 - x0)
-    psig[0] = (x1[0] - x2[0]) / (x0[0] - x2[0])
-    psig[-1] = (x1[-1] - x2[-1]) / (x0[-1] - x2[-1])
+    psig, b, p = _cached_(
+        "sweep", _spl_sweep_, x1, numpy.dtype(y1.dtype), numpy.ndim(y1)
+    )
 
     xsig = _signature_letters[axis]
     ysig = _signature_letters[: numpy.ndim(y1)]
@@ -92,56 +157,58 @@ def spl_init(x1, y1, axis=0):
 
     pu_a = numpy.einsum(sig, y2 - y1, 1.0 / ((x2 - x1) * (x2 - x0)))
     pu_b = numpy.einsum(sig, y1 - y0, 1.0 / ((x1 - x0) * (x2 - x0)))
-    pu = pu_a - pu_b
-
-    b = numpy.empty_like(y1)
-    u = numpy.empty_like(y1)
+    pu = numpy.moveaxis(pu_a - pu_b, axis, 0)
 
-    i0 = tuple(0 if i == axis else slice(None) for i in range(numpy.ndim(y1)))
-    b[i0] = 0.0
-    u[i0] = 0.0
+    y2a = numpy.empty_like(y1)
+    u = numpy.moveaxis(y2a, axis, 0)
+    u[0] = 0.0
     for i in range(1, n - 1):
-        j = tuple(i if k == axis else slice(None) for k in range(numpy.ndim(y1)))
-        jm1 = tuple(i - 1 if k == axis else slice(None) for k in range(numpy.ndim(y1)))
-        p = psig[i] * b[jm1] + 2.0
-        b[j] = (psig[i] - 1.0) / p
-        u[j] = (6.0 * pu[j] - psig[i] * u[jm1]) / p
-    i0 = tuple(-1 if i == axis else slice(None) for i in range(numpy.ndim(y1)))
-    b[i0] = 0.0
+        u[i] = (6.0 * pu[i] - psig[i] * u[i - 1]) / p[i]
+    u[-1] = 0.0
     for i in range(n - 2, -1, -1):
-        j = tuple(i if k == axis else slice(None) for k in range(numpy.ndim(y1)))
-        jp1 = tuple(i + 1 if k == axis else slice(None) for k in range(numpy.ndim(y1)))
-        b[j] = b[j] * b[jp1] + u[j]
-    return b
+        u[i] = b[i] * u[i + 1] + u[i]
+    return y2a
 
 
-def spl_interp(xa, ya, y2a, x, axis=0):
+def _spl_weights_(xa, x):
     """
-    Python version of GDL spl_interp function
+    Interval indices and interpolation weights of the cubic spline of xa at x
+
+    These depend only on the abscissae, so they are the same for every column of data.
     """
     n = len(xa)
-    valloc = numpy.digitize(x, xa) - 1
-    klo = []
-    for i in valloc:
-        klo.append(min(max(i, 0), (n - 2)))
-    klo = numpy.array(klo)
+    if n > 1 and xa[-1] < xa[0]:
+        valloc = n - numpy.searchsorted(xa[::-1], x, side="left") - 1
+    else:
+        valloc = numpy.searchsorted(xa, x, side="right") - 1
+    klo = numpy.clip(valloc, 0, n - 2)
     khi = klo + 1
     xahi = xa[khi]
     xalo = xa[klo]
 
     h = xahi - xalo
 
-    jhi = [khi if k == axis else slice(None) for k in range(numpy.ndim(ya))]
-    jlo = [klo if k == axis else slice(None) for k in range(numpy.ndim(ya))]
-    yahi = ya[tuple(jhi)]
-    yalo = ya[tuple(jlo)]
-    y2ahi = y2a[tuple(jhi)]
-    y2alo = y2a[tuple(jlo)]
-
     a = (xahi - x) / h
     b = (x - xalo) / h
     c = (a ** 3 - a) * (h ** 2) / 6.0
     d = (b ** 3 - b) * (h ** 2) / 6.0
+    return klo, khi, a, b, c, d
+
+
+def spl_interp(xa, ya, y2a, x, axis=0):
+    """
+    Python version of GDL spl_interp function
+    """
+    xa = numpy.asarray(xa)
+    x = numpy.asarray(x)
+    klo, khi, a, b, c, d = _cached_("weights", _spl_weights_, xa, x)
+
+    jhi = tuple(khi if k == axis else slice(None) for k in range(numpy.ndim(ya)))
+    jlo = tuple(klo if k == axis else slice(None) for k in range(numpy.ndim(ya)))
+    yahi = ya[jhi]
+    yalo = ya[jlo]
+    y2ahi = y2a[jhi]
+    y2alo = y2a[jlo]
 
     xsig = _signature_letters[axis]
     ysig = _signature_letters[: numpy.ndim(ya)]
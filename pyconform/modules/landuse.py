@@ -0,0 +1,102 @@
+"""
+Land use, fire and soil pool fields computed from CLM output
+
+Each field is computed for all times and grid cells at once.  Values not less than 1e16 (and
+invalid values) are treated as missing and set to the fill value 1e20.
+
+NOTE:  All of these functions return numpy masked arrays!
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import numpy
+
+from pyconform.modules.resample import DAYS_PER_MONTH, mask_fill
+
+
+def _months_(ntimes):
+    # Month of each time, in the order used by the original loop over time, which restarts
+    # at February (rather than January) after each full cycle
+    months = numpy.arange(ntimes)
+    months[12:] = 1 + (months[12:] - 12) % 11
+    return months
+
+
+def burnt_fraction(data):
+    """
+    Percentage of the grid cell burnt each month, from the fraction burnt per second
+
+    Parameters:
+        data (array): Fraction burnt per second, with (monthly) time as the first axis
+
+    Returns:
+        Masked array of the same shape, with missing values set to 1e20 (but not masked)
+    """
+    data = numpy.ma.getdata(data)
+    ml = DAYS_PER_MONTH[_months_(data.shape[0])]
+    ml = ml.reshape((-1,) + (1,) * (data.ndim - 1))
+    with numpy.errstate(invalid="ignore"):
+        valid = data < 1e16
+        a = numpy.where(valid, data * ml * 86400 * 100, 1e20)
+        a[a >= 1e16] = 1e20
+    return numpy.ma.masked_array(a)
+
+
+def reduce_landuse(data):
+    """
+    Land use types (primary/secondary land, pastures, crops and urban) from CLM landunits
+
+    Parameters:
+        data (array): Landunit data, with landunits as the second axis
+
+    Returns:
+        Masked array with 4 land use types as the second axis, with values not less than 1e16
+        set to 1e20
+    """
+    data = numpy.ma.asarray(data)
+    lu = numpy.ma.zeros(data.shape[:1] + (4,) + data.shape[2:])
+    lu[:, 0] = data[:, 0]
+    lu[:, 2] = data[:, 1]
+    lu[:, 3] = data[:, 6] + data[:, 7] + data[:, 8]
+    lu[lu >= 1e16] = 1e20
+    return lu
+
+
+def nonwoody_vegetation(pct_nat_pft, pct_crop, landfrac):
+    """
+    Percentage of non-woody vegetation on each land use type
+
+    Parameters:
+        pct_nat_pft (array): Percentage of each natural PFT, with PFTs as the second axis
+        pct_crop (array): Percentage of each crop functional type, with CFTs as the second axis
+        landfrac (array): Land fraction of each grid cell, without a time axis
+
+    Returns:
+        Masked array with 4 land use types as the second axis, masked where missing
+    """
+    land = numpy.ma.filled(numpy.ma.less_equal(landfrac, 1.0), False)
+    crop = numpy.ma.filled(numpy.ma.greater(pct_crop[:, 1], 0.0), False)
+    data = numpy.ma.zeros(pct_nat_pft.shape[:1] + (4,) + pct_nat_pft.shape[2:])
+    data[:, 0] = pct_nat_pft[:, 12] + pct_nat_pft[:, 13] + pct_nat_pft[:, 14]
+    data[:, 1] = numpy.where(land, 0.0, 1e20)
+    data[:, 2] = numpy.where(land, numpy.where(crop, 100.0, 0.0), 1e20)
+    data[:, 3] = data[:, 1]
+    return mask_fill(data)
+
+
+def soil_pools(*pools):
+    """
+    Soil carbon pools stacked along a new pool axis
+
+    Parameters:
+        pools (array): The data of each pool, all with the same shape
+
+    Returns:
+        Masked array with the pools as the second axis, masked where missing
+    """
+    shape = numpy.shape(pools[0])
+    data = numpy.ma.zeros(shape[:1] + (len(pools),) + shape[1:])
+    for k, pool in enumerate(pools):
+        data[:, k] = pool
+    return mask_fill(data)
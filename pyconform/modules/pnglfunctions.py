@@ -1,8 +1,7 @@
 #!/usr/bin/env python
 
-from Ngl import vinth2p
-
 from pyconform.functions import Function, is_constant
+from pyconform.modules.vertinterp import vinth2p
 from pyconform.physarray import DimensionsError, PhysArray
 
 
@@ -99,8 +98,7 @@ class VertInterpFunction(Function):
             psfc.data,
             intyp,
             p0.data,
-            1,
-            bool(ixtrp),
+            extrapolate=bool(ixtrp),
         )
 
         v[v == 1e30] = 1e20
@@ -0,0 +1,198 @@
+"""
+Basic kernels for the POP ocean-model functions
+
+These kernels index the ocean columns by the depth index of the bottom level (KMT) without
+looping over the columns.  The arrays derived from KMT alone (the bottom level index and the
+masks of levels above and below the bottom) are built once for each KMT and cached, since KMT is
+the same for every chunk of every variable computed on the same grid.  Kernels that touch every
+level of 4D data still loop over the levels, one horizontal slab at a time, which keeps their
+working set small.
+
+NOTE:  All of these functions return numpy arrays!
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+from collections import OrderedDict
+
+import numpy
+
+# Maximum number of cached arrays derived from KMT
+_CACHE_SIZE_ = 8
+
+# Arrays derived from KMT, keyed by kind, number of levels and KMT contents
+_cache = OrderedDict()
+
+
+def _cached_(kind, KMT, nlev, build):
+    KMT = numpy.asarray(KMT)
+    key = (kind, nlev, KMT.shape, KMT.dtype.str, KMT.tobytes())
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    value = build(KMT, nlev)
+    value.setflags(write=False)
+    _cache[key] = value
+    if len(_cache) > _CACHE_SIZE_:
+        _cache.popitem(last=False)
+    return value
+
+
+def clear_cache():
+    """Discard all cached arrays derived from KMT"""
+    _cache.clear()
+
+
+def depth_mask(KMT, nlev):
+    """
+    Mask of the levels above the bottom of each ocean column (k < KMT)
+
+    Parameters:
+        KMT (array): Number of ocean levels in each column, with shape (nj, ni)
+        nlev (int): Number of levels
+
+    Returns:
+        Boolean array with shape (nlev, nj, ni)
+    """
+    return _cached_(
+        "depth", KMT, nlev, lambda K, n: numpy.arange(n).reshape(-1, 1, 1) < K
+    )
+
+
+def below_mask(KMT, nlev):
+    """
+    Mask of the levels below the bottom of each ocean column (k >= KMT)
+
+    Parameters:
+        KMT (array): Number of ocean levels in each column, with shape (nj, ni)
+        nlev (int): Number of levels
+
+    Returns:
+        Boolean array with shape (nlev, nj, ni)
+    """
+    return _cached_("below", KMT, nlev, lambda K, n: ~depth_mask(K, n))
+
+
+def bottom_index(KMT):
+    """
+    Level index of the bottom level of each ocean column (KMT - 1)
+
+    Parameters:
+        KMT (array): Number of ocean levels in each column, with shape (nj, ni)
+
+    Returns:
+        Integer array with shape (nj, ni)
+    """
+    return _cached_("bottom", KMT, 0, lambda K, n: K.astype(numpy.intp) - 1)
+
+
+def bottom_layer(KMT, data):
+    """
+    Values of 4D data in the bottom level of each ocean column
+
+    Parameters:
+        KMT (array): Number of ocean levels in each column, with shape (nj, ni)
+        data (array): Data with shape (nt, nk, nj, ni)
+
+    Returns:
+        Array with shape (nt, nj, ni)
+    """
+    kbot = bottom_index(KMT)
+    return numpy.take_along_axis(data, kbot[numpy.newaxis, numpy.newaxis], axis=1)[:, 0]
+
+
+def bottom_layer_mult(KMT, weights, data, maxval=1e16):
+    """
+    Products of the level weights and 4D data in the bottom level of each ocean column
+
+    Columns where the data is not less than maxval (i.e., fill values) are set to zero.
+
+    Parameters:
+        KMT (array): Number of ocean levels in each column, with shape (nj, ni)
+        weights (array): Weight of each level, with shape (nk,)
+        data (array): Data with shape (nt, nk, nj, ni)
+        maxval (float): Smallest value of the data that is treated as missing
+
+    Returns:
+        Double-precision array with shape (nt, nj, ni)
+    """
+    weights = numpy.asarray(weights)
+    dtype = numpy.result_type(weights.dtype, data.dtype)
+    bottom = bottom_layer(KMT, data)
+    wbottom = weights[bottom_index(KMT)]
+    result = numpy.zeros(bottom.shape, dtype="d")
+    valid = bottom < maxval
+    numpy.multiply(wbottom, bottom, out=result, where=valid, dtype=dtype)
+    return result
+
+
+def layer_sum_mult(KMT, weights, data):
+    """
+    Sums over the levels of each ocean column of the products of the level weights and 4D data
+
+    The products are accumulated in double precision, from the top level down.
+
+    Parameters:
+        KMT (array): Number of ocean levels in each column, with shape (nj, ni)
+        weights (array): Weight of each level, with shape (nk,)
+        data (array): Data with shape (nt, nk, nj, ni)
+
+    Returns:
+        Double-precision array with shape (nt, nj, ni)
+    """
+    weights = numpy.asarray(weights)
+    dtype = numpy.result_type(weights.dtype, data.dtype)
+    nlev = data.shape[1]
+    mask = depth_mask(KMT, nlev)
+    result = numpy.zeros((data.shape[0],) + data.shape[2:], dtype="d")
+    prod = numpy.empty(result.shape, dtype=dtype)
+    for k in range(nlev):
+        numpy.multiply(weights[k], data[:, k], out=prod, dtype=dtype)
+        numpy.add(result, prod, out=result, where=mask[k])
+    return result
+
+
+def level_diff(KMT, data, dtype=None):
+    """
+    Differences between each level and the level below it, in each ocean column
+
+    The difference is taken only where the level below is above the bottom of the column.  In
+    the bottom level of each column (and in the last level) the data itself is returned.
+
+    Parameters:
+        KMT (array): Number of ocean levels in each column, with shape (nj, ni)
+        data (array): Data with shape (nt, nk, nj, ni)
+        dtype: The type of the returned array (the differences are computed in the type of
+            the data)
+
+    Returns:
+        Array with shape (nt, nk, nj, ni)
+    """
+    nlev = data.shape[1]
+    below = below_mask(KMT, nlev)
+    result = numpy.empty(data.shape, dtype=data.dtype if dtype is None else dtype)
+    for k in range(nlev - 1):
+        numpy.subtract(data[:, k], data[:, k + 1], out=result[:, k], dtype=data.dtype)
+        numpy.copyto(result[:, k], data[:, k], where=below[k + 1])
+    result[:, -1] = data[:, -1]
+    return result
+
+
+def fill_below_bottom(KMT, data, fill_value):
+    """
+    Set the values of 4D data below the bottom of each ocean column (k >= KMT), in place
+
+    Parameters:
+        KMT (array): Number of ocean levels in each column, with shape (nj, ni)
+        data (array): Data with shape (nt, nk, nj, ni)
+        fill_value: The value to set below the bottom of each column
+
+    Returns:
+        The data array
+    """
+    nlev = data.shape[1]
+    below = below_mask(KMT, nlev)
+    for k in range(nlev):
+        numpy.copyto(data[:, k], fill_value, where=below[k])
+    return data
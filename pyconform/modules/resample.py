@@ -0,0 +1,247 @@
+"""
+Resampling of monthly and annual data along the time axis
+
+Monthly data is resampled by reshaping the (first) time axis into years of 12 months and
+reducing over one of the new axes, and annual data is resampled to monthly data by repeating
+each year along the time axis.  Masked values are excluded from the reductions, and months are
+weighted by their lengths in the noleap calendar.
+
+Monthly climatologies can be computed from a time series read a few years at a time, since the
+sums and counts for each month are accumulated over the chunks of full years.
+
+NOTE:  All of these functions return numpy masked arrays!
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import numpy
+
+from pyconform.indexing import align_index
+
+# Lengths (in days) of the months in the noleap calendar
+DAYS_PER_MONTH = numpy.array(
+    [31.0, 28.0, 31.0, 30.0, 31.0, 30.0, 31.0, 31.0, 30.0, 31.0, 30.0, 31.0]
+)
+
+# Times of the middle of the months, in days since the start of a noleap year
+MID_MONTH = numpy.cumsum(DAYS_PER_MONTH) - DAYS_PER_MONTH / 2
+
+# Default number of years of monthly data read at a time
+YEARS_PER_CHUNK = 10
+
+
+def mask_fill(data, maxval=1e16, fill_value=1e20):
+    """
+    Set all values not less than maxval to the fill value, and mask them
+
+    Parameters:
+        data (array): The data to mask
+        maxval (float): Smallest value treated as missing
+        fill_value (float): The fill value of the returned array
+
+    Returns:
+        Masked array
+    """
+    data = numpy.ma.array(data)
+    data[data >= maxval] = fill_value
+    return numpy.ma.masked_values(data, fill_value)
+
+
+def _years_(data, nyears=None):
+    data = numpy.ma.asarray(data)
+    if nyears is None:
+        nyears = data.shape[0] // 12
+    return data[: 12 * nyears].reshape((nyears, 12) + data.shape[1:])
+
+
+def annual_mean(data, weights=DAYS_PER_MONTH):
+    """
+    Annual means of monthly data, starting in January
+
+    Any incomplete year at the end of the data is ignored.
+
+    Parameters:
+        data (array): Monthly data, with time as the first axis
+        weights (array): Weight of each month of the year (default: noleap month lengths)
+
+    Returns:
+        Masked array with the number of years as the first axis
+    """
+    return numpy.ma.average(_years_(data), axis=1, weights=weights)
+
+
+def first_and_last_of_year(data):
+    """
+    Values in the first and last month of each year of monthly data, starting in January
+
+    Any incomplete year at the end of the data is ignored.
+
+    Parameters:
+        data (array): Monthly data, with time as the first axis
+
+    Returns:
+        Tuple of two arrays with the number of years as the first axis
+    """
+    years = _years_(data)
+    return years[:, 0], years[:, -1]
+
+
+def monthly_climatology(chunks):
+    """
+    Monthly climatology (the mean of each month over all years) of monthly data
+
+    Parameters:
+        chunks: Iterable of arrays of monthly data, each with time as the first axis and
+            starting in January, as read a few full years at a time.  The last chunk may end
+            with an incomplete year.
+
+    Returns:
+        Masked array with 12 months as the first axis
+    """
+    total = count = None
+    for chunk in chunks:
+        chunk = numpy.ma.asarray(chunk)
+        nyears = -(-chunk.shape[0] // 12)
+        padded = numpy.ma.masked_all((12 * nyears,) + chunk.shape[1:], dtype="d")
+        padded[: chunk.shape[0]] = chunk
+        years = _years_(padded, nyears)
+        if total is None:
+            total = years.sum(axis=0).filled(0)
+            count = years.count(axis=0)
+        else:
+            total += years.sum(axis=0).filled(0)
+            count += years.count(axis=0)
+    if total is None:
+        raise ValueError("Cannot compute a climatology without data")
+    return numpy.ma.masked_array(total / numpy.maximum(count, 1), mask=count == 0)
+
+
+def monthly_repeat(data):
+    """
+    Monthly data from annual data, repeating the value of each year for each of its months
+
+    Parameters:
+        data (array): Annual data, with time as the first axis
+
+    Returns:
+        Masked array with 12 times the number of years as the first axis
+    """
+    return numpy.ma.repeat(numpy.ma.asarray(data), 12, axis=0)
+
+
+def monthly_times(times):
+    """
+    Times of the middle of each month of noleap years, from the times at the end of the years
+
+    Parameters:
+        times (array): Time (in days) at the end of each year
+
+    Returns:
+        Array with 12 times the number of years
+    """
+    starts = numpy.asarray(times, dtype="d") - 365
+    return (starts[:, numpy.newaxis] + MID_MONTH).ravel()
+
+
+def read_years(read, start=0, stop=None, years=YEARS_PER_CHUNK):
+    """
+    Read monthly data a few full years at a time
+
+    Parameters:
+        read: Function that returns the monthly data for a slice of the time axis
+        start (int): Index of the first year to read
+        stop (int): Index of the year after the last year to read (None to read all years)
+        years (int): Number of years to read at a time
+
+    Returns:
+        Generator of the arrays of monthly data read
+    """
+    while stop is None or start < stop:
+        end = start + years if stop is None else min(start + years, stop)
+        chunk = read(slice(12 * start, 12 * end))
+        if chunk.shape[0] > 0:
+            yield chunk
+        if chunk.shape[0] < 12 * (end - start):
+            break
+        start = end
+
+
+def time_index(index, dimensions):
+    """
+    Separate the index of the first (time) dimension from the index of the other dimensions
+
+    Parameters:
+        index: An index or a dictionary of indices keyed by dimension name
+        dimensions (tuple): The names of the dimensions, with time first
+
+    Returns:
+        Tuple of the time index, a function returning the full index (as a dictionary) for a
+        given time index, and the names of the dimensions remaining after indexing
+    """
+    aligned = dict(zip(dimensions, align_index(index, dimensions)))
+    tindex = aligned[dimensions[0]]
+    remaining = tuple(d for d in dimensions if isinstance(aligned[d], slice))
+
+    def full_index(tidx):
+        full = dict(aligned)
+        full[dimensions[0]] = tidx
+        return full
+
+    return tindex, full_index, remaining
+
+
+def slice_range(tindex):
+    """
+    Range of elements that can be read to compute the elements selected by a time index
+
+    Parameters:
+        tindex: Index along the time axis
+
+    Returns:
+        Tuple of the first and last (exclusive) elements to read (with None meaning the end),
+        and the index of the selected elements relative to the first element read
+    """
+    if isinstance(tindex, slice) and tindex.step in (None, 1):
+        start = 0 if tindex.start is None else tindex.start
+        if start >= 0 and (tindex.stop is None or tindex.stop >= 0):
+            return start, tindex.stop, slice(None)
+    return 0, None, tindex
+
+
+def monthly_from_annual(read, tindex, convert):
+    """
+    Monthly values from annual values, for the months selected by a time index
+
+    Years with a time of zero (such as the initial record of annual history files) are skipped.
+    Only the years containing the selected months are read, unless zero times appear after
+    the first year, in which case all years are read and the months of the skipped years are
+    set to zero at the end of the time series.
+
+    Parameters:
+        read: Function that returns the annual times and values for a slice of years
+        tindex: Index of the months along the time axis
+        convert: Function that converts annual values into 12 monthly values per year
+
+    Returns:
+        Array of the monthly values
+    """
+    m0, m1, mindex = slice_range(tindex)
+    times = read(slice(0, 1))[0]
+    offset = 1 if len(times) > 0 and times[0] == 0 else 0
+    y0 = m0 // 12 + offset
+    y1 = None if m1 is None else -(-m1 // 12) + offset
+    times, values = read(slice(y0, y1))
+    if numpy.all(times != 0):
+        monthly = convert(values)
+        start = m0 % 12
+        stop = None if m1 is None else start + m1 - m0
+        return monthly[start:stop][mindex]
+    times, values = read(slice(None))
+    valid = times != 0
+    monthly = convert(values[valid])
+    nmonths = 12 * (len(times) - offset)
+    if monthly.shape[0] < nmonths:
+        zeros = numpy.zeros((nmonths - monthly.shape[0],) + monthly.shape[1:])
+        monthly = numpy.ma.concatenate([monthly, zeros])
+    return monthly[:nmonths][tindex]
@@ -0,0 +1,182 @@
+"""
+Interpolation from hybrid-sigma levels to pressure levels
+
+This is a NumPy implementation of the algorithm of the NCL function vinth2p.  The pressures of
+the hybrid levels are computed from the surface pressure of each column, and each output
+pressure level is bracketed by the hybrid levels above and below it.  The data is interpolated
+linearly in pressure (intyp=1), in the log of pressure (intyp=2) or in the log of the log of
+pressure (intyp=3).  Output levels above the top or below the bottom hybrid level are set to the
+special value or, if extrapolation is requested, to the value at the top or bottom level.
+
+The bracketing level indices and weights depend only on the surface pressure, the hybrid
+coefficients and the output levels, so they are computed once for all of the columns and cached,
+and reused to interpolate every field on the same levels in the same chunk.
+
+NOTE:  All of these functions return numpy arrays!
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+from collections import OrderedDict
+from hashlib import sha1
+
+import numpy
+
+import pyconform.modules.hybridpres as hpres
+
+# Maximum total size (in bytes) of the cached bracketing indices and weights
+_CACHE_BYTES_ = 512 * 1024 * 1024
+
+# Bracketing indices and weights, keyed by the digest of the arrays they are computed from
+_cache = OrderedDict()
+
+
+def _digest_(*args):
+    h = sha1()
+    for arg in args:
+        arr = numpy.asarray(arg)
+        h.update(repr((arr.dtype.str, arr.shape)).encode())
+        h.update(numpy.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+def clear_cache():
+    """Discard all cached bracketing indices and weights"""
+    _cache.clear()
+
+
+def _scale_(p, intyp):
+    if intyp == 1:
+        return p
+    elif intyp == 2:
+        return numpy.log(p)
+    elif intyp == 3:
+        return numpy.log(numpy.log(p + 2.72))
+    else:
+        raise ValueError(
+            "Interpolation type must be 1 (linear), 2 (log) or 3 (log-log)"
+        )
+
+
+def _brackets_(p0, ps, hbcofa, hbcofb, plevo, intyp):
+    plevi = hpres.pressure(p0, ps, hbcofa, hbcofb)
+    plevo = numpy.asarray(plevo, dtype="d")
+    nlevi = plevi.shape[-3]
+    shape = plevi.shape[:-3] + (len(plevo),) + plevi.shape[-2:]
+
+    kp = numpy.empty(shape, dtype=numpy.intp)
+    weights = numpy.empty(shape, dtype="d")
+    above = numpy.empty(shape, dtype=bool)
+    below = numpy.empty(shape, dtype=bool)
+
+    splevi = _scale_(plevi, intyp)
+    for k, p in enumerate(plevo):
+        kk = (Ellipsis, k, slice(None), slice(None))
+        numpy.less(p, plevi[..., 0, :, :], out=above[kk])
+        numpy.greater(p, plevi[..., -1, :, :], out=below[kk])
+        numpy.sum(plevi[..., 1:, :, :] < p, axis=-3, out=kp[kk])
+        numpy.minimum(kp[kk], nlevi - 2, out=kp[kk])
+        slo = numpy.take_along_axis(splevi, kp[..., k : k + 1, :, :], axis=-3)[
+            ..., 0, :, :
+        ]
+        shi = numpy.take_along_axis(splevi, kp[..., k : k + 1, :, :] + 1, axis=-3)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            weights[kk] = (_scale_(p, intyp) - slo) / (shi[..., 0, :, :] - slo)
+    weights[above | below] = 0.0
+    return kp, weights, above, below
+
+
+def brackets(p0, ps, hbcofa, hbcofb, plevo, intyp=1):
+    """
+    Bracketing hybrid levels and interpolation weights of each output pressure level
+
+    Parameters:
+        p0: The reference pressure (scalar, in the units of plevo)
+        ps (array): The surface pressure (in the units of plevo), with horizontal dimensions last
+        hbcofa (array): The hybrid 'a' coefficient of each level, from the top down
+        hbcofb (array): The hybrid 'b' coefficient of each level, from the top down
+        plevo (array): The output pressure levels
+        intyp (int): The interpolation type (1: linear, 2: log, 3: log-log)
+
+    Returns:
+        Tuple of read-only arrays (kp, weights, above, below), each with shape
+        ps.shape[:-2] + (nlevo,) + ps.shape[-2:]: the index of the hybrid level above each
+        output level, the interpolation weight of the hybrid level below it, and the masks of
+        the output levels above the top and below the bottom hybrid level
+    """
+    key = ("brackets", intyp, _digest_(p0, ps, hbcofa, hbcofb, plevo))
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    value = _brackets_(p0, ps, hbcofa, hbcofb, plevo, intyp)
+    for v in value:
+        v.setflags(write=False)
+    nbytes = sum(v.nbytes for v in value)
+    if nbytes <= _CACHE_BYTES_:
+        _cache[key] = value
+        while sum(v.nbytes for vs in _cache.values() for v in vs) > _CACHE_BYTES_:
+            _cache.popitem(last=False)
+    return value
+
+
+def interpolate(data, kp, weights, above, below, extrapolate=False, spvl=1e30):
+    """
+    Interpolate data on hybrid levels to pressure levels with precomputed brackets
+
+    Parameters:
+        data (array): Data with levels (from the top down) as the third-to-last dimension
+        kp, weights, above, below (array): The brackets of the output levels
+        extrapolate (bool): Whether to use the values of the top and bottom levels outside of
+            the range of the hybrid levels (instead of the special value)
+        spvl (float): The special value set outside of the range of the hybrid levels, and
+            wherever the data used is masked
+
+    Returns:
+        Array with the output levels as the third-to-last dimension
+    """
+    mask = numpy.ma.getmask(data)
+    data = numpy.ma.getdata(data)
+    ndim = max(data.ndim, kp.ndim)
+    data = data.reshape((1,) * (ndim - data.ndim) + data.shape)
+    kp = kp.reshape((1,) * (ndim - kp.ndim) + kp.shape)
+    lo = numpy.take_along_axis(data, kp, axis=-3)
+    hi = numpy.take_along_axis(data, kp + 1, axis=-3)
+    dato = lo + (hi - lo) * weights
+    if extrapolate:
+        numpy.copyto(dato, data[..., :1, :, :], where=above)
+        numpy.copyto(dato, data[..., -1:, :, :], where=below)
+    else:
+        numpy.copyto(dato, spvl, where=above | below)
+    if mask is not numpy.ma.nomask:
+        mask = mask.reshape(data.shape)
+        masked = numpy.take_along_axis(mask, kp, axis=-3)
+        masked |= numpy.take_along_axis(mask, kp + 1, axis=-3)
+        if extrapolate:
+            numpy.copyto(masked, mask[..., :1, :, :], where=above)
+            numpy.copyto(masked, mask[..., -1:, :, :], where=below)
+        numpy.copyto(dato, spvl, where=masked)
+    return dato
+
+
+def vinth2p(datai, hbcofa, hbcofb, plevo, psfc, intyp, p0, extrapolate=False):
+    """
+    Interpolate data on hybrid levels to pressure levels, like the NCL function vinth2p
+
+    Parameters:
+        datai (array): Data with levels (from the top down) as the third-to-last dimension
+        hbcofa (array): The hybrid 'a' coefficient of each level
+        hbcofb (array): The hybrid 'b' coefficient of each level
+        plevo (array): The output pressure levels (in mbar)
+        psfc (array): The surface pressure (in Pa), with horizontal dimensions last
+        intyp (int): The interpolation type (1: linear, 2: log, 3: log-log)
+        p0: The reference pressure (in mbar)
+        extrapolate (bool): Whether to use the values of the top and bottom levels outside of
+            the range of the hybrid levels (instead of 1e30)
+
+    Returns:
+        Array with the output levels as the third-to-last dimension
+    """
+    ps = numpy.asarray(psfc, dtype="d") * 0.01
+    kp, weights, above, below = brackets(p0, ps, hbcofa, hbcofb, plevo, intyp)
+    return interpolate(datai, kp, weights, above, below, extrapolate=extrapolate)
@@ -9,6 +9,7 @@ LICENSE: See the LICENSE.rst file for details
 """
 
 from collections import namedtuple
+from threading import Lock
 
 from ply import lex, yacc
 
@@ -45,7 +46,7 @@ def t_error(t):
     raise TypeError("Unexpected string: {!r}".format(t.value))
 
 
-lex.lex(debug=False)
+_lexer = lex.lex(debug=False)
 
 
 def ind_str(index):
@@ -278,8 +279,97 @@ def p_error(p):
     raise TypeError("Parsing error at {!r}".format(p.value))
 
 
-yacc.yacc(debug=False)
+# The parser is built from the tables in parsetab.py, which are never rewritten at run time
+_parser = yacc.yacc(debug=False, tabmodule="pyconform.parsetab", write_tables=False)
+
+
+class _FrozenList(list):
+    """List of parsed arguments or indices that cannot be modified"""
+
+    def _frozen_(self, *args, **kwds):
+        raise TypeError("Parsed definitions cannot be modified")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _frozen_
+    append = extend = insert = pop = remove = clear = sort = reverse = _frozen_
+
+    def __reduce__(self):
+        return (_FrozenList, (list(self),))
+
+
+class _FrozenDict(dict):
+    """Dictionary of parsed keyword arguments that cannot be modified"""
+
+    def _frozen_(self, *args, **kwds):
+        raise TypeError("Parsed definitions cannot be modified")
+
+    __setitem__ = __delitem__ = __ior__ = _frozen_
+    pop = popitem = clear = update = setdefault = _frozen_
+
+    def __reduce__(self):
+        return (_FrozenDict, (dict(self),))
+
+
+# Parsed definitions, keyed by definition string and by the tokens of the definition
+_definitions = {}
+_tokenized = {}
+
+# Parsed subexpressions shared by all definitions, keyed by their structure
+_interned = {}
+
+# Lock serializing the use of the (stateful) lexer and parser
+_lock = Lock()
+
+
+def _intern_(obj):
+    """Return the shared, immutable copy of a parsed object and its structural key"""
+    if isinstance(obj, slice):
+        parts = [_intern_(x) for x in (obj.start, obj.stop, obj.step)]
+        return slice(*[p[0] for p in parts]), ("slice",) + tuple(p[1] for p in parts)
+    elif isinstance(obj, (OpType, VarType)):
+        parts = [_intern_(x) for x in obj[1]]
+        node = type(obj)(obj.key, _FrozenList(p[0] for p in parts))
+        key = (type(obj).__name__, obj.key) + tuple(p[1] for p in parts)
+    elif isinstance(obj, FuncType):
+        parts = [_intern_(x) for x in obj.args]
+        kwds = {k: _intern_(obj.kwds[k]) for k in obj.kwds}
+        node = FuncType(
+            obj.key,
+            _FrozenList(p[0] for p in parts),
+            _FrozenDict((k, kwds[k][0]) for k in kwds),
+        )
+        key = (
+            ("FuncType", obj.key)
+            + tuple(p[1] for p in parts)
+            + tuple((k, kwds[k][1]) for k in kwds)
+        )
+    else:
+        return obj, (type(obj).__name__, repr(obj))
+    return _interned.setdefault(key, node), key
 
 
 def parse_definition(strexpr):
-    return yacc.parse(strexpr)  # @UndefinedVariable
+    """
+    Parse a variable definition string
+
+    Parsed definitions are cached, and identical definitions (ignoring whitespace) and
+    identical subexpressions share the same immutable objects.  This is safe to call from
+    several threads.
+
+    Parameters:
+        strexpr (str): The definition string
+
+    Returns:
+        The parsed definition (an OpType, FuncType or VarType, or a constant)
+    """
+    try:
+        return _definitions[strexpr]
+    except KeyError:
+        pass
+    with _lock:
+        _lexer.input(strexpr)
+        tokens = tuple((tok.type, tok.value) for tok in iter(_lexer.token, None))
+        if tokens not in _tokenized:
+            parsed = _parser.parse(strexpr, lexer=_lexer)
+            _tokenized[tokens] = _intern_(parsed)[0]
+        _definitions[strexpr] = _tokenized[tokens]
+    return _definitions[strexpr]
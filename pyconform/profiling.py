@@ -0,0 +1,397 @@
+"""
+Execution Profiling Classes
+
+This module contains the Profiler, which records where the time goes while a Data Flow is
+executed.
+
+While a Profiler is running, the __getitem__ method of every FlowNode class is wrapped to record,
+for each node (by type and label), the number of calls, the wall time spent (in total, and in the
+node itself excluding the time spent in its input nodes), the bytes of data produced and the peak
+memory allocated during the calls.  The methods of the WriteNode are wrapped to record, for each
+output file, the number of chunks written and the wall time spent opening, writing and closing
+the file.  The reads of the ReadNodes are wrapped to record, for each input variable, the number
+of reads, the wall time spent reading and the bytes read, whether the reads are made by the
+ReadNodes themselves or by a read scheduler (in which case they are made outside of any FlowNode
+call, possibly in a background thread).  The methods of the read schedulers are wrapped to
+record the time spent reading the scheduled chunks, and the time spent waiting for them.  The
+records of all ranks can be gathered on the manager rank, summarized in a report of the nodes
+and input variables taking the most time, and written to a JSON file.
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import tracemalloc
+from collections import OrderedDict
+from threading import Lock
+from time import time
+
+from pyconform.flownodes import FlowNode, ReadNode, WriteNode
+from pyconform.scheduling import ReadScheduler
+
+# Indices of the entries of the stack frames of the FlowNode calls being profiled
+_NODE_, _START_, _CHILDREN_, _MEMORY_, _PEAK_ = range(5)
+
+
+def _classes_(cls):
+    classes = [cls]
+    for subcls in cls.__subclasses__():
+        classes.extend(_classes_(subcls))
+    return classes
+
+
+class Profiler(object):
+    """
+    Object that records the time, calls, bytes and memory of each FlowNode and output file
+
+    The peak memory allocated is only recorded if the Python memory allocations can be traced
+    (with tracemalloc, in Python 3.9 or later), and tracing slows down the execution.
+    """
+
+    # Names of the wrapped WriteNode methods, and the phases of writing a file they perform
+    _WRITE_METHODS_ = OrderedDict(
+        [("_start_", "open"), ("_write_chunk_", "write"), ("_finish_", "close")]
+    )
+
+    # Names of the wrapped ReadScheduler methods, and the phases of the scheduled reads they
+    # perform (reading the data of a chunk, and waiting for the data of a chunk to be read)
+    _SCHEDULE_METHODS_ = OrderedDict([("_read_chunk_", "read"), ("schedule", "wait")])
+
+    def __init__(self, memory=True):
+        """
+        Initializer
+
+        Parameters:
+            memory (bool): Whether to record the peak memory allocated by each FlowNode
+        """
+        self._memory = bool(memory) and hasattr(tracemalloc, "reset_peak")
+        self._tracing = False
+        self._stack = []
+        self._nodes = OrderedDict()
+        self._files = OrderedDict()
+        self._reads = OrderedDict()
+        self._schedule = {"chunks": 0, "read_seconds": 0.0, "wait_seconds": 0.0}
+        self._lock = Lock()
+        self._wrapped = []
+
+    @property
+    def memory(self):
+        """Whether the peak memory allocated by each FlowNode is recorded"""
+        return self._memory
+
+    def start(self):
+        """
+        Start profiling all FlowNodes
+        """
+        if self._wrapped:
+            return
+        for cls in _classes_(FlowNode):
+            if "__getitem__" in cls.__dict__:
+                self._wrap_(
+                    cls, "__getitem__", self._getitem_(cls.__dict__["__getitem__"])
+                )
+        for name, phase in Profiler._WRITE_METHODS_.items():
+            self._wrap_(WriteNode, name, self._write_(WriteNode.__dict__[name], phase))
+        self._wrap_(ReadNode, "_read_", self._read_(ReadNode.__dict__["_read_"]))
+        for cls in _classes_(ReadScheduler):
+            for name, phase in Profiler._SCHEDULE_METHODS_.items():
+                if name in cls.__dict__:
+                    self._wrap_(cls, name, self._scheduled_(cls.__dict__[name], phase))
+        if self._memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+    def stop(self):
+        """
+        Stop profiling all FlowNodes
+        """
+        for cls, name, method in reversed(self._wrapped):
+            setattr(cls, name, method)
+        self._wrapped = []
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _wrap_(self, cls, name, wrapper):
+        self._wrapped.append((cls, name, cls.__dict__[name]))
+        setattr(cls, name, wrapper)
+
+    def _getitem_(self, getitem):
+        profiler = self
+
+        def __getitem__(node, index):
+            stack = profiler._stack
+
+            # Calls of base class methods from the same node are part of the same call
+            if stack and stack[-1][_NODE_] is node:
+                return getitem(node, index)
+
+            frame = [node, time(), 0.0, 0, 0]
+            if profiler._memory:
+                frame[_MEMORY_], peak = tracemalloc.get_traced_memory()
+                frame[_PEAK_] = frame[_MEMORY_]
+                if stack:
+                    stack[-1][_PEAK_] = max(stack[-1][_PEAK_], peak)
+                tracemalloc.reset_peak()
+            stack.append(frame)
+            try:
+                data = getitem(node, index)
+            finally:
+                stack.pop()
+                seconds = time() - frame[_START_]
+                if stack:
+                    stack[-1][_CHILDREN_] += seconds
+                peak = None
+                if profiler._memory:
+                    peak = max(frame[_PEAK_], tracemalloc.get_traced_memory()[1])
+                    if stack:
+                        stack[-1][_PEAK_] = max(stack[-1][_PEAK_], peak)
+                    peak -= frame[_MEMORY_]
+
+                key = (type(node).__name__, node.label)
+                if key not in profiler._nodes:
+                    profiler._nodes[key] = {
+                        "type": key[0],
+                        "label": key[1],
+                        "calls": 0,
+                        "seconds": 0.0,
+                        "self_seconds": 0.0,
+                        "bytes": 0,
+                        "peak_bytes": peak,
+                    }
+                record = profiler._nodes[key]
+                record["calls"] += 1
+                record["seconds"] += seconds
+                record["self_seconds"] += seconds - frame[_CHILDREN_]
+                if peak is not None:
+                    record["peak_bytes"] = max(record["peak_bytes"], peak)
+            if index is not None:
+                record["bytes"] += getattr(data, "nbytes", 0)
+            return data
+
+        return __getitem__
+
+    def _write_(self, method, phase):
+        profiler = self
+
+        def write(wnode, *args, **kwds):
+            start = time()
+            try:
+                return method(wnode, *args, **kwds)
+            finally:
+                if wnode not in profiler._files:
+                    profiler._files[wnode] = {
+                        "chunks": 0,
+                        "seconds": 0.0,
+                        "open": 0.0,
+                        "write": 0.0,
+                        "close": 0.0,
+                    }
+                record = profiler._files[wnode]
+                record[phase] += time() - start
+                record["seconds"] += time() - start
+                if phase == "write":
+                    record["chunks"] += 1
+
+        return write
+
+    def _read_(self, method):
+        profiler = self
+
+        def _read_(rnode, ncfile, index):
+            start = time()
+            data = method(rnode, ncfile, index)
+            seconds = time() - start
+            key = (rnode.filepath, rnode.label)
+            with profiler._lock:
+                if key not in profiler._reads:
+                    profiler._reads[key] = {
+                        "file": key[0],
+                        "label": key[1],
+                        "calls": 0,
+                        "seconds": 0.0,
+                        "bytes": 0,
+                    }
+                record = profiler._reads[key]
+                record["calls"] += 1
+                record["seconds"] += seconds
+                record["bytes"] += data.nbytes
+            return data
+
+        return _read_
+
+    def _scheduled_(self, method, phase):
+        profiler = self
+
+        def scheduled(scheduler, *args, **kwds):
+            start = time()
+            try:
+                return method(scheduler, *args, **kwds)
+            finally:
+                with profiler._lock:
+                    profiler._schedule["{}_seconds".format(phase)] += time() - start
+                    if phase == "read":
+                        profiler._schedule["chunks"] += 1
+
+        return scheduled
+
+    def records(self):
+        """
+        The records of all FlowNodes, output files and input variables profiled on this rank
+
+        Returns:
+            dict: The list of 'nodes' records, the list of 'files' records (including the bytes
+                written to each file, and the time spent in the NetCDF library writing them), the
+                list of 'reads' records of the input variables, and the 'schedule' record of the
+                number of scheduled chunks read, the time spent reading them ('read_seconds', in
+                any thread) and the time spent waiting for them ('wait_seconds')
+        """
+        files = []
+        for wnode, record in self._files.items():
+            stats = wnode.write_stats.values()
+            record = OrderedDict([("label", wnode.label)] + list(record.items()))
+            record["bytes"] = sum(vstats["bytes"] for vstats in stats)
+            record["write_seconds"] = sum(vstats["seconds"] for vstats in stats)
+            files.append(record)
+        return {
+            "nodes": [dict(r) for r in self._nodes.values()],
+            "files": files,
+            "reads": [dict(r) for r in self._reads.values()],
+            "schedule": dict(self._schedule),
+        }
+
+    def gather(self, scomm):
+        """
+        Gather the records of all ranks on the manager rank
+
+        This must be called on all ranks.  The records of nodes with the same type and label, and
+        of input variables with the same file and label, are summed over all ranks (with the
+        maximum peak memory), and the records of the output files are labeled with the rank that
+        wrote them.
+
+        Parameters:
+            scomm (SimpleComm): The communicator used to execute the Data Flow
+
+        Returns:
+            dict: The records of all ranks on the manager (None on others)
+        """
+        records = self.records()
+        for record in records["files"]:
+            record["rank"] = scomm.get_rank()
+        if not scomm.is_manager():
+            scomm.collect(records)
+            return None
+
+        allrecords = [records]
+        for _ in range(scomm.get_size() - 1):
+            allrecords.append(scomm.collect()[1])
+
+        nodes = OrderedDict()
+        files = []
+        reads = OrderedDict()
+        schedule = {"chunks": 0, "read_seconds": 0.0, "wait_seconds": 0.0}
+        for records in allrecords:
+            for record in records["nodes"]:
+                key = (record["type"], record["label"])
+                if key not in nodes:
+                    nodes[key] = dict(record)
+                    continue
+                merged = nodes[key]
+                for name in ("calls", "seconds", "self_seconds", "bytes"):
+                    merged[name] += record[name]
+                if record["peak_bytes"] is not None:
+                    merged["peak_bytes"] = max(
+                        merged["peak_bytes"], record["peak_bytes"]
+                    )
+            files.extend(records["files"])
+            for record in records["reads"]:
+                key = (record["file"], record["label"])
+                if key not in reads:
+                    reads[key] = dict(record)
+                    continue
+                for name in ("calls", "seconds", "bytes"):
+                    reads[key][name] += record[name]
+            for name in schedule:
+                schedule[name] += records["schedule"][name]
+        return {
+            "nodes": list(nodes.values()),
+            "files": files,
+            "reads": list(reads.values()),
+            "schedule": schedule,
+        }
+
+    @staticmethod
+    def report(records, top=10):
+        """
+        Summarize the FlowNodes (excluding the time in their input nodes) and the input variables
+        taking the most time
+
+        Parameters:
+            records (dict): The records, as returned by 'records' or 'gather'
+            top (int): The number of FlowNodes and input variables to report
+
+        Returns:
+            str: The report
+        """
+        nodes = sorted(records["nodes"], key=lambda r: r["self_seconds"], reverse=True)
+        lines = [
+            "Top {} of {} data flow nodes by time (excluding input nodes):".format(
+                min(top, len(nodes)), len(nodes)
+            ),
+            "   {:>10} {:>10} {:>8} {:>10} {:>10}  {}".format(
+                "Self [s]", "Total [s]", "Calls", "MB", "Peak MB", "Node"
+            ),
+        ]
+        for record in nodes[:top]:
+            peak = record["peak_bytes"]
+            peak_str = "--" if peak is None else "{:.2f}".format(peak / 1048576.0)
+            lines.append(
+                "   {:>10.3f} {:>10.3f} {:>8d} {:>10.2f} {:>10}  {}({!r})".format(
+                    record["self_seconds"],
+                    record["seconds"],
+                    record["calls"],
+                    record["bytes"] / 1048576.0,
+                    peak_str,
+                    record["type"],
+                    record["label"],
+                )
+            )
+        reads = sorted(records["reads"], key=lambda r: r["seconds"], reverse=True)
+        lines.append(
+            "Top {} of {} input variables by time reading:".format(
+                min(top, len(reads)), len(reads)
+            )
+        )
+        lines.append(
+            "   {:>10} {:>8} {:>10}  {}".format("Time [s]", "Calls", "MB", "Input")
+        )
+        for record in reads[:top]:
+            lines.append(
+                "   {:>10.3f} {:>8d} {:>10.2f}  {}:{}".format(
+                    record["seconds"],
+                    record["calls"],
+                    record["bytes"] / 1048576.0,
+                    record["file"],
+                    record["label"],
+                )
+            )
+        schedule = records["schedule"]
+        lines.append(
+            "Scheduled reads: {} chunks read in {:.3f} s, {:.3f} s spent waiting".format(
+                schedule["chunks"], schedule["read_seconds"], schedule["wait_seconds"]
+            )
+        )
+        seconds = sum(r["seconds"] for r in records["files"])
+        lines.append(
+            "Total time writing {} files: {:.3f} s".format(
+                len(records["files"]), seconds
+            )
+        )
+        return "\n".join(lines)
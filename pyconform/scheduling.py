@@ -0,0 +1,301 @@
+"""
+Read Scheduling Classes
+
+This module contains the classes needed to coordinate the reading of input data for the
+ReadNodes in a Data Flow.
+
+Without a scheduler, every ReadNode opens its input file and reads its own hyperslab each time
+data is requested from it.  When an output file needs several variables from the same input file
+(e.g., U, V, T and PS from the same history file), this means opening the same file many times
+per chunk.  The ReadScheduler groups the ReadNodes by input file and, for each chunk, reads all
+of their hyperslabs under a single open of each file, in the order in which the variables are
+stored in the file.  The data read is then handed back to the individual ReadNodes when they are
+asked for it.  ReadNodes reading the same hyperslab of the same variable (e.g., for different
+output variables written together) share a single read.
+
+The ReadPrefetcher additionally reads ahead:  while the data for one chunk is being computed and
+written, a background thread reads the input data for the next chunks into a bounded buffer.
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+from collections import OrderedDict
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+
+from netCDF4 import Dataset
+
+from pyconform.flownodes import FlowNode, ReadNode, iter_dfs
+from pyconform.locking import NETCDF_LOCK
+from pyconform.tracing import span
+
+
+class ReadScheduler(object):
+    """
+    Object that coalesces the reads of all ReadNodes reading from the same file
+
+    The read scheduler predicts the index that each ReadNode will be asked for in a given
+    output chunk by mapping the output chunk to input dimension names (as done by the MapNodes
+    in the Data Flow).  If a ReadNode is asked for a different index than predicted (e.g., when
+    a function modifies the index passed to its arguments), or is not asked for data at all, the
+    ReadNode is no longer scheduled and reads its own data directly from file.
+    """
+
+    def __init__(self, dmap={}):
+        """
+        Initializer
+
+        Parameters:
+            dmap (dict): A dictionary mapping output dimension names to input dimension names
+        """
+        if not isinstance(dmap, dict):
+            raise TypeError("Dimension map must be a dictionary")
+        self._o2imap = dmap
+
+        # ReadNodes grouped by file path, each group sorted in storage order
+        self._groups = OrderedDict()
+
+        # ReadNodes whose requested indices could not be predicted
+        self._unscheduled = set()
+
+        # Data read for the current chunk, keyed by ReadNode and file-local index
+        self._cache = {}
+
+    @property
+    def groups(self):
+        """Dictionary of file paths and the scheduled ReadNodes reading from each file"""
+        return self._groups
+
+    def register(self, *nodes):
+        """
+        Schedule the reads of all ReadNodes upstream of the given FlowNodes
+
+        Parameters:
+            nodes: The FlowNodes whose ReadNodes should be scheduled
+        """
+        rnodes = set()
+        for node in nodes:
+            if isinstance(node, FlowNode):
+                rnodes.update(nd for nd in iter_dfs(node) if isinstance(nd, ReadNode))
+        groups = OrderedDict()
+        for rnode in sorted(rnodes, key=lambda n: (n.filepath, n.varid, n.label)):
+            rnode.scheduler = self
+            groups.setdefault(rnode.filepath, []).append(rnode)
+        self._groups.update(groups)
+
+    def unregister(self):
+        """
+        Stop scheduling the reads of all registered ReadNodes
+        """
+        for rnodes in self._groups.values():
+            for rnode in rnodes:
+                rnode.scheduler = None
+        self._groups = OrderedDict()
+        self._unscheduled = set()
+        self._cache = {}
+
+    def _key_(self, rnode, index):
+        return rnode, repr(rnode._read_index_(index)[0])
+
+    def input_index(self, index):
+        """
+        Compute the index expected by the ReadNodes for a given output chunk
+
+        Parameters:
+            index (dict): A dictionary of output dimension names and slices
+        """
+        return dict((self._o2imap.get(d, d), i) for d, i in index.items())
+
+    def plan(self, indices):
+        """
+        Declare the output chunks that will be scheduled, in the order they will be scheduled
+
+        The basic ReadScheduler reads each chunk only when it is scheduled, so the plan is
+        ignored.
+
+        Parameters:
+            indices (list): The dictionaries of output dimension names and slices
+        """
+
+    def _read_chunk_(self, index):
+        """
+        Read the data of all scheduled ReadNodes for a given output chunk
+
+        Parameters:
+            index (dict): A dictionary of output dimension names and slices
+
+        Returns:
+            dict: The data read, keyed by ReadNode and file-local index
+        """
+        data = {}
+        inp_index = self.input_index(index)
+        for fpath, rnodes in self._groups.items():
+            rnodes = [rn for rn in rnodes if rn not in self._unscheduled]
+            if len(rnodes) == 0:
+                continue
+            reads = {}
+            with NETCDF_LOCK, Dataset(fpath, "r") as ncfile:
+                for rnode in rnodes:
+                    rindex, rdims = rnode._read_index_(inp_index)
+                    key = rnode, repr(rindex)
+                    if key in data:
+                        continue
+                    slab = rnode.label, repr(rindex), rdims
+                    if slab not in reads:
+                        reads[slab] = rnode._read_(ncfile, inp_index)
+                    data[key] = reads[slab]
+        return data
+
+    def schedule(self, index):
+        """
+        Read the data of all scheduled ReadNodes for a given output chunk
+
+        Parameters:
+            index (dict): A dictionary of output dimension names and slices
+        """
+        self.clear()
+        self._cache = self._read_chunk_(index)
+
+    def fetch(self, rnode, index):
+        """
+        Retrieve the data read for a ReadNode, if it was scheduled, otherwise None
+
+        Each scheduled read is handed out only once, and data shared with other ReadNodes that
+        have not fetched it yet is copied, so that the data returned can be safely modified by
+        the caller.
+
+        Parameters:
+            rnode (ReadNode): The ReadNode requesting the data
+            index: The index requested of the ReadNode
+        """
+        if len(self._cache) == 0:
+            return None
+        data = self._cache.pop(self._key_(rnode, index), None)
+        if data is not None and any(d is data for d in self._cache.values()):
+            data = data.copy()
+        return data
+
+    def clear(self):
+        """
+        Discard the data read for the current chunk
+
+        ReadNodes whose scheduled data was never fetched are no longer scheduled.
+        """
+        for rnode, _ in self._cache:
+            self._unscheduled.add(rnode)
+        self._cache = {}
+
+
+class ReadPrefetcher(ReadScheduler):
+    """
+    ReadScheduler that reads the input data of upcoming chunks in a background thread
+
+    Once the output chunks are planned, a background thread reads the input data for each
+    planned chunk, in order, into a buffer holding at most 'depth' chunks.  Scheduling a chunk
+    then takes its data from the buffer, so that reading the next chunks overlaps with computing
+    and writing the current chunk.
+
+    All calls into the NetCDF library made by the FlowNodes are serialized with a lock, because
+    the NetCDF library is not thread-safe.  User-defined functions that open NetCDF files
+    themselves should not be used with a ReadPrefetcher.
+    """
+
+    def __init__(self, dmap={}, depth=1):
+        """
+        Initializer
+
+        Parameters:
+            dmap (dict): A dictionary mapping output dimension names to input dimension names
+            depth (int): The maximum number of chunks to read ahead
+        """
+        super(ReadPrefetcher, self).__init__(dmap)
+        if not isinstance(depth, int) or depth < 1:
+            raise ValueError(
+                "Prefetch depth must be a positive integer, not {!r}".format(depth)
+            )
+        self._depth = depth
+        self._buffer = None
+        self._thread = None
+        self._stop = Event()
+
+    @property
+    def depth(self):
+        """The maximum number of chunks to read ahead"""
+        return self._depth
+
+    def plan(self, indices):
+        """
+        Start reading the input data of the given output chunks in a background thread
+
+        Parameters:
+            indices (list): The dictionaries of output dimension names and slices
+        """
+        self._stop_thread_()
+        self._stop = Event()
+        self._buffer = Queue(maxsize=self._depth)
+        self._thread = Thread(
+            target=self._prefetch_, args=(list(indices), self._buffer, self._stop)
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _prefetch_(self, indices, buffer, stop):
+        for i, index in enumerate(indices):
+            if stop.is_set():
+                return
+            try:
+                with span("prefetch", chunk=i):
+                    item = (repr(index), self._read_chunk_(index))
+            except Exception as err:
+                item = (repr(index), err)
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    break
+                except Full:
+                    continue
+            if isinstance(item[1], Exception):
+                return
+
+    def _stop_thread_(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self._buffer.get(timeout=0.1)
+            except Empty:
+                pass
+        self._thread.join()
+        self._thread = None
+        self._buffer = None
+
+    def schedule(self, index):
+        """
+        Retrieve the data of all scheduled ReadNodes for a given output chunk
+
+        If the chunk is not the next planned chunk, the prefetching is stopped and the data is
+        read immediately.
+
+        Parameters:
+            index (dict): A dictionary of output dimension names and slices
+        """
+        self.clear()
+        if self._thread is not None:
+            key, data = self._buffer.get()
+            if key == repr(index):
+                if isinstance(data, Exception):
+                    self._stop_thread_()
+                    raise data
+                self._cache = data
+                return
+            self._stop_thread_()
+        self._cache = self._read_chunk_(index)
+
+    def unregister(self):
+        """
+        Stop prefetching and stop scheduling the reads of all registered ReadNodes
+        """
+        self._stop_thread_()
+        super(ReadPrefetcher, self).unregister()
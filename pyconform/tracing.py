@@ -0,0 +1,187 @@
+"""
+Execution Tracing Classes
+
+This module contains the Tracer, which records a timeline of the execution of a Data Flow on
+each rank, and writes it in the Chrome trace event format (viewable with chrome://tracing or
+https://ui.perfetto.dev).
+
+The code being traced marks its phases with the 'span' function, which records the span of time
+taken by the phase with the active Tracer (and does nothing if no Tracer is active).  Each rank
+is shown as a separate process of the timeline, with a separate track for each of its threads
+(e.g., the thread reading ahead the input data).
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import json
+from threading import current_thread, get_ident
+from time import time
+
+# The active Tracer, if any
+_TRACER_ = None
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NULL_SPAN_ = _NullSpan()
+
+
+class _Span(object):
+    def __init__(self, tracer, name, args):
+        self._tracer = tracer
+        self._name = name
+        self._args = args
+
+    def __enter__(self):
+        self._start = time()
+        return self
+
+    def __exit__(self, *args):
+        self._tracer._record_(self._name, self._start, time(), self._args)
+
+
+def span(name, **args):
+    """
+    Record the span of time taken by a phase of the execution with the active Tracer
+
+    Use as a context manager around the code executing the phase.
+
+    Parameters:
+        name (str): The name of the phase
+        args: Additional information about the phase (e.g., the file or variable name)
+    """
+    if _TRACER_ is None:
+        return _NULL_SPAN_
+    return _Span(_TRACER_, name, args)
+
+
+class Tracer(object):
+    """
+    Object that records the spans of the phases of the execution on a single rank
+    """
+
+    def __init__(self, rank=0):
+        """
+        Initializer
+
+        Parameters:
+            rank (int): The rank on which the execution is traced
+        """
+        self._rank = rank
+        self._threads = {}
+        self._events = []
+
+    def start(self):
+        """
+        Start recording the spans of the execution with this Tracer
+        """
+        global _TRACER_
+        _TRACER_ = self
+        self._thread_id_()
+
+    def stop(self):
+        """
+        Stop recording the spans of the execution with this Tracer
+        """
+        global _TRACER_
+        if _TRACER_ is self:
+            _TRACER_ = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _thread_id_(self):
+        ident = get_ident()
+        if ident not in self._threads:
+            self._threads[ident] = (len(self._threads), current_thread().name)
+        return self._threads[ident][0]
+
+    def _record_(self, name, start, end, args):
+        self._events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": self._rank,
+                "tid": self._thread_id_(),
+                "args": args,
+            }
+        )
+
+    def events(self):
+        """
+        The trace events recorded on this rank
+
+        Returns:
+            list: The metadata events naming the rank and its threads, followed by the
+                complete ('X') events of each span recorded, with times in microseconds
+        """
+        meta = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": self._rank,
+                "args": {"name": "rank {}".format(self._rank)},
+            },
+            {
+                "name": "process_sort_index",
+                "ph": "M",
+                "pid": self._rank,
+                "args": {"sort_index": self._rank},
+            },
+        ]
+        for tid, tname in self._threads.values():
+            meta.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._rank,
+                    "tid": tid,
+                    "args": {"name": tname},
+                }
+            )
+        return meta + self._events
+
+    def gather(self, scomm):
+        """
+        Gather the trace events of all ranks on the manager rank
+
+        This must be called on all ranks.
+
+        Parameters:
+            scomm (SimpleComm): The communicator used to execute the Data Flow
+
+        Returns:
+            list: The trace events of all ranks on the manager (None on others)
+        """
+        events = self.events()
+        if not scomm.is_manager():
+            scomm.collect(events)
+            return None
+        for _ in range(scomm.get_size() - 1):
+            events.extend(scomm.collect()[1])
+        return events
+
+    @staticmethod
+    def write(events, filename):
+        """
+        Write trace events to a JSON file in the Chrome trace event format
+
+        Parameters:
+            events (list): The trace events, as returned by 'events' or 'gather'
+            filename (str): The name of the file to write
+        """
+        with open(filename, "w") as fobj:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fobj)
@@ -27,7 +27,6 @@ setup(
     url="https://github.com/NCAR/PyConform",
     packages=find_packages(exclude=["tests"]),
     classifiers=[
-        "Programming Language :: Python :: 2.7",
         "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
@@ -37,7 +36,7 @@ setup(
         "Topic :: Scientific/Engineering :: Atmospheric Science",
         "Topic :: Utilities",
     ],
-    python_requires=">=2.7",
+    python_requires=">=3.6",
     entry_points="""
         [console_scripts]
         iconform=pyconform.cli.iconform:main
@@ -434,6 +434,73 @@ class DataFlowTests(unittest.TestCase):
         print_test_message(testname, actual=actual, expected=expected)
         self.assertEqual(actual, expected, "{} failed".format(testname))
 
+    def test_plan(self):
+        testname = "DataFlow().plan"
+        df = dataflow.DataFlow(self.inpds, self.outds)
+        actual = sorted(df.plan.filesizes)
+        expected = sorted(
+            vdict["file"]["filename"]
+            for vdict in self.dsdict.values()
+            if "file" in vdict
+        )
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_execute_plan_files(self):
+        testname = "DataFlow(plan=..., files=...).execute()"
+        plan = datasets.OutputDatasetDesc("outds", self.dsdict)
+        plan = dataflow.DataFlow(self.inpds, plan).plan
+        files = [
+            self.dsdict["V2"]["file"]["filename"],
+            self.dsdict["V5"]["file"]["filename"],
+        ]
+        df = dataflow.DataFlow(self.inpds, self.outds, plan=plan, files=files)
+        df.execute()
+        actual = sorted(f for f in self.outfiles.values() if exists(f))
+        expected = sorted([self.outfiles["V2"], self.outfiles["V5"]])
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+        actual = sorted(v for v in df._valnodes if v.startswith("V"))
+        expected = ["V2", "V5"]
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_files_without_plan(self):
+        testname = "DataFlow(files=...)"
+        expected = ValueError
+        print_test_message(testname, expected=expected)
+        self.assertRaises(
+            expected,
+            dataflow.DataFlow,
+            self.inpds,
+            self.outds,
+            files=[self.dsdict["V2"]["file"]["filename"]],
+        )
+
+    def test_execute_resume(self):
+        testname = "DataFlow().execute(resume=True)"
+        dataflow.DataFlow(self.inpds, self.outds).execute(resume=True)
+        self.dsdict["V3"]["attributes"]["units"] = "m"
+        outds = datasets.OutputDatasetDesc("outds", self.dsdict)
+        df = dataflow.DataFlow(self.inpds, outds)
+        actual = sorted(df.complete_files())
+        expected = sorted(
+            vdict["file"]["filename"]
+            for vname, vdict in self.dsdict.items()
+            if "file" in vdict and vname != "V3"
+        )
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_complete_files_unsigned(self):
+        testname = "DataFlow().complete_files()"
+        dataflow.DataFlow(self.inpds, self.outds).execute()
+        df = dataflow.DataFlow(self.inpds, self.outds)
+        actual = df.complete_files()
+        expected = []
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
     def test_execute_all(self):
         testname = "DataFlow().execute()"
         df = dataflow.DataFlow(self.inpds, self.outds)
@@ -474,6 +541,64 @@ class DataFlowTests(unittest.TestCase):
             expected, df.execute, chunks=OrderedDict([("x", 4), ("y", 3)])
         )
 
+    def test_execute_prefetch(self):
+        testname = "DataFlow().execute(prefetch=2)"
+        chunks = OrderedDict([("t", 2), ("y", 3)])
+        dataflow.DataFlow(self.inpds, self.outds).execute(chunks=chunks)
+        expected = {}
+        for f in self.outfiles.values():
+            with NCDataset(f) as ncf:
+                expected[f] = {v: ncf.variables[v][...] for v in ncf.variables}
+        dataflow.DataFlow(self.inpds, self.outds).execute(chunks=chunks, prefetch=2)
+        actual = {}
+        for f in self.outfiles.values():
+            with NCDataset(f) as ncf:
+                actual[f] = {v: ncf.variables[v][...] for v in ncf.variables}
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(sorted(actual), sorted(expected), "{} failed".format(testname))
+        for f in expected:
+            self.assertEqual(sorted(actual[f]), sorted(expected[f]))
+            for v in expected[f]:
+                numpy.testing.assert_array_equal(actual[f][v], expected[f][v])
+
+    def test_execute_fanout(self):
+        testname = "DataFlow().execute(fanout=3)"
+        chunks = OrderedDict([("t", 2)])
+        dataflow.DataFlow(self.inpds, self.outds).execute(chunks=chunks)
+        expected = {}
+        for f in self.outfiles.values():
+            with NCDataset(f) as ncf:
+                expected[f] = {v: ncf.variables[v][...] for v in ncf.variables}
+        self.cleanOutputFiles()
+        outds = datasets.OutputDatasetDesc("outds", self.dsdict)
+        dataflow.DataFlow(self.inpds, outds).execute(
+            chunks=chunks, prefetch=2, fanout=3
+        )
+        actual = {}
+        for f in self.outfiles.values():
+            with NCDataset(f) as ncf:
+                actual[f] = {v: ncf.variables[v][...] for v in ncf.variables}
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(sorted(actual), sorted(expected), "{} failed".format(testname))
+        for f in expected:
+            self.assertEqual(sorted(actual[f]), sorted(expected[f]))
+            for v in expected[f]:
+                numpy.testing.assert_array_equal(actual[f][v], expected[f][v])
+
+    def test_execute_fanout_invalid(self):
+        testname = "DataFlow().execute(fanout=-1)"
+        df = dataflow.DataFlow(self.inpds, self.outds)
+        expected = ValueError
+        print_test_message(testname, expected=expected)
+        self.assertRaises(expected, df.execute, fanout=-1)
+
+    def test_execute_prefetch_invalid(self):
+        testname = "DataFlow().execute(prefetch=-1)"
+        df = dataflow.DataFlow(self.inpds, self.outds)
+        expected = ValueError
+        print_test_message(testname, expected=expected)
+        self.assertRaises(expected, df.execute, prefetch=-1)
+
     def test_execute_chunks_2D_t_y(self):
         testname = "DataFlow().execute()"
         df = dataflow.DataFlow(self.inpds, self.outds)
@@ -485,3 +610,103 @@ class DataFlowTests(unittest.TestCase):
         for f in self.outfiles:
             print_ncfile(self.outfiles[f])
             print
+
+
+class GroupFilesTests(unittest.TestCase):
+    """
+    Unit tests for the dataflow.group_files function
+    """
+
+    def plan(self, files, ntime=4):
+        """A plan of output files, each reading the given (input, bytes) pairs"""
+        filedims = {}
+        fileinputs = {}
+        for fname, inputs in files.items():
+            filedims[fname] = {"t": ntime, "x": 2}
+            fileinputs[fname] = {
+                ("in.nc", label): (nbytes, {"time": ntime, "x": 2})
+                for label, nbytes in inputs
+            }
+        filesizes = {fname: 1 for fname in files}
+        o2imap = {"t": "time", "x": "x"}
+        i2omap = {"time": "t", "x": "x"}
+        return dataflow.DataFlowPlan(
+            i2omap, o2imap, set(), filesizes, filedims, fileinputs
+        )
+
+    def test_no_fanout(self):
+        plan = self.plan(OrderedDict([("a", [("A", 8)]), ("b", [("A", 8)])]))
+        actual = dataflow.group_files([plan], chunks={"t": 1})
+        expected = [["a"], ["b"]]
+        print_test_message("group_files()", actual=actual, expected=expected)
+        self.assertEqual(actual, expected)
+
+    def test_unrelated_inputs(self):
+        files = OrderedDict(
+            [("a", [("A", 8)]), ("b", [("B", 8)]), ("c", [("A", 8)]), ("d", [("C", 8)])]
+        )
+        actual = dataflow.group_files([self.plan(files)], chunks={"t": 1}, fanout=3)
+        expected = [["a", "c"], ["b"], ["d"]]
+        print_test_message("group_files(fanout=3)", actual=actual, expected=expected)
+        self.assertEqual(actual, expected)
+
+    def test_time_ranges(self):
+        files = OrderedDict(
+            [("a", [("TS[0:2]", 8)]), ("b", [("TS[2:4]", 8)]), ("c", [("TS[0:2]", 8)])]
+        )
+        actual = dataflow.group_files([self.plan(files)], chunks={"t": 1}, fanout=3)
+        expected = [["a", "c"], ["b"]]
+        print_test_message(
+            "group_files() time ranges", actual=actual, expected=expected
+        )
+        self.assertEqual(actual, expected)
+
+    def test_chunking(self):
+        plan1 = self.plan(OrderedDict([("a", [("A", 8)])]), ntime=4)
+        plan2 = self.plan(OrderedDict([("b", [("A", 8)])]), ntime=6)
+        actual = dataflow.group_files([plan1, plan2], chunks={"t": 1}, fanout=2)
+        expected = [["a"], ["b"]]
+        print_test_message("group_files() chunking", actual=actual, expected=expected)
+        self.assertEqual(actual, expected)
+
+    def test_most_shared(self):
+        files = OrderedDict(
+            [
+                ("a", [("A", 8), ("B", 8)]),
+                ("b", [("A", 8)]),
+                ("c", [("A", 8), ("B", 8)]),
+            ]
+        )
+        actual = dataflow.group_files([self.plan(files)], chunks={"t": 1}, fanout=2)
+        expected = [["a", "c"], ["b"]]
+        print_test_message(
+            "group_files() most shared", actual=actual, expected=expected
+        )
+        self.assertEqual(actual, expected)
+
+    def test_plans(self):
+        files1 = OrderedDict(("a{}".format(i), [("TS", 8)]) for i in range(8))
+        files2 = OrderedDict(("b{}".format(i), [("TS", 8)]) for i in range(7))
+        files2["c"] = [("PS", 8)]
+        plans = [self.plan(files1), self.plan(files2)]
+        actual = dataflow.group_files(plans, chunks={"t": 1}, fanout=6)
+        expected = [
+            ["a{}".format(i) for i in range(6)],
+            ["a6", "a7"] + ["b{}".format(i) for i in range(4)],
+            ["b4", "b5", "b6"],
+            ["c"],
+        ]
+        print_test_message("group_files() plans", actual=actual, expected=expected)
+        self.assertEqual(actual, expected)
+
+    def test_memory(self):
+        # Each file reads 2 + 2 bytes per time step, of which 2 are shared
+        files = OrderedDict(
+            ("a{}".format(i), [("TS", 8), ("V{}".format(i), 8)]) for i in range(4)
+        )
+        actual = dataflow.group_files(
+            [self.plan(files)], chunks={"t": 1}, fanout=4, memory=6
+        )
+        expected = [["a0", "a1"], ["a2", "a3"]]
+        print_test_message("group_files() memory", actual=actual, expected=expected)
+        self.assertEqual(actual, expected)
@@ -571,6 +571,34 @@ class VariableDescTests(unittest.TestCase):
             actual, expected, "Default VariableDesc.cfunits() not {}".format(expected)
         )
 
+    def test_storage_default(self):
+        vdesc = VariableDesc("x")
+        actual = (vdesc.chunksizes, vdesc.contiguous, vdesc.shuffle, vdesc.endian)
+        expected = (None, None, None, None)
+        print_test_message(
+            "VariableDesc storage defaults", actual=actual, expected=expected
+        )
+        self.assertEqual(actual, expected, "Default VariableDesc storage not None")
+
+    def test_storage(self):
+        vdims = (DimensionDesc("t"), DimensionDesc("x"))
+        vdesc = VariableDesc(
+            "v", dimensions=vdims, chunksizes=[12, 4], shuffle=False, endian="little"
+        )
+        actual = (vdesc.chunksizes, vdesc.contiguous, vdesc.shuffle, vdesc.endian)
+        expected = ([12, 4], None, False, "little")
+        print_test_message("VariableDesc storage", actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "VariableDesc storage not set")
+
+    def test_storage_chunksizes_mismatch(self):
+        vdims = (DimensionDesc("t"), DimensionDesc("x"))
+        with self.assertRaises(ValueError):
+            VariableDesc("v", dimensions=vdims, chunksizes=[12])
+
+    def test_storage_endian_invalid(self):
+        with self.assertRaises(ValueError):
+            VariableDesc("v", endian="middle")
+
     def test_unique_empty(self):
         indata = []
         actual = VariableDesc.unique(indata)
@@ -826,6 +854,30 @@ class FileDescTests(unittest.TestCase):
         )
         self.assertEqual(actual, expected, "FileDesc.dimensions failed")
 
+    def test_storage_default(self):
+        fdesc = FileDesc("test.nc")
+        actual = (fdesc.chunksizes, fdesc.contiguous, fdesc.shuffle, fdesc.endian)
+        expected = (None, False, True, "native")
+        print_test_message(
+            "FileDesc storage defaults", actual=actual, expected=expected
+        )
+        self.assertEqual(actual, expected, "FileDesc storage defaults failed")
+
+    def test_storage_chunksizes_auto(self):
+        fdesc = FileDesc("test.nc", chunksizes="auto")
+        actual = fdesc.chunksizes
+        expected = "auto"
+        print_test_message("FileDesc.chunksizes", actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "FileDesc.chunksizes failed")
+
+    def test_storage_chunksizes_list(self):
+        with self.assertRaises(TypeError):
+            FileDesc("test.nc", chunksizes=[1, 2])
+
+    def test_storage_chunksizes_negative(self):
+        with self.assertRaises(ValueError):
+            FileDesc("test.nc", chunksizes={"x": -1})
+
 
 class DatasetDescTests(unittest.TestCase):
     """
@@ -1082,6 +1134,57 @@ class DatasetDescTests(unittest.TestCase):
         )
         self.assertEqual(actual, expected, "OutputDatasetDesc has wrong dimensions")
 
+    def test_output_dataset_storage(self):
+        self.dsdict["V1"]["chunksizes"] = "auto"
+        self.dsdict["V1"]["file"]["shuffle"] = False
+        self.dsdict["V1"]["file"]["chunksizes"] = {"t": 1}
+        outds = OutputDatasetDesc("myoutds", self.dsdict)
+        fdesc = outds.files["var1.nc"]
+        actual = (
+            outds.variables["V1"].chunksizes,
+            fdesc.chunksizes,
+            fdesc.shuffle,
+            outds.files["var2.nc"].shuffle,
+        )
+        expected = ("auto", {"t": 1}, False, True)
+        print_test_message(
+            "OutputDatasetDesc storage settings", actual=actual, expected=expected
+        )
+        self.assertEqual(actual, expected, "OutputDatasetDesc storage failed")
+
+    def test_output_dataset_shared_dimensions(self):
+        outds = OutputDatasetDesc("myoutds", self.dsdict)
+        f1 = outds.files["var1.nc"]
+        f2 = outds.files["var2.nc"]
+        actual = all(
+            f1.dimensions[d] is f2.dimensions[d] is outds.dimensions[d]
+            for d in ("t", "x", "y")
+        )
+        print_test_message(
+            "OutputDatasetDesc shared dimensions", actual=actual, expected=True
+        )
+        self.assertTrue(actual, "OutputDatasetDesc dimensions not shared")
+
+    def test_output_dataset_many_variables(self):
+        for i in range(2000):
+            vdict = OrderedDict()
+            vdict["datatype"] = "float"
+            vdict["dimensions"] = ("t", "y", "x")
+            vdict["definition"] = "u1"
+            vdict["file"] = OrderedDict()
+            vdict["file"]["filename"] = "many{}.nc".format(i)
+            vdict["file"]["attributes"] = {"variable_id": "M{}".format(i)}
+            vdict["file"]["metavars"] = ["Y"]
+            self.dsdict["M{}".format(i)] = vdict
+        outds = OutputDatasetDesc("myoutds", self.dsdict)
+        fdesc = outds.files["many1999.nc"]
+        actual = (len(outds.files), sorted(fdesc.variables), fdesc.attributes)
+        expected = (2002, ["M1999", "T", "X", "Y"], {"variable_id": "M1999"})
+        print_test_message(
+            "OutputDatasetDesc with many variables", actual=actual, expected=expected
+        )
+        self.assertEqual(actual, expected, "OutputDatasetDesc has wrong files")
+
     def test_output_dataset_validate_type_str(self):
         nc3_type_strs = OutputDatasetDesc._NC_TYPES_[3]
         nc4_type_strs = [
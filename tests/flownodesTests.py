@@ -202,6 +202,18 @@ class ReadNodeTests(BaseTests):
         if exists(self.filename):
             remove(self.filename)
 
+    def test_init_without_reading(self):
+        with netCDF4.Dataset(self.filename) as ncfile:
+            expected = ncfile.variables[self.varname]._varid
+        # The storage layout comes from the descriptor, so the file is not opened
+        with open(self.filename, "w") as fobj:
+            fobj.write("not a NetCDF file")
+        testname = "ReadNode.__init__() varid"
+        N = ReadNode(self.vardesc)
+        actual = N.varid
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
     def test_getitem_all(self):
         testname = "ReadNode.__getitem__(:)"
         N = ReadNode(self.vardesc)
@@ -1018,6 +1030,25 @@ class WriteNodeTests(BaseTests):
         self.assertEqual(actual, expected, "{} failed".format(testname))
         print_ncfile(newfname)
 
+    def test_execute_simple_autoparse_deferred(self):
+        filename = "v.{%Y%m%d-%Y%m%d}.nc"
+        testname = "WriteNode({}).label".format(filename)
+        filedesc = FileDesc(
+            filename,
+            variables=tuple(self.vardescs.values()),
+            attributes={"ga": "global attribute"},
+        )
+        N = WriteNode(filedesc, inputs=tuple(self.nodes.values()))
+        actual = N.label
+        expected = filename
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+        N.execute()
+        actual = N.label
+        expected = "v.20000101-20000104.nc"
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
     def test_execute_simple_autoparse_fail(self):
         filename = "v.{%Y%m%d-%Y%m%d}.nc"
         vdescs = {n: self.vardescs[n] for n in self.vardescs if n != "T"}
@@ -1140,3 +1171,185 @@ class WriteNodeTests(BaseTests):
         print_test_message(testname, actual=actual, expected=expected, chunks=chunks)
         self.assertEqual(actual, expected, "{} failed".format(testname))
         print_ncfile(filename)
+
+    def test_auto_chunksizes_small(self):
+        dsizes = OrderedDict([("t", 4), ("y", 3), ("x", 2)])
+        testname = "WriteNode._auto_chunksizes_({}, 8)".format(dsizes)
+        actual = WriteNode._auto_chunksizes_(dsizes, 8)
+        expected = [4, 3, 2]
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_auto_chunksizes_balanced(self):
+        dsizes = OrderedDict([("t", 1200), ("y", 192), ("x", 288)])
+        testname = "WriteNode._auto_chunksizes_({}, 4)".format(dsizes)
+        actual = WriteNode._auto_chunksizes_(dsizes, 4)
+        expected = [189, 30, 45]
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+        self.assertLessEqual(
+            numpy.prod(actual) * 4, WriteNode._AUTO_CHUNK_BYTES_, testname
+        )
+
+    def test_auto_chunksizes_fixed(self):
+        dsizes = OrderedDict([("t", 1000000), ("s", 64)])
+        testname = "WriteNode._auto_chunksizes_({}, 1, fixed=s)".format(dsizes)
+        actual = WriteNode._auto_chunksizes_(dsizes, 1, fixed=("s",))
+        expected = [16384, 64]
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_execute_storage(self):
+        filename = "v_x_y_storage.nc"
+        testname = "WriteNode({}).execute() with storage settings".format(filename)
+        vdescs = dict(self.vardescs)
+        vdescs["V"] = VariableDesc(
+            "V",
+            datatype=self.data["V"].dtype,
+            attributes=self.atts["V"],
+            dimensions=tuple(self.vardescs["V"].dimensions.values()),
+            chunksizes=[1, 2, 4],
+            shuffle=False,
+        )
+        nodes = dict(self.nodes)
+        nodes["V"] = ValidateNode(vdescs["V"], DataNode(self.data["V"]))
+        filedesc = FileDesc(
+            filename,
+            format="NETCDF4",
+            deflate=0,
+            contiguous=True,
+            endian="big",
+            variables=tuple(vdescs.values()),
+        )
+        N = WriteNode(filedesc, inputs=tuple(nodes.values()))
+        N.execute()
+        with netCDF4.Dataset(filename) as ncf:
+            actual = {v: ncf.variables[v].chunking() for v in ("X", "V")}
+            endian = ncf.variables["X"].endian()
+            filters = ncf.variables["V"].filters()
+        expected = {"X": "contiguous", "V": [1, 2, 4]}
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+        self.assertEqual(endian, "big", "{} failed - endian".format(testname))
+        self.assertFalse(filters["shuffle"], "{} failed - shuffle".format(testname))
+
+    def test_execute_storage_contiguous_compressed(self):
+        filename = "v_x_y_storage_fail.nc"
+        vdescs = dict(self.vardescs)
+        vdescs["V"] = VariableDesc(
+            "V",
+            datatype=self.data["V"].dtype,
+            attributes=self.atts["V"],
+            dimensions=tuple(self.vardescs["V"].dimensions.values()),
+            contiguous=True,
+        )
+        nodes = dict(self.nodes)
+        nodes["V"] = ValidateNode(vdescs["V"], DataNode(self.data["V"]))
+        filedesc = FileDesc(filename, deflate=1, variables=tuple(vdescs.values()))
+        N = WriteNode(filedesc, inputs=tuple(nodes.values()))
+        with self.assertRaises(ValueError):
+            N.execute()
+
+    def test_execute_write_stats(self):
+        filename = "v_x_y_stats.nc"
+        testname = "WriteNode({}).write_stats".format(filename)
+        filedesc = FileDesc(filename, variables=tuple(self.vardescs.values()))
+        N = WriteNode(filedesc, inputs=tuple(self.nodes.values()))
+        N.execute(chunks={"t": 2})
+        actual = {v: s["bytes"] for v, s in N.write_stats.items()}
+        expected = {v: self.data[v].nbytes for v in self.data if v[0] != "_"}
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+        for vstats in N.write_stats.values():
+            self.assertGreaterEqual(vstats["seconds"], 0.0)
+
+    def test_storage_sizes_missing_variable(self):
+        filename = "v_x_y_sizes.nc"
+        testname = "WriteNode({})._storage_sizes_() missing variable".format(filename)
+        filedesc = FileDesc(
+            filename, format="NETCDF4", variables=tuple(self.vardescs.values())
+        )
+        N = WriteNode(filedesc, inputs=tuple(self.nodes.values()))
+        N.execute()
+        with netCDF4.Dataset(filename, "a") as ncf:
+            ncf.renameVariable("V", "W")
+        with self.assertWarns(RuntimeWarning):
+            actual = N._storage_sizes_()
+        print_test_message(testname, actual=actual)
+        self.assertIsNone(actual["V"], "{} failed".format(testname))
+        self.assertGreater(actual["X"], 0, "{} failed".format(testname))
+
+    def test_chunks_cover_full(self):
+        shape = (4, 5)
+        dsizes = OrderedDict([("x", 4), ("y", 5)])
+        chunks = [
+            tuple(c.values())
+            for c in WriteNode._chunk_iter_(dsizes, chunks={"x": 3, "y": 2})
+        ]
+        testname = "WriteNode._chunks_cover_({}, {})".format(shape, chunks)
+        actual = WriteNode._chunks_cover_(shape, chunks)
+        expected = True
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_chunks_cover_gap(self):
+        shape = (4, 5)
+        chunks = [(slice(0, 2), slice(0, None)), (slice(3, None), slice(0, None))]
+        testname = "WriteNode._chunks_cover_({}, {})".format(shape, chunks)
+        actual = WriteNode._chunks_cover_(shape, chunks)
+        expected = False
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_chunks_cover_missing_corner(self):
+        shape = (4, 5)
+        chunks = [
+            (slice(0, 2), slice(0, 3)),
+            (slice(2, None), slice(0, 3)),
+            (slice(0, 2), slice(3, None)),
+        ]
+        testname = "WriteNode._chunks_cover_({}, {})".format(shape, chunks)
+        actual = WriteNode._chunks_cover_(shape, chunks)
+        expected = False
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_chunks_cover_scalar(self):
+        testname = "WriteNode._chunks_cover_((), [()])"
+        actual = WriteNode._chunks_cover_((), [()])
+        expected = True
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_execute_chunk_debug(self):
+        filename = "v_x_y_chunk_debug.nc"
+        chunks = {"x": 1, "t": 3}
+        testname = "WriteNode({}).execute(chunks={}, debug=True)".format(
+            filename, chunks
+        )
+        filedesc = FileDesc(filename, variables=tuple(self.vardescs.values()))
+        N = WriteNode(filedesc, inputs=tuple(self.nodes.values()))
+        N.execute(chunks=chunks, debug=True)
+        with netCDF4.Dataset(filename) as ncf:
+            actual = numpy.asarray(ncf.variables["V"][:])
+        expected = numpy.asarray(self.data["V"])[:, ::-1, :]
+        print_test_message(testname, actual=actual, expected=expected)
+        numpy.testing.assert_array_equal(actual, expected, "{} failed".format(testname))
+
+    def test_finish_debug_unwritten_unlimited(self):
+        filename = "t_unlimited_debug.nc"
+        testname = "WriteNode({})._finish_(debug=True) unwritten".format(filename)
+        tdim = DimensionDesc("t", 4, unlimited=True)
+        vdesc = VariableDesc(
+            "T",
+            datatype=self.data["T"].dtype,
+            attributes=self.atts["T"],
+            dimensions=(tdim,),
+        )
+        filedesc = FileDesc(filename, variables=(vdesc,))
+        N = WriteNode(filedesc, inputs=(ValidateNode(vdesc, DataNode(self.data["T"])),))
+        wchunks = N._start_(chunks={"t": 2})
+        N._write_chunk_(*wchunks[0])
+        print_test_message(testname, wchunks=wchunks)
+        with self.assertRaises(RuntimeError):
+            N._finish_(debug=True)
@@ -5,13 +5,19 @@ Copyright 2017-2020, University Corporation for Atmospheric Research
 LICENSE: See the LICENSE.rst file for details
 """
 
+import ast
+import gc
 import operator as op
+import os
+import shutil
+import sys
+import tempfile
 import unittest
 
 import numpy as np
 from cf_units import Unit
 
-from pyconform import functions
+from pyconform import functions, modules
 from pyconform.physarray import PhysArray
 
 from .testutils import print_test_message
@@ -164,6 +170,82 @@ class FindTests(unittest.TestCase):
         print_test_message(testname, key=key, actual=actual, expected=expected)
         self.assertEqual(actual, expected, "{} failed".format(testname))
 
+    def test_function_plugin(self):
+        key = "myplugin"
+        tmpdir = tempfile.mkdtemp()
+        with open(os.path.join(tmpdir, "mypluginmodule.py"), "w") as f:
+            f.write("from pyconform.functions import Function\n\n\n")
+            f.write("class MyPluginFunction(Function):\n    key = {!r}\n".format(key))
+        sys.path.insert(0, tmpdir)
+        functions.list_plugins()[key] = "mypluginmodule"
+        try:
+            self.assertIn(key, functions.list_functions())
+            testname = "find_function({!r})".format(key)
+            actual = functions.find_function(key).__name__
+            expected = "MyPluginFunction"
+            print_test_message(testname, key=key, actual=actual, expected=expected)
+            self.assertEqual(actual, expected, "{} failed".format(testname))
+        finally:
+            del functions.list_plugins()[key]
+            sys.path.remove(tmpdir)
+            sys.modules.pop("mypluginmodule", None)
+            shutil.rmtree(tmpdir)
+            gc.collect()
+        self.assertNotIn(key, functions.list_functions())
+
+    def test_function_plugin_precedence(self):
+        tmpdir = tempfile.mkdtemp()
+        with open(os.path.join(tmpdir, "mylazymodule.py"), "w") as f:
+            f.write("from pyconform.functions import Function\n\n\n")
+            f.write("class MyLazyFunction(Function):\n    key = 'mylazy'\n\n\n")
+            f.write("class MyLazySharedFunction(Function):\n    key = 'myshared'\n")
+        with open(os.path.join(tmpdir, "myexplicitmodule.py"), "w") as f:
+            f.write("from pyconform.functions import Function\n\n\n")
+            f.write("class MyExplicitSharedFunction(Function):\n    key = 'myshared'\n")
+        sys.path.insert(0, tmpdir)
+        functions.list_plugins()["mylazy"] = "mylazymodule"
+        functions.list_plugins()["myshared"] = "mylazymodule"
+        try:
+            __import__("myexplicitmodule")
+            expected = "MyExplicitSharedFunction"
+            actual = [functions.find_function("myshared").__name__]
+            functions.find_function("mylazy")
+            actual.append(functions.find_function("myshared").__name__)
+            testname = "find_function('myshared') before and after loading 'mylazy'"
+            print_test_message(testname, actual=actual, expected=expected)
+            self.assertEqual(actual, [expected, expected], "{} failed".format(testname))
+        finally:
+            del functions.list_plugins()["mylazy"]
+            del functions.list_plugins()["myshared"]
+            functions._loaded_plugins.discard("mylazymodule")
+            sys.path.remove(tmpdir)
+            sys.modules.pop("mylazymodule", None)
+            sys.modules.pop("myexplicitmodule", None)
+            shutil.rmtree(tmpdir)
+            gc.collect()
+
+    def test_plugin_manifest(self):
+        moddir = os.path.dirname(modules.__file__)
+        for module, keys in modules.FUNCTIONS.items():
+            with open(os.path.join(moddir, module + ".py")) as f:
+                classes = [
+                    n for n in ast.parse(f.read()).body if isinstance(n, ast.ClassDef)
+                ]
+            bases = set(
+                b.id for c in classes for b in c.bases if isinstance(b, ast.Name)
+            )
+            expected = [
+                a.value.value
+                for c in classes
+                if c.name not in bases
+                for a in c.body
+                if isinstance(a, ast.Assign) and [t.id for t in a.targets] == ["key"]
+            ]
+            testname = "FUNCTIONS[{!r}]".format(module)
+            actual = list(keys)
+            print_test_message(testname, actual=actual, expected=expected)
+            self.assertEqual(actual, expected, "{} failed".format(testname))
+
     def test_list_operators(self):
         testname = "list_operators()"
         actual = functions.list_operators()
@@ -188,6 +270,7 @@ class FindTests(unittest.TestCase):
                 "sum",
                 "up",
             ]
+            + list(functions.list_plugins())
         )
         print_test_message(testname, actual=actual, expected=expected)
         self.assertEqual(actual, expected, "{} failed".format(testname))
@@ -6,10 +6,12 @@ LICENSE: See the LICENSE.rst file for details
 """
 
 import unittest
+from threading import Thread
 
 import numpy as np
 
 from pyconform import mapdates
+from pyconform.locking import NETCDF_LOCK
 
 from .makeTestData import DataMaker
 
@@ -198,3 +200,78 @@ class dateMapTests(unittest.TestCase):
         self.assertTrue(counts == [3, 3, 3], "get_files_in_order, counts".format())
         self.assertTrue(error == 0, "get_files_in_order, error".format())
         dm.clear()
+
+    def test_get_time_index(self):
+
+        # Create some data that is not contiguous
+        a = np.asarray([1, 2, 3])
+        b = np.asarray([7, 8, 9])
+        c = np.asarray([4, 5, 6])
+        t = {"time": [3, 3, 3], "space": 2}
+        dm = DataMaker(dimensions=t, vardata={"time": [a, b, c]}, filenames=files)
+        dm.write()
+
+        # Call get_time_index and evaluate the index
+        tindex = mapdates.get_time_index(files)
+        self.assertEqual(tindex.files, ["test1.nc", "test3.nc", "test2.nc"])
+        self.assertEqual(tindex.counts, [3, 3, 3])
+        self.assertEqual(tindex.error, 0)
+        self.assertEqual(len(tindex), 9)
+        self.assertEqual(list(tindex.offsets), [0, 3, 6])
+        self.assertEqual(tindex.locate(4), ("test3.nc", 1))
+        self.assertEqual(tindex.locate(-1), ("test2.nc", 2))
+        self.assertRaises(IndexError, tindex.locate, 9)
+        self.assertEqual(tindex.file_slice("test2.nc"), slice(6, 9))
+        self.assertRaises(KeyError, tindex.file_slice, "test4.nc")
+        np.testing.assert_array_equal(np.diff(tindex.times), np.ones(8))
+        self.assertEqual(tindex.dates[0].timetuple()[:3], (1979, 1, 2))
+        dm.clear()
+
+    def test_get_time_index_serial(self):
+
+        # Create some data that should be contiguous
+        t = {"time": [3, 3, 3], "space": 2}
+        dm = DataMaker(dimensions=t, filenames=files)
+        dm.write()
+
+        # Reading the headers in serial or with threads should give the same index
+        serial = mapdates.get_time_index(files, nthreads=1)
+        threaded = mapdates.get_time_index(files, nthreads=3)
+        self.assertEqual(serial.files, threaded.files)
+        self.assertEqual(serial.counts, threaded.counts)
+        self.assertEqual(serial.error, threaded.error)
+        np.testing.assert_array_equal(serial.times, threaded.times)
+        dm.clear()
+
+    def test_get_time_index_decode_unlocked(self):
+
+        # Create some data that should be contiguous
+        t = {"time": [3, 3, 3], "space": 2}
+        dm = DataMaker(dimensions=t, filenames=files)
+        dm.write()
+
+        # The NetCDF lock must be free for other threads while the dates are decoded
+        free = []
+
+        def try_lock():
+            if NETCDF_LOCK.acquire(blocking=False):
+                NETCDF_LOCK.release()
+                free.append(True)
+            else:
+                free.append(False)
+
+        def decode(*args):
+            thread = Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            return decode_(*args)
+
+        decode_ = mapdates.__decode__
+        mapdates.__decode__ = decode
+        try:
+            mapdates.get_time_index(files, nthreads=1)
+        finally:
+            mapdates.__decode__ = decode_
+            dm.clear()
+        self.assertGreater(len(free), 0)
+        self.assertTrue(all(free))
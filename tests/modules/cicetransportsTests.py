@@ -0,0 +1,79 @@
+"""
+CICE Passage Transports Unit Tests
+
+The expected values are computed with a point-by-point loop over the transects.
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import unittest
+
+import numpy as np
+
+import pyconform.modules.cicetransports as ct
+
+
+def transports_loop(aice, uvel, vvel, HTE, HTN):
+    uvel = np.where(uvel >= 1e16, 0.0, uvel)
+    vvel = np.where(vvel >= 1e16, 0.0, vvel)
+    a = np.zeros((aice.shape[0], 4))
+    for t in range(aice.shape[0]):
+        for p, js, is_, east, north in ct.TRANSECTS:
+            for j in np.atleast_1d(js):
+                for i in np.atleast_1d(is_):
+                    if aice[t, j, i] >= 1e16:
+                        continue
+                    if east and aice[t, j, i + 1] >= 1e16:
+                        continue
+                    if north and aice[t, j + 1, i] >= 1e16:
+                        continue
+                    u = (
+                        0.5
+                        * (aice[t, j, i] + aice[t, j, i + 1])
+                        * 0.5
+                        * (HTE[j, i] * uvel[t, j, i] + HTE[j, i] * uvel[t, j - 1, i])
+                    )
+                    v = (
+                        0.5
+                        * (aice[t, j, i] + aice[t, j + 1, i])
+                        * 0.5
+                        * (HTN[j, i] * vvel[t, j, i] + HTN[j, i] * vvel[t, j, i - 1])
+                    )
+                    if east and north:
+                        a[t, p] += u + v
+                    elif east:
+                        a[t, p] += u
+                    else:
+                        a[t, p] += v
+    return a
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        shape = (3, 384, 320)
+        self.aice = rng.rand(*shape).astype("f")
+        self.uvel = (rng.rand(*shape) - 0.5).astype("f")
+        self.vvel = (rng.rand(*shape) - 0.5).astype("f")
+        self.uvel[0, 369, 92] = 1e30
+        self.vvel[1, 333, 199] = 1e30
+        self.HTE = rng.rand(*shape[1:]).astype("f") * 1e6
+        self.HTN = rng.rand(*shape[1:]).astype("f") * 1e6
+
+    def test_transports(self):
+        actual = ct.transports(self.aice, self.uvel, self.vvel, self.HTE, self.HTN)
+        expected = transports_loop(self.aice, self.uvel, self.vvel, self.HTE, self.HTN)
+        np.testing.assert_allclose(actual, expected, rtol=1e-13)
+
+    def test_transports_missing(self):
+        self.aice[0, 375, 215] = 1e30
+        self.aice[2, 334, 200] = 1e30
+        self.aice[2, 351, 85] = 1e30
+        actual = ct.transports(self.aice, self.uvel, self.vvel, self.HTE, self.HTN)
+        expected = transports_loop(self.aice, self.uvel, self.vvel, self.HTE, self.HTN)
+        np.testing.assert_allclose(actual, expected, rtol=1e-13)
+
+    def test_transect_points(self):
+        self.assertEqual(len(ct._J_), 11 + 2 + 4 + 22 + 3)
+        np.testing.assert_array_equal(ct._WEIGHTS_.sum(axis=0), [11, 6, 22, 3])
@@ -0,0 +1,192 @@
+"""
+CLM Sparse Maps Unit Tests
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import shutil
+import unittest
+from functools import partial
+from os import listdir, mkdir
+from os.path import exists, join
+
+import numpy as np
+
+import pyconform.modules.clmmaps as clmm
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        # 2x3 grid with 1D gridcells at (j,i) = (0,0), (0,2) and (1,1)
+        self.nlat = 2
+        self.nlon = 3
+        self.grid1d_ixy = np.array([1, 3, 2])
+        self.grid1d_jxy = np.array([1, 1, 2])
+        self.grid1d_lon = np.array([0.0, 240.0, 120.0])
+        self.grid1d_lat = np.array([-45.0, -45.0, 45.0])
+
+        # Landunits: veg, crop and two urban in gridcell 0, veg in gridcell 2
+        self.land1d_lon = np.array([0.0, 0.0, 0.0, 0.0, 120.0])
+        self.land1d_lat = np.array([-45.0, -45.0, -45.0, -45.0, 45.0])
+        self.land1d_ityplunit = np.array([1, 2, 7, 8, 1])
+        self.land1d_active = np.array([1, 1, 1, 1, 1])
+        self.land1d_wtgcell = np.array([0.5, 0.2, 0.1, 0.3, 1.0])
+
+        # PFTs: two grass and one tree in gridcell 0, one grass in gridcell 1 (no veg landunit)
+        # and one inactive grass in gridcell 2
+        self.pfts1d_lon = np.array([0.0, 0.0, 0.0, 240.0, 120.0])
+        self.pfts1d_lat = np.array([-45.0, -45.0, -45.0, -45.0, 45.0])
+        self.pfts1d_active = np.array([1, 1, 1, 1, 0])
+        self.pfts1d_itype_veg = np.array([12, 13, 4, 12, 12])
+        self.pfts1d_wtgcell = np.array([0.1, 0.3, 0.1, 1.0, 1.0])
+        self.pfts1d_wtlunit = np.array([0.25, 0.75, 1.0, 1.0, 1.0])
+
+        self.vegtypes = {"grass": (12, 14), "tree": (1, 8)}
+        clmm.clear_cache()
+
+    def pft_maps(self):
+        return clmm.pft_vegtype_maps(
+            self.vegtypes,
+            self.nlat,
+            self.nlon,
+            self.grid1d_ixy,
+            self.grid1d_jxy,
+            self.grid1d_lon,
+            self.grid1d_lat,
+            self.land1d_lon,
+            self.land1d_lat,
+            self.land1d_ityplunit,
+            self.pfts1d_lon,
+            self.pfts1d_lat,
+            self.pfts1d_active,
+            self.pfts1d_itype_veg,
+            self.pfts1d_wtgcell,
+            self.pfts1d_wtlunit,
+        )
+
+    def test_grid_cells(self):
+        cells, gridcells = clmm.grid_cells(
+            np.array([1, 3, 2, 3, 4]), np.array([1, 1, 2, 1, 1]), self.nlat, self.nlon
+        )
+        np.testing.assert_array_equal(cells, [0, 2, 4])
+        np.testing.assert_array_equal(gridcells, [0, 1, 2])
+
+    def test_match_coords(self):
+        cells, elems = clmm.match_coords(
+            np.array([0.0, 10.0]),
+            np.array([5.0, 5.0]),
+            np.array([10.0, -0.0, 3.0, 10.0]),
+            np.array([5.0, 5.0, 5.0, 5.0]),
+        )
+        np.testing.assert_array_equal(cells, [0, 1, 1])
+        np.testing.assert_array_equal(elems, [1, 0, 3])
+
+    def test_scatter(self):
+        smap = clmm.ScatterMap((2, 2), [1, 1, 3], [0, 2, 1], [0.5, 0.5, 2.0])
+        data = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+        actual = smap.scatter(data, fill_value=-1.0)
+        expected = np.array([[[-1.0, 2.0], [-1.0, 4.0]], [[-1.0, 5.0], [-1.0, 10.0]]])
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_pft_vegtype_maps(self):
+        maps = self.pft_maps()
+        gpp = np.array([[1.0, 2.0, 3.0, 4.0, 5.0]], dtype="f4")
+        actual = maps["grass"].scatter(gpp)
+        expected = np.full((1, 2, 3), 1e20)
+        expected[0, 0, 0] = 0.25 * 1.0 + 0.75 * 2.0
+        np.testing.assert_allclose(actual, expected, rtol=1e-6)
+        actual = maps["tree"].scatter(gpp)
+        expected = np.full((1, 2, 3), 1e20)
+        expected[0, 0, 0] = 3.0
+        np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+    def test_pft_vegtype_maps_zero_weights(self):
+        self.pfts1d_wtlunit[:2] = 0.0
+        with self.assertRaisesRegex(ValueError, r"\[0\]"):
+            self.pft_maps()
+
+    def test_landunit_lut_maps(self):
+        maps = clmm.landunit_lut_maps(
+            self.nlat,
+            self.nlon,
+            self.grid1d_ixy,
+            self.grid1d_jxy,
+            self.grid1d_lon,
+            self.grid1d_lat,
+            self.land1d_lon,
+            self.land1d_lat,
+            self.land1d_ityplunit,
+            self.land1d_active,
+            self.land1d_wtgcell,
+        )
+        eflx = np.array([[1.0, 2.0, 3.0, 4.0, 5.0]], dtype="f4")
+        veg = maps["veg"].scatter(eflx)
+        self.assertEqual((veg[0, 0, 0], veg[0, 1, 1], veg[0, 0, 2]), (1.0, 5.0, 1e20))
+        crop = maps["crop"].scatter(eflx)
+        self.assertEqual((crop[0, 0, 0], crop[0, 1, 1]), (2.0, 1e20))
+        urban = maps["urban"].scatter(eflx)
+        np.testing.assert_allclose(urban[0, 0, 0], 0.25 * 3.0 + 0.75 * 4.0, rtol=1e-6)
+        self.assertEqual(urban[0, 1, 1], 1e20)
+
+    def test_cached_maps(self):
+        build = partial(clmm.pft_vegtype_maps, self.vegtypes)
+        args = (
+            self.nlat,
+            self.nlon,
+            self.grid1d_ixy,
+            self.grid1d_jxy,
+            self.grid1d_lon,
+            self.grid1d_lat,
+            self.land1d_lon,
+            self.land1d_lat,
+            self.land1d_ityplunit,
+            self.pfts1d_lon,
+            self.pfts1d_lat,
+            self.pfts1d_active,
+            self.pfts1d_itype_veg,
+            self.pfts1d_wtgcell,
+            self.pfts1d_wtlunit,
+        )
+        first = clmm.cached_maps("pft", build, *args)
+        second = clmm.cached_maps("pft", build, *[np.copy(a) for a in args])
+        self.assertIs(first, second)
+
+    def test_cached_maps_disk(self):
+        cache_dir = "clmmaps_cache"
+        if exists(cache_dir):
+            shutil.rmtree(cache_dir)
+        mkdir(cache_dir)
+        saved = clmm.CACHE_DIR
+        clmm.CACHE_DIR = cache_dir
+        try:
+            built = clmm.cached_maps("pft", lambda *args: self.pft_maps(), 1)
+            self.assertEqual(len(listdir(cache_dir)), 1)
+            clmm.clear_cache()
+            loaded = clmm.cached_maps("pft", None, 1)
+        finally:
+            clmm.CACHE_DIR = saved
+            shutil.rmtree(cache_dir)
+        self.assertEqual(sorted(loaded), sorted(built))
+        for name in built:
+            self.assertEqual(loaded[name], built[name])
+
+    def test_save_maps_replace(self):
+        cache_dir = "clmmaps_save"
+        if exists(cache_dir):
+            shutil.rmtree(cache_dir)
+        mkdir(cache_dir)
+        fname = join(cache_dir, "maps.npz")
+        try:
+            with open(fname, "w") as f:
+                f.write("partial")
+            maps = self.pft_maps()
+            clmm.save_maps(fname, maps)
+            files = listdir(cache_dir)
+            loaded = clmm.load_maps(fname)
+        finally:
+            shutil.rmtree(cache_dir)
+        self.assertEqual(files, ["maps.npz"])
+        self.assertEqual(sorted(loaded), sorted(maps))
+        for name in maps:
+            self.assertEqual(loaded[name], maps[name])
@@ -74,3 +74,28 @@ class Test(unittest.TestCase):
 
     def test_psitem(self):
         dvmd.psitem(self.time, self.levi, self.lat, self.vzm, self.vthzm, self.thzm)
+
+    def test_psieddy_cached(self):
+        dvmd.clear_cache()
+        levi100 = 100.0 * self.levi
+        first = dvmd._psieddy(levi100, self.vthzm, self.thzm)
+        second = dvmd._psieddy(levi100, self.vthzm.copy(), self.thzm.copy())
+        self.assertIs(first, second)
+        self.assertIsNot(dvmd._psieddy(levi100, self.vthzm, self.thzm + 1.0), first)
+
+    def test_time_slices(self):
+        args = (self.time, self.levi, self.lat, self.uzm, self.uvzm, self.uwzm)
+        args += (self.vthzm, self.thzm)
+        actual = dvmd.utendepfd(*args)
+        for t in range(self.ntime):
+            targs = args[:3] + tuple(arg[t : t + 1] for arg in args[3:])
+            expected = dvmd.utendepfd(*targs)
+            np.testing.assert_array_equal(actual[t : t + 1], expected)
+
+    def test_psitem_time_slices(self):
+        args = (self.time, self.levi, self.lat, self.vzm, self.vthzm, self.thzm)
+        actual = dvmd.psitem(*args)
+        for t in range(self.ntime):
+            targs = args[:3] + tuple(arg[t : t + 1] for arg in args[3:])
+            expected = dvmd.psitem(*targs)
+            np.testing.assert_array_equal(actual[t : t + 1], expected)
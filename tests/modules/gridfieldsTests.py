@@ -0,0 +1,86 @@
+"""
+Grid Fields Unit Tests
+
+The expected values are computed with the point-by-point loops that these functions replace.
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import unittest
+
+import numpy as np
+
+import pyconform.modules.gridfields as gf
+
+
+def expand_latlon_loop(data1, nlat, nlon):
+    data1 = np.ma.getdata(data1)
+    data = np.ma.zeros((data1.shape[0], nlat, nlon))
+    for x in range(nlat):
+        for y in range(nlon):
+            data[:, x, y] = data1
+    data[data >= 1e16] = 1e20
+    return np.ma.masked_values(data, 1e20)
+
+
+def ocean_basin_loop(data1, comp, nbasins):
+    data1 = np.ma.getdata(data1)
+    data = np.ma.zeros((data1.shape[0], data1.shape[4], data1.shape[3], nbasins))
+    for t in range(data1.shape[0]):
+        for x in range(data1.shape[4]):
+            for y in range(data1.shape[3]):
+                data[t, x, y, 0] = data1[t, 1, comp, y, x]
+                data[t, x, y, 1] = data1[t, 0, comp, y, x] - data1[t, 1, comp, y, x]
+                data[t, x, y, 2] = data1[t, 0, comp, y, x]
+    data[data >= 1e16] = 1e20
+    return np.ma.masked_values(data, 1e20)
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.RandomState(3)
+
+    def assertMaskedEqual(self, actual, expected):
+        np.testing.assert_array_equal(
+            np.ma.getmaskarray(actual), np.ma.getmaskarray(expected)
+        )
+        np.testing.assert_array_equal(actual.filled(1e20), expected.filled(1e20))
+
+    def masked(self, *shape):
+        data = self.rng.rand(*shape).astype("f")
+        data[self.rng.rand(*shape) < 0.1] = 1e36
+        mask = self.rng.rand(*shape) < 0.1
+        return np.ma.masked_array(data, mask=mask)
+
+    def test_expand_latlon(self):
+        data = self.masked(12)
+        data[3] = np.ma.masked
+        actual = gf.expand_latlon(data, 4, 5)
+        self.assertEqual(actual.shape, (12, 4, 5))
+        self.assertMaskedEqual(actual, expand_latlon_loop(data, 4, 5))
+
+    def test_ocean_basin(self):
+        data = self.masked(3, 2, 3, 6, 5)
+        land = self.rng.rand(6, 5) < 0.2
+        data[:, 0, :, land] = 1e36
+        data[:, 1, :, land] = 1e36
+        atlantic_land = self.rng.rand(6, 5) < 0.3
+        data[:, 1, :, atlantic_land] = 1e36
+        for comp in range(3):
+            actual = gf.ocean_basin(data, comp, 3)
+            self.assertEqual(actual.shape, (3, 5, 6, 3))
+            self.assertMaskedEqual(actual, ocean_basin_loop(data, comp, 3))
+
+    def test_ocean_basin_basins(self):
+        data = self.masked(2, 2, 1, 3, 4)
+        actual = gf.ocean_basin(data, 0, 4)
+        expected = ocean_basin_loop(data, 0, 4)
+        for basin in range(4):
+            self.assertMaskedEqual(actual[..., basin], expected[..., basin])
+        np.testing.assert_array_equal(actual[..., 3], 0.0)
+
+    def test_ocean_basin_empty(self):
+        data = np.zeros((0, 2, 1, 0, 0), dtype="f")
+        actual = gf.ocean_basin(data, 0, 3)
+        self.assertEqual(actual.shape, (0, 0, 0, 3))
@@ -0,0 +1,79 @@
+"""
+Hybrid-Sigma Pressure Fields Unit Tests
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import unittest
+
+import numpy as np
+
+import pyconform.modules.hybridpres as hpres
+from pyconform.physarray import PhysArray
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.nt = 2
+        self.nlev = 5
+        self.nlat = 3
+        self.nlon = 4
+        rng = np.random.RandomState(11)
+        self.p0 = np.array(100000.0)
+        self.ps = rng.rand(self.nt, self.nlat, self.nlon) * 5000.0 + 95000.0
+        self.ai = np.linspace(0.005, 0.0, self.nlev + 1)
+        self.bi = np.linspace(0.0, 1.0, self.nlev + 1)
+        hpres.clear_cache()
+
+    def test_pressure(self):
+        actual = hpres.pressure(self.p0, self.ps, self.ai, self.bi)
+        expected = np.empty((self.nt, self.nlev + 1, self.nlat, self.nlon))
+        for t in range(self.nt):
+            for j in range(self.nlat):
+                for i in range(self.nlon):
+                    expected[t, :, j, i] = (
+                        self.ai * self.p0 + self.bi * self.ps[t, j, i]
+                    )
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_pressure_cached(self):
+        first = hpres.pressure(self.p0, self.ps, self.ai, self.bi)
+        second = hpres.pressure(self.p0, self.ps.copy(), self.ai, self.bi)
+        self.assertIs(first, second)
+        self.assertFalse(first.flags.writeable)
+        self.assertIsNot(
+            hpres.pressure(self.p0, self.ps + 1.0, self.ai, self.bi), first
+        )
+
+    def test_pressure_not_cached_if_too_large(self):
+        saved = hpres._CACHE_BYTES_
+        hpres._CACHE_BYTES_ = 8
+        try:
+            first = hpres.pressure(self.p0, self.ps, self.ai, self.bi)
+            second = hpres.pressure(self.p0, self.ps, self.ai, self.bi)
+        finally:
+            hpres._CACHE_BYTES_ = saved
+        self.assertIsNot(first, second)
+        np.testing.assert_array_equal(first, second)
+
+    def test_thickness(self):
+        actual = hpres.thickness(self.p0, self.ps, self.ai, self.bi)
+        p = hpres.pressure(self.p0, self.ps, self.ai, self.bi)
+        expected = np.empty((self.nt, self.nlev, self.nlat, self.nlon))
+        for k in range(self.nlev):
+            expected[:, k] = p[:, k + 1] - p[:, k]
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_hybrid_pressure(self):
+        p_p0 = PhysArray(1000.0, name="P0", units="hPa")
+        p_ps = PhysArray(self.ps, name="PS", units="Pa", dimensions=("t", "y", "x"))
+        p_a = PhysArray(self.ai, name="a", dimensions=("z",))
+        p_b = PhysArray(self.bi, name="b", dimensions=("z",))
+        actual = hpres.hybrid_pressure(p_p0, p_ps, p_a, p_b)
+        expected = np.moveaxis(np.asarray(p_a * p_p0 + p_b * p_ps), 0, 1)
+        self.assertEqual(actual.dimensions, ("t", "z", "y", "x"))
+        self.assertEqual(actual.units, "hPa")
+        np.testing.assert_allclose(np.asarray(actual), expected, rtol=1e-14)
+        with self.assertRaises(ValueError):
+            actual[0, 0, 0, 0] = 0.0
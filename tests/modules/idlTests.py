@@ -9,7 +9,13 @@ import unittest
 
 import numpy as np
 
-from pyconform.modules.idl import deriv, int_tabulated, spl_init, spl_interp
+from pyconform.modules.idl import (
+    clear_cache,
+    deriv,
+    int_tabulated,
+    spl_init,
+    spl_interp,
+)
 
 
 class Tests(unittest.TestCase):
@@ -56,3 +62,54 @@ class Tests(unittest.TestCase):
         actual = int_tabulated(x, y)
         expected = 77.627388
         np.testing.assert_array_almost_equal(actual, expected, 5)
+
+    def test_spl_init_columns(self):
+        x = np.array([2.0, 5.0, 7.0, 8.0, 13.0, 14.0])
+        y = np.random.RandomState(5).rand(3, 6, 4)
+        actual = spl_init(x, y, axis=1)
+        for i in range(3):
+            for k in range(4):
+                expected = spl_init(x, y[i, :, k])
+                np.testing.assert_allclose(actual[i, :, k], expected, rtol=1e-12)
+
+    def test_spl_init_cached(self):
+        clear_cache()
+        x = np.array([2.0, 5.0, 7.0, 8.0, 13.0])
+        y = np.array([3.0, 5.0, 4.0, 7.0, 8.0])
+        expected = spl_init(x, y)
+        np.testing.assert_array_equal(spl_init(x.copy(), y), expected)
+        np.testing.assert_array_equal(spl_init(x, y * 2.0), expected * 2.0)
+        actual = spl_init(x, y.astype("f"))
+        self.assertEqual(actual.dtype, np.dtype("f"))
+        np.testing.assert_allclose(actual, expected, rtol=1e-6)
+        clear_cache()
+        np.testing.assert_array_equal(spl_init(x, y), expected)
+
+    def test_spl_interp_cached(self):
+        clear_cache()
+        x = np.array([2.0, 5.0, 7.0, 8.0, 13.0])
+        y = np.array([3.0, 5.0, 4.0, 7.0, 8.0])
+        xi = np.array([3.0, 6.0, 7.5, 9.0])
+        y2 = spl_init(x, y)
+        expected = spl_interp(x, y, y2, xi)
+        np.testing.assert_array_equal(spl_interp(x, y, y2, xi.copy()), expected)
+        clear_cache()
+        np.testing.assert_array_equal(spl_interp(x, y, y2, xi), expected)
+
+    def test_spl_interp_columns(self):
+        x = np.array([2.0, 5.0, 7.0, 8.0, 13.0])
+        y = np.random.RandomState(6).rand(5, 3)
+        xi = np.array([1.0, 3.0, 6.0, 7.5, 9.0, 14.0])
+        actual = spl_interp(x, y, spl_init(x, y), xi)
+        for k in range(3):
+            yk = y[:, k]
+            expected = spl_interp(x, yk, spl_init(x, yk), xi)
+            np.testing.assert_allclose(actual[:, k], expected, rtol=1e-12)
+
+    def test_spl_interp_decreasing(self):
+        x = np.array([2.0, 5.0, 7.0, 8.0, 13.0])
+        y = np.array([3.0, 5.0, 4.0, 7.0, 8.0])
+        xi = np.array([3.0, 6.0, 7.5, 9.0])
+        expected = spl_interp(x, y, spl_init(x, y), xi)
+        actual = spl_interp(x[::-1], y[::-1], spl_init(x[::-1], y[::-1]), xi)
+        np.testing.assert_array_almost_equal(actual, expected, 12)
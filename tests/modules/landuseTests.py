@@ -0,0 +1,115 @@
+"""
+Land Use, Fire and Soil Pool Fields Unit Tests
+
+The expected values are computed with the element-by-element loops that these functions replace.
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import unittest
+
+import numpy as np
+
+import pyconform.modules.landuse as lu
+
+
+def burnt_fraction_loop(data):
+    ml = [31.0, 28.0, 31.0, 30.0, 31.0, 30.0, 31.0, 31.0, 30.0, 31.0, 30.0, 31.0]
+    a = np.ma.zeros(data.shape)
+    i = 0
+    for t in range(data.shape[0]):
+        for x in range(data.shape[1]):
+            for y in range(data.shape[2]):
+                if data[t, x, y] < 1e16:
+                    a[t, x, y] = data[t, x, y] * ml[i] * 86400 * 100
+                else:
+                    a[t, x, y] = 1e20
+        i += 1
+        if i == 12:
+            i = 1
+    a[a >= 1e16] = 1e20
+    return a
+
+
+def reduce_landuse_loop(data):
+    data2 = np.ma.zeros((data.shape[0], 4, data.shape[2], data.shape[3]))
+    for t in range(data.shape[0]):
+        for x in range(data.shape[2]):
+            for y in range(data.shape[3]):
+                data2[t, 0, x, y] = data[t, 0, x, y]
+                data2[t, 1, x, y] = 0
+                data2[t, 2, x, y] = data[t, 1, x, y]
+                data2[t, 3, x, y] = (
+                    data[t, 6, x, y] + data[t, 7, x, y] + data[t, 8, x, y]
+                )
+    data2[data2 >= 1e16] = 1e20
+    return data2
+
+
+def nonwoody_vegetation_loop(pct_nat_pft, pct_crop, landfrac):
+    shape = pct_nat_pft.shape
+    data = np.ma.zeros((shape[0], 4, shape[2], shape[3]))
+    data[:, 0] = pct_nat_pft[:, 12] + pct_nat_pft[:, 13] + pct_nat_pft[:, 14]
+    for t in range(shape[0]):
+        for i in range(shape[2]):
+            for j in range(shape[3]):
+                if landfrac[i, j] <= 1.0:
+                    data[t, 1, i, j] = 0.0
+                    if pct_crop[t, 1, i, j] > 0.0:
+                        data[t, 2, i, j] = 100.0
+                    else:
+                        data[t, 2, i, j] = 0.0
+                    data[t, 3, i, j] = 0.0
+                else:
+                    data[t, 1, i, j] = 1e20
+                    data[t, 2, i, j] = 1e20
+                    data[t, 3, i, j] = 1e20
+    data[data >= 1e16] = 1e20
+    return np.ma.masked_values(data, 1e20)
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.RandomState(5)
+
+    def random(self, *shape):
+        data = self.rng.rand(*shape).astype("f")
+        data[self.rng.rand(*shape) < 0.1] = 1e36
+        return data
+
+    def assertMaskedEqual(self, actual, expected):
+        np.testing.assert_array_equal(
+            np.ma.getmaskarray(actual), np.ma.getmaskarray(expected)
+        )
+        np.testing.assert_array_equal(actual.filled(1e20), expected.filled(1e20))
+
+    def test_burnt_fraction(self):
+        data = self.random(30, 3, 4) * np.float32(1e-7)
+        data[0, 0, 0] = np.nan
+        actual = lu.burnt_fraction(data)
+        self.assertMaskedEqual(actual, burnt_fraction_loop(data))
+
+    def test_reduce_landuse(self):
+        data = self.random(2, 9, 3, 4)
+        actual = lu.reduce_landuse(data)
+        self.assertMaskedEqual(actual, reduce_landuse_loop(data))
+
+    def test_nonwoody_vegetation(self):
+        pct_nat_pft = self.random(2, 15, 3, 4)
+        pct_crop = self.random(2, 2, 3, 4) - 0.5
+        landfrac = self.random(3, 4)
+        landfrac[1, 1] = np.nan
+        actual = lu.nonwoody_vegetation(pct_nat_pft, pct_crop, landfrac)
+        expected = nonwoody_vegetation_loop(pct_nat_pft, pct_crop, landfrac)
+        self.assertMaskedEqual(actual, expected)
+
+    def test_soil_pools(self):
+        pools = [self.random(2, 3, 4) for _ in range(3)]
+        actual = lu.soil_pools(*pools)
+        self.assertEqual(actual.shape, (2, 3, 3, 4))
+        for k in range(3):
+            expected = np.ma.masked_values(
+                np.where(pools[k] >= 1e16, 1e20, pools[k]).astype("d"), 1e20
+            )
+            self.assertMaskedEqual(actual[:, k], expected)
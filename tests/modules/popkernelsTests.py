@@ -0,0 +1,122 @@
+"""
+POP Ocean-Model Kernels Unit Tests
+
+The expected values are computed with the column-by-column loops that the kernels replace, and
+must be identical to the kernel results.
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import unittest
+
+import numpy as np
+
+import pyconform.modules.popkernels as popk
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.nt = 3
+        self.nk = 6
+        self.nj = 5
+        self.ni = 4
+        rng = np.random.RandomState(7)
+        self.KMT = rng.randint(0, self.nk + 1, size=(self.nj, self.ni)).astype("i4")
+        self.KMT[0, 0] = 0
+        self.KMT[0, 1] = self.nk
+        self.dz = rng.rand(self.nk) * 100.0
+        self.data = rng.rand(self.nt, self.nk, self.nj, self.ni).astype("f4")
+        self.data[1, :, 2, 2] = 1e20
+        popk.clear_cache()
+
+    def assertIdentical(self, actual, expected):
+        self.assertEqual(actual.dtype, expected.dtype)
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_depth_mask(self):
+        actual = popk.depth_mask(self.KMT, self.nk)
+        expected = np.empty((self.nk, self.nj, self.ni), dtype=bool)
+        for k in range(self.nk):
+            expected[k] = k < self.KMT
+        self.assertIdentical(actual, expected)
+
+    def test_depth_mask_cached(self):
+        first = popk.depth_mask(self.KMT, self.nk)
+        second = popk.depth_mask(self.KMT.copy(), self.nk)
+        self.assertIs(first, second)
+        self.assertFalse(first.flags.writeable)
+        self.assertIsNot(popk.depth_mask(self.KMT, self.nk + 1), first)
+
+    def test_bottom_layer(self):
+        actual = popk.bottom_layer(self.KMT, self.data)
+        expected = np.zeros((self.nt, self.nj, self.ni), dtype="f4")
+        for j in range(self.nj):
+            for i in range(self.ni):
+                expected[:, j, i] = self.data[:, self.KMT[j, i] - 1, j, i]
+        self.assertIdentical(actual, expected)
+
+    def test_bottom_layer_mult(self):
+        actual = popk.bottom_layer_mult(self.KMT, self.dz, self.data)
+        expected = np.zeros((self.nt, self.nj, self.ni))
+        for t in range(self.nt):
+            for j in range(self.nj):
+                for i in range(self.ni):
+                    k = self.KMT[j, i] - 1
+                    if self.data[t, k, j, i] < 1e16:
+                        expected[t, j, i] = self.dz[k] * self.data[t, k, j, i]
+        self.assertIdentical(actual, expected)
+
+    def test_layer_sum_mult(self):
+        actual = popk.layer_sum_mult(self.KMT, self.dz, self.data)
+        expected = np.zeros((self.nt, self.nj, self.ni))
+        for t in range(self.nt):
+            for j in range(self.nj):
+                for i in range(self.ni):
+                    for k in range(min(self.KMT[j, i], self.nk)):
+                        expected[t, j, i] += self.dz[k] * self.data[t, k, j, i]
+        self.assertIdentical(actual, expected)
+
+    def test_layer_sum_mult_single(self):
+        dz = self.dz.astype("f4")
+        actual = popk.layer_sum_mult(self.KMT, dz, self.data)
+        expected = np.zeros((self.nt, self.nj, self.ni))
+        for t in range(self.nt):
+            for j in range(self.nj):
+                for i in range(self.ni):
+                    for k in range(min(self.KMT[j, i], self.nk)):
+                        expected[t, j, i] += dz[k] * self.data[t, k, j, i]
+        self.assertIdentical(actual, expected)
+
+    def test_level_diff(self):
+        actual = popk.level_diff(self.KMT, self.data)
+        expected = np.empty(self.data.shape, dtype="f4")
+        for t in range(self.nt):
+            for k in range(self.nk):
+                if k < self.nk - 1:
+                    expected[t, k] = np.where(
+                        k < self.KMT - 1,
+                        self.data[t, k] - self.data[t, k + 1],
+                        self.data[t, k],
+                    )
+                else:
+                    expected[t, k] = self.data[t, k]
+        self.assertIdentical(actual, expected)
+
+    def test_fill_below_bottom(self):
+        actual = popk.fill_below_bottom(self.KMT, self.data.astype("d"), 1e20)
+        expected = self.data.astype("d")
+        for t in range(self.nt):
+            for k in range(self.nk):
+                expected[t, k] = np.where(k < self.KMT, expected[t, k], 1e20)
+        self.assertIdentical(actual, expected)
+
+    def test_below_mask(self):
+        actual = popk.below_mask(self.KMT, self.nk)
+        expected = ~popk.depth_mask(self.KMT, self.nk)
+        self.assertIdentical(actual, expected)
+
+    def test_level_diff_double(self):
+        actual = popk.level_diff(self.KMT, self.data, dtype="d")
+        expected = popk.level_diff(self.KMT, self.data).astype("d")
+        self.assertIdentical(actual, expected)
@@ -0,0 +1,137 @@
+"""
+Time Resampling Unit Tests
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import unittest
+
+import numpy as np
+
+import pyconform.modules.resample as rs
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.nyears = 5
+        rng = np.random.RandomState(3)
+        self.monthly = np.ma.masked_array(rng.rand(12 * self.nyears, 2, 3))
+        self.monthly[13, 0, 1] = np.ma.masked
+        self.annual = rng.rand(self.nyears, 2, 3)
+
+    def read(self, data):
+        self.reads = []
+
+        def read(t):
+            self.reads.append(t)
+            return data[t]
+
+        return read
+
+    def test_mask_fill(self):
+        actual = rs.mask_fill(np.array([1.0, 1e17, 1e20, 2.0]))
+        np.testing.assert_array_equal(actual.mask, [False, True, True, False])
+        np.testing.assert_array_equal(actual.data, [1.0, 1e20, 1e20, 2.0])
+
+    def test_annual_mean(self):
+        actual = rs.annual_mean(self.monthly)
+        for y in range(self.nyears):
+            expected = np.ma.average(
+                self.monthly[12 * y : 12 * y + 12], axis=0, weights=rs.DAYS_PER_MONTH
+            )
+            np.testing.assert_allclose(actual[y], expected, rtol=1e-14)
+        self.assertEqual(actual.count(), actual.size)
+
+    def test_annual_mean_incomplete_year(self):
+        actual = rs.annual_mean(self.monthly[:30])
+        self.assertEqual(actual.shape, (2, 2, 3))
+
+    def test_first_and_last_of_year(self):
+        first, last = rs.first_and_last_of_year(np.arange(30))
+        np.testing.assert_array_equal(first, [0, 12])
+        np.testing.assert_array_equal(last, [11, 23])
+
+    def test_monthly_climatology(self):
+        actual = rs.monthly_climatology([self.monthly])
+        for m in range(12):
+            expected = np.ma.mean(self.monthly[m::12], axis=0)
+            np.testing.assert_allclose(actual[m], expected, rtol=1e-14)
+
+    def test_monthly_climatology_chunks(self):
+        data = self.monthly[:53]
+        chunks = rs.read_years(self.read(data), years=2)
+        actual = rs.monthly_climatology(chunks)
+        self.assertEqual(self.reads, [slice(0, 24), slice(24, 48), slice(48, 72)])
+        for m in range(12):
+            expected = np.ma.mean(data[m::12], axis=0)
+            np.testing.assert_allclose(actual[m], expected, rtol=1e-14)
+
+    def test_monthly_climatology_all_masked(self):
+        data = np.ma.masked_all((24, 2))
+        data[:, 0] = 1.0
+        actual = rs.monthly_climatology([data])
+        np.testing.assert_array_equal(actual.mask[:, 1], True)
+        np.testing.assert_array_equal(actual[:, 0], 1.0)
+
+    def test_monthly_climatology_empty(self):
+        with self.assertRaises(ValueError):
+            rs.monthly_climatology([])
+
+    def test_monthly_repeat(self):
+        actual = rs.monthly_repeat(self.annual)
+        for t in range(12 * self.nyears):
+            np.testing.assert_array_equal(actual[t], self.annual[t // 12])
+
+    def test_monthly_times(self):
+        actual = rs.monthly_times([365.0, 730.0])
+        self.assertEqual(actual[0], 15.5)
+        self.assertEqual(actual[11], 349.5)
+        self.assertEqual(actual[12], 380.5)
+
+    def test_read_years(self):
+        chunks = list(rs.read_years(self.read(self.monthly), start=1, stop=4, years=2))
+        self.assertEqual(self.reads, [slice(12, 36), slice(36, 48)])
+        self.assertEqual([len(c) for c in chunks], [24, 12])
+
+    def test_time_index(self):
+        tindex, full_index, dims = rs.time_index(
+            {"t": slice(1, 3), "y": 0}, ("t", "y", "x")
+        )
+        self.assertEqual(tindex, slice(1, 3))
+        self.assertEqual(dims, ("t", "x"))
+        self.assertEqual(
+            full_index(slice(12, 36)), {"t": slice(12, 36), "y": 0, "x": slice(None)}
+        )
+
+    def test_slice_range(self):
+        self.assertEqual(rs.slice_range(slice(2, 5)), (2, 5, slice(None)))
+        self.assertEqual(rs.slice_range(slice(None)), (0, None, slice(None)))
+        self.assertEqual(rs.slice_range(slice(-2, None)), (0, None, slice(-2, None)))
+        self.assertEqual(rs.slice_range(3), (0, None, 3))
+
+    def test_monthly_from_annual(self):
+        times = np.arange(1, self.nyears + 1) * 365.0
+        times[0] = 0.0
+
+        def read(t):
+            self.reads.append(t)
+            return times[t], self.annual[t]
+
+        self.reads = []
+        actual = rs.monthly_from_annual(read, slice(14, 30), rs.monthly_repeat)
+        self.assertEqual(self.reads[-1], slice(2, 4))
+        expected = rs.monthly_repeat(self.annual[1:])[14:30]
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_monthly_from_annual_zero_times(self):
+        times = np.arange(1, self.nyears + 1) * 365.0
+        times[2] = 0.0
+        actual = rs.monthly_from_annual(
+            lambda t: (times[t], self.annual[t]), slice(None), rs.monthly_repeat
+        )
+        self.assertEqual(actual.shape, (12 * self.nyears, 2, 3))
+        np.testing.assert_array_equal(
+            actual[24:36], rs.monthly_repeat(self.annual[3:4])
+        )
+        np.testing.assert_array_equal(actual[-12:], 0.0)
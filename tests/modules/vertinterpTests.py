@@ -0,0 +1,126 @@
+"""
+Hybrid-to-Pressure Vertical Interpolation Unit Tests
+
+The expected values are computed with a column-by-column port of the vinth2p Fortran loops.
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import math
+import unittest
+
+import numpy as np
+
+import pyconform.modules.hybridpres as hpres
+import pyconform.modules.vertinterp as vi
+
+
+def vinth2p_columns(dati, hbcofa, hbcofb, plevo, psfc, intyp, p0, kxtrp, spvl=1e30):
+    def a2ln(a1):
+        return math.log(math.log(a1 + 2.72))
+
+    nlevi = len(hbcofa)
+    dati = dati.reshape((-1,) + dati.shape[-3:])
+    psfc = np.broadcast_to(psfc, (dati.shape[0],) + dati.shape[-2:])
+    dato = np.empty((dati.shape[0], len(plevo)) + dati.shape[-2:])
+    for t in range(dati.shape[0]):
+        for j in range(dati.shape[-2]):
+            for i in range(dati.shape[-1]):
+                plevi = [
+                    (hbcofa[k] * p0) + hbcofb[k] * (psfc[t, j, i] * 0.01)
+                    for k in range(nlevi)
+                ]
+                for k, p in enumerate(plevo):
+                    if p < plevi[0]:
+                        dato[t, k, j, i] = dati[t, 0, j, i] if kxtrp else spvl
+                    elif p > plevi[-1]:
+                        dato[t, k, j, i] = dati[t, -1, j, i] if kxtrp else spvl
+                    else:
+                        kp = 0
+                        while p > plevi[kp + 1]:
+                            kp += 1
+                        d0 = dati[t, kp, j, i]
+                        d1 = dati[t, kp + 1, j, i]
+                        if intyp == 1:
+                            w = (p - plevi[kp]) / (plevi[kp + 1] - plevi[kp])
+                        elif intyp == 2:
+                            w = (math.log(p) - math.log(plevi[kp])) / (
+                                math.log(plevi[kp + 1]) - math.log(plevi[kp])
+                            )
+                        else:
+                            w = (a2ln(p) - a2ln(plevi[kp])) / (
+                                a2ln(plevi[kp + 1]) - a2ln(plevi[kp])
+                            )
+                        dato[t, k, j, i] = d0 + (d1 - d0) * w
+    return dato
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(17)
+        self.nt = 2
+        self.nlev = 8
+        self.nlat = 3
+        self.nlon = 4
+        self.hyam = np.linspace(0.01, 0.0, self.nlev)
+        self.hybm = np.linspace(0.0, 0.98, self.nlev)
+        self.p0 = 1000.0
+        self.ps = rng.rand(self.nt, self.nlat, self.nlon) * 10000.0 + 95000.0
+        self.plevo = np.array([1000.0, 975.0, 850.0, 500.0, 200.0, 10.0, 5.0])
+        self.data = rng.rand(self.nt, self.nlev, self.nlat, self.nlon)
+        vi.clear_cache()
+        hpres.clear_cache()
+
+    def check(self, intyp, kxtrp):
+        args = (self.hyam, self.hybm, self.plevo, self.ps, intyp, self.p0)
+        actual = vi.vinth2p(self.data, *args, extrapolate=kxtrp)
+        expected = vinth2p_columns(self.data, *args, kxtrp)
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+    def test_linear(self):
+        self.check(1, False)
+
+    def test_linear_extrapolate(self):
+        self.check(1, True)
+
+    def test_log(self):
+        self.check(2, False)
+
+    def test_loglog_extrapolate(self):
+        self.check(3, True)
+
+    def test_invalid_intyp(self):
+        with self.assertRaises(ValueError):
+            vi.vinth2p(self.data, self.hyam, self.hybm, self.plevo, self.ps, 4, 1000.0)
+
+    def test_3d(self):
+        args = (self.hyam, self.hybm, self.plevo, self.ps[0], 1, self.p0)
+        actual = vi.vinth2p(self.data[0], *args)
+        expected = vinth2p_columns(self.data[0], *args, False)[0]
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+    def test_surface_pressure_2d(self):
+        args = (self.hyam, self.hybm, self.plevo, self.ps[0], 1, self.p0)
+        actual = vi.vinth2p(self.data, *args)
+        expected = vinth2p_columns(self.data, *args, False)
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+    def test_brackets_cached(self):
+        ps = self.ps * 0.01
+        first = vi.brackets(self.p0, ps, self.hyam, self.hybm, self.plevo)
+        second = vi.brackets(self.p0, ps.copy(), self.hyam, self.hybm, self.plevo)
+        self.assertIs(first, second)
+        third = vi.brackets(self.p0, ps, self.hyam, self.hybm, self.plevo, intyp=2)
+        self.assertIsNot(first, third)
+
+    def test_masked(self):
+        data = np.ma.masked_array(self.data)
+        data[0, -1, 1, 2] = np.ma.masked
+        args = (self.hyam, self.hybm, self.plevo, self.ps, 1, self.p0)
+        actual = vi.vinth2p(data, *args, extrapolate=True)
+        expected = vinth2p_columns(data.filled(np.nan), *args, True)
+        missing = np.isnan(expected)
+        self.assertTrue(missing.any())
+        expected[missing] = 1e30
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
@@ -6,6 +6,7 @@ LICENSE: See the LICENSE.rst file for details
 """
 
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 from pyconform import parsing
 
@@ -664,3 +665,46 @@ class DefinitionParserTests(unittest.TestCase):
         testname = "parse_definition({0!r})".format(indata)
         print_test_message(testname, indata=indata, actual=actual, expected=expected)
         self.assertEqual(actual, expected, "Integrated #5 operator parsing failed")
+
+    def test_parse_cached(self):
+        indata = "mean(chunits(time_bnds, units=time), 'bnds')"
+        first = parsing.parse_definition(indata)
+        second = parsing.parse_definition(
+            " mean( chunits(time_bnds,units=time) ,'bnds')"
+        )
+        testname = "parse_definition({0!r}) is cached".format(indata)
+        print_test_message(testname, first=first, second=second)
+        self.assertIs(first, second, "Parsed definition not cached")
+
+    def test_parse_shared_subexpressions(self):
+        first = parsing.parse_definition("f(x[0:2], y) + 1")
+        second = parsing.parse_definition("g(x[0:2]) * f(x[0:2], y)")
+        testname = "parse_definition shares subexpressions"
+        print_test_message(testname, first=first, second=second)
+        self.assertIs(first.args[0], second.args[1])
+        self.assertIs(first.args[0].args[0], second.args[0].args[0])
+
+    def test_parse_distinguishes_strings_and_variables(self):
+        actual = parsing.parse_definition('f("x")').args[0]
+        expected = "x"
+        testname = "parse_definition('f(\"x\")')"
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected)
+        self.assertIsInstance(parsing.parse_definition("f(x)").args[0], parsing.VarType)
+
+    def test_parse_immutable(self):
+        actual = parsing.parse_definition("f(x, a=1)")
+        with self.assertRaises(TypeError):
+            actual.args.append(2)
+        with self.assertRaises(TypeError):
+            actual.kwds["b"] = 2
+
+    def test_parse_threads(self):
+        indata = ["f(x{0}, y{1}) + x{0}[{1}:]".format(i % 7, i % 5) for i in range(200)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            actual = list(pool.map(parsing.parse_definition, indata))
+        expected = [parsing.parse_definition(s) for s in indata]
+        testname = "parse_definition from several threads"
+        print_test_message(testname, actual=actual[:2], expected=expected[:2])
+        self.assertEqual(actual, expected)
+        self.assertEqual(str(actual[12]), "(f(x5,y2)+x5[2::])")
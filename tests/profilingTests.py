@@ -0,0 +1,188 @@
+"""
+Execution Profiling Unit Tests
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import unittest
+from collections import OrderedDict
+from os import remove
+from os.path import exists
+
+import netCDF4
+import numpy
+from asaptools.simplecomm import create_comm
+
+from pyconform.datasets import InputDatasetDesc
+from pyconform.flownodes import (
+    DataNode,
+    EvalNode,
+    FlowNode,
+    MapNode,
+    ReadNode,
+    WriteNode,
+)
+from pyconform.functions import find_operator
+from pyconform.physarray import PhysArray
+from pyconform.profiling import Profiler
+from pyconform.scheduling import ReadPrefetcher, ReadScheduler
+
+from .testutils import print_test_message
+
+
+class ProfilerTests(unittest.TestCase):
+    """
+    Unit tests for the profiling.Profiler class
+    """
+
+    def setUp(self):
+        d1 = PhysArray(numpy.arange(1, 9.0), name="X1", units="m", dimensions=("x",))
+        d2 = PhysArray(numpy.arange(5, 13.0), name="X2", units="m", dimensions=("x",))
+        self.nodes = [DataNode(d1), DataNode(d2)]
+        self.nodes.append(
+            EvalNode("X3", find_operator("+", numargs=2), *self.nodes[:2])
+        )
+
+    def records(self, records):
+        return {(r["type"], r["label"]): r for r in records["nodes"]}
+
+    def test_records(self):
+        with Profiler() as profiler:
+            self.nodes[2][:]
+            self.nodes[2][0:4]
+            self.nodes[2][None]
+        actual = self.records(profiler.records())
+        testname = "Profiler.records()"
+        print_test_message(testname, actual=actual)
+        self.assertEqual(
+            set(actual), {("DataNode", "X1"), ("DataNode", "X2"), ("EvalNode", "X3")}
+        )
+        for record in actual.values():
+            self.assertEqual(record["calls"], 3)
+            self.assertEqual(record["bytes"], 8 * 8 + 4 * 8)
+            self.assertLessEqual(record["self_seconds"], record["seconds"])
+        if profiler.memory:
+            self.assertGreater(actual[("EvalNode", "X3")]["peak_bytes"], 0)
+        else:
+            self.assertIsNone(actual[("EvalNode", "X3")]["peak_bytes"])
+
+    def test_stop_restores_methods(self):
+        getitems = {
+            cls: cls.__dict__.get("__getitem__") for cls in FlowNode.__subclasses__()
+        }
+        start = WriteNode._start_
+        read = ReadNode._read_
+        schedules = [ReadScheduler.schedule, ReadPrefetcher.schedule]
+        profiler = Profiler(memory=False)
+        profiler.start()
+        self.assertIsNot(EvalNode.__getitem__, getitems[EvalNode])
+        self.assertIsNot(ReadPrefetcher.schedule, schedules[1])
+        profiler.stop()
+        actual = {
+            cls: cls.__dict__.get("__getitem__") for cls in FlowNode.__subclasses__()
+        }
+        testname = "Profiler.stop()"
+        print_test_message(testname, actual=actual, expected=getitems)
+        self.assertEqual(actual, getitems)
+        self.assertIs(WriteNode._start_, start)
+        self.assertIs(ReadNode._read_, read)
+        self.assertEqual([ReadScheduler.schedule, ReadPrefetcher.schedule], schedules)
+
+    def test_not_started(self):
+        profiler = Profiler()
+        self.nodes[2][:]
+        actual = profiler.records()
+        testname = "Profiler.records() not started"
+        print_test_message(testname, actual=actual)
+        self.assertEqual(actual["nodes"], [])
+        self.assertEqual(actual["reads"], [])
+        self.assertEqual(actual["schedule"]["chunks"], 0)
+
+    def test_gather_serial(self):
+        with Profiler(memory=False) as profiler:
+            self.nodes[2][:]
+        actual = profiler.gather(create_comm(serial=True))
+        testname = "Profiler.gather()"
+        print_test_message(testname, actual=actual)
+        self.assertEqual(actual, profiler.records())
+
+    def test_report(self):
+        with Profiler(memory=False) as profiler:
+            self.nodes[2][:]
+        actual = Profiler.report(profiler.records(), top=2)
+        testname = "Profiler.report()"
+        print_test_message(testname, actual=actual)
+        self.assertEqual(len(actual.splitlines()), 8)
+        self.assertIn("Top 2 of 3 data flow nodes", actual)
+        self.assertIn("Top 0 of 0 input variables", actual)
+        self.assertIn("Total time writing 0 files", actual)
+
+
+class ProfilerReadTests(unittest.TestCase):
+    """
+    Unit tests for the profiling of input reads by the profiling.Profiler class
+    """
+
+    def setUp(self):
+        self.filename = "profile_reads.nc"
+        with netCDF4.Dataset(self.filename, "w") as ncfile:
+            ncfile.createDimension("time", 4)
+            ncfile.createDimension("lat", 3)
+            ncvar = ncfile.createVariable("a", "d", ("time", "lat"))
+            ncvar.setncatts({"units": "m"})
+            ncvar[:] = numpy.arange(12, dtype="d").reshape(4, 3)
+        inpds = InputDatasetDesc(filenames=[self.filename])
+        self.rnode = ReadNode(inpds.variables["a"])
+        self.mnode = MapNode("m", self.rnode, {"time": "t", "lat": "y"})
+        self.dmap = {"t": "time", "y": "lat"}
+        self.chunks = [
+            OrderedDict([("t", slice(0, 2)), ("y", slice(None))]),
+            OrderedDict([("t", slice(2, None)), ("y", slice(None))]),
+        ]
+
+    def tearDown(self):
+        if exists(self.filename):
+            remove(self.filename)
+
+    def read(self, scheduler):
+        with Profiler(memory=False) as profiler:
+            if scheduler is not None:
+                scheduler.register(self.mnode)
+                scheduler.plan(self.chunks)
+            try:
+                for chunk in self.chunks:
+                    if scheduler is not None:
+                        scheduler.schedule(chunk)
+                    self.mnode[chunk]
+            finally:
+                if scheduler is not None:
+                    scheduler.unregister()
+        return profiler.records()
+
+    def test_direct_reads(self):
+        actual = self.read(None)
+        testname = "Profiler.records() direct reads"
+        print_test_message(testname, actual=actual)
+        reads = actual["reads"]
+        # Each chunk of the MapNode reads the (empty) metadata of its input, then its data
+        self.assertEqual(
+            [(r["file"], r["label"], r["calls"], r["bytes"]) for r in reads],
+            [(self.filename, "a", 4, 12 * 8)],
+        )
+        self.assertEqual(actual["schedule"]["chunks"], 0)
+
+    def test_scheduled_reads(self):
+        for scheduler in (ReadScheduler(self.dmap), ReadPrefetcher(self.dmap)):
+            actual = self.read(scheduler)
+            testname = "Profiler.records() reads with {}".format(
+                type(scheduler).__name__
+            )
+            print_test_message(testname, actual=actual)
+            reads = actual["reads"]
+            self.assertEqual([(r["calls"], r["bytes"]) for r in reads], [(4, 12 * 8)])
+            self.assertGreater(reads[0]["seconds"], 0.0)
+            schedule = actual["schedule"]
+            self.assertEqual(schedule["chunks"], 2)
+            self.assertGreater(schedule["read_seconds"], 0.0)
+            self.assertGreater(schedule["wait_seconds"], 0.0)
@@ -0,0 +1,204 @@
+"""
+Read Scheduling Unit Tests
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import unittest
+from collections import OrderedDict
+from os import remove
+from os.path import exists
+
+import netCDF4
+import numpy
+
+from pyconform.datasets import InputDatasetDesc
+from pyconform.flownodes import EvalNode, MapNode, ReadNode
+from pyconform.functions import find_operator
+from pyconform.scheduling import ReadPrefetcher, ReadScheduler
+
+from .testutils import print_test_message
+
+
+class ReadSchedulerTests(unittest.TestCase):
+    """
+    Unit tests for the scheduling.ReadScheduler class
+    """
+
+    def setUp(self):
+        self.filenames = ["sched1.nc", "sched2.nc"]
+        self.shape = OrderedDict([("time", 4), ("lat", 3)])
+        for n, fname in enumerate(self.filenames):
+            with netCDF4.Dataset(fname, "w") as ncfile:
+                for d, s in self.shape.items():
+                    ncfile.createDimension(d, s)
+                for v in ("b{}".format(n), "a{}".format(n)):
+                    ncvar = ncfile.createVariable(v, "d", tuple(self.shape))
+                    ncvar.setncatts({"units": "m"})
+                    ncvar[:] = numpy.arange(12, dtype="d").reshape(4, 3) + n
+        self.inpds = InputDatasetDesc(filenames=self.filenames)
+        self.dmap = {"t": "time", "y": "lat"}
+        self.rnodes = {
+            v: ReadNode(self.inpds.variables[v]) for v in self.inpds.variables
+        }
+        add = find_operator("+", numargs=2)
+        self.enode = EvalNode("+", add, self.rnodes["a0"], self.rnodes["b0"])
+        self.mnodes = [
+            MapNode("m0", self.enode, dict((i, o) for o, i in self.dmap.items())),
+            MapNode(
+                "m1", self.rnodes["a1"], dict((i, o) for o, i in self.dmap.items())
+            ),
+        ]
+
+    def tearDown(self):
+        for fname in self.filenames:
+            if exists(fname):
+                remove(fname)
+
+    def test_register_groups(self):
+        scheduler = ReadScheduler(self.dmap)
+        scheduler.register(*self.mnodes)
+        testname = "ReadScheduler.register().groups"
+        actual = {f: [rn.label for rn in rns] for f, rns in scheduler.groups.items()}
+        expected = {"sched1.nc": ["b0", "a0"], "sched2.nc": ["a1"]}
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+        self.assertIs(self.rnodes["a0"].scheduler, scheduler)
+
+    def test_unregister(self):
+        scheduler = ReadScheduler(self.dmap)
+        scheduler.register(*self.mnodes)
+        scheduler.unregister()
+        testname = "ReadScheduler.unregister()"
+        actual = (len(scheduler.groups), self.rnodes["a0"].scheduler)
+        expected = (0, None)
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+    def test_schedule_fetch(self):
+        scheduler = ReadScheduler(self.dmap)
+        chunk = OrderedDict([("t", slice(1, 3)), ("y", slice(None))])
+        expected = [mnode[chunk] for mnode in self.mnodes]
+        scheduler.register(*self.mnodes)
+        scheduler.schedule(chunk)
+        testname = "ReadScheduler.schedule({})".format(chunk)
+        actual = [mnode[chunk] for mnode in self.mnodes]
+        print_test_message(testname, actual=actual, expected=expected)
+        for a, e in zip(actual, expected):
+            numpy.testing.assert_array_equal(
+                numpy.asarray(a), numpy.asarray(e), "{} failed".format(testname)
+            )
+            self.assertEqual(a.name, e.name, "{} failed".format(testname))
+            self.assertEqual(a.dimensions, e.dimensions, "{} failed".format(testname))
+        self.assertEqual(len(scheduler._cache), 0, "{} failed".format(testname))
+
+    def test_fetch_once(self):
+        scheduler = ReadScheduler(self.dmap)
+        chunk = OrderedDict([("t", slice(0, 2)), ("y", slice(None))])
+        scheduler.register(*self.mnodes)
+        scheduler.schedule(chunk)
+        index = scheduler.input_index(chunk)
+        rnode = self.rnodes["a1"]
+        testname = "ReadScheduler.fetch(a1, {})".format(index)
+        first = scheduler.fetch(rnode, index)
+        second = scheduler.fetch(rnode, index)
+        print_test_message(testname, first=first, second=second)
+        self.assertIsNotNone(first, "{} failed".format(testname))
+        self.assertIsNone(second, "{} failed".format(testname))
+
+    def test_shared_read(self):
+        scheduler = ReadScheduler(self.dmap)
+        chunk = OrderedDict([("t", slice(0, 2)), ("y", slice(None))])
+        rnode = ReadNode(self.inpds.variables["a1"])
+        mnode = MapNode("m2", rnode, dict((i, o) for o, i in self.dmap.items()))
+        scheduler.register(mnode, *self.mnodes)
+        scheduler.schedule(chunk)
+        index = scheduler.input_index(chunk)
+        testname = "ReadScheduler.fetch() of a shared read"
+        first = scheduler.fetch(rnode, index)
+        second = scheduler.fetch(self.rnodes["a1"], index)
+        print_test_message(testname, first=first, second=second)
+        self.assertIsNot(first, second, "{} failed".format(testname))
+        numpy.testing.assert_array_equal(numpy.asarray(first), numpy.asarray(second))
+        first[...] = 0
+        self.assertEqual(second.sum(), 21.0, "{} failed".format(testname))
+
+    def test_clear_unschedules_unused(self):
+        scheduler = ReadScheduler(self.dmap)
+        chunk = OrderedDict([("t", slice(0, 2)), ("y", slice(None))])
+        scheduler.register(*self.mnodes)
+        scheduler.schedule(chunk)
+        self.mnodes[1][chunk]
+        scheduler.clear()
+        scheduler.schedule(chunk)
+        testname = "ReadScheduler.clear()"
+        actual = sorted(rn.label for rn, _ in scheduler._cache)
+        expected = ["a1"]
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
+
+
+class ReadPrefetcherTests(ReadSchedulerTests):
+    """
+    Unit tests for the scheduling.ReadPrefetcher class
+    """
+
+    def test_depth_invalid(self):
+        testname = "ReadPrefetcher(depth=0)"
+        print_test_message(testname)
+        self.assertRaises(ValueError, ReadPrefetcher, self.dmap, depth=0)
+
+    def test_plan_schedule_fetch(self):
+        prefetcher = ReadPrefetcher(self.dmap, depth=2)
+        chunks = [
+            OrderedDict([("t", slice(i, i + 1)), ("y", slice(None))]) for i in range(4)
+        ]
+        expected = [[mnode[chunk] for mnode in self.mnodes] for chunk in chunks]
+        prefetcher.register(*self.mnodes)
+        prefetcher.plan(chunks)
+        actual = []
+        for chunk in chunks:
+            prefetcher.schedule(chunk)
+            actual.append([mnode[chunk] for mnode in self.mnodes])
+            self.assertEqual(len(prefetcher._cache), 0)
+        prefetcher.unregister()
+        testname = "ReadPrefetcher.plan().schedule()"
+        print_test_message(testname, actual=actual, expected=expected)
+        for achunk, echunk in zip(actual, expected):
+            for a, e in zip(achunk, echunk):
+                numpy.testing.assert_array_equal(
+                    numpy.asarray(a), numpy.asarray(e), "{} failed".format(testname)
+                )
+
+    def test_schedule_out_of_plan(self):
+        prefetcher = ReadPrefetcher(self.dmap)
+        chunks = [
+            OrderedDict([("t", slice(i, i + 1)), ("y", slice(None))]) for i in range(4)
+        ]
+        prefetcher.register(*self.mnodes)
+        prefetcher.plan(chunks)
+        chunk = chunks[2]
+        expected = numpy.asarray(self.rnodes["a1"][{"time": slice(2, 3)}])
+        prefetcher.schedule(chunk)
+        testname = "ReadPrefetcher.schedule() out of plan"
+        actual = numpy.asarray(self.mnodes[1][chunk])
+        print_test_message(testname, actual=actual, expected=expected)
+        numpy.testing.assert_array_equal(actual, expected, "{} failed".format(testname))
+        self.assertIsNone(prefetcher._thread, "{} failed".format(testname))
+        prefetcher.unregister()
+
+    def test_unregister_stops_thread(self):
+        prefetcher = ReadPrefetcher(self.dmap)
+        chunks = [
+            OrderedDict([("t", slice(i, i + 1)), ("y", slice(None))]) for i in range(4)
+        ]
+        prefetcher.register(*self.mnodes)
+        prefetcher.plan(chunks)
+        thread = prefetcher._thread
+        prefetcher.unregister()
+        testname = "ReadPrefetcher.unregister()"
+        actual = (thread.is_alive(), prefetcher._thread, self.rnodes["a0"].scheduler)
+        expected = (False, None, None)
+        print_test_message(testname, actual=actual, expected=expected)
+        self.assertEqual(actual, expected, "{} failed".format(testname))
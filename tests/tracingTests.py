@@ -0,0 +1,96 @@
+"""
+Execution Tracing Unit Tests
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import json
+import unittest
+from os import remove
+from os.path import exists
+from threading import Thread
+
+from asaptools.simplecomm import create_comm
+
+from pyconform.tracing import Tracer, span
+
+from .testutils import print_test_message
+
+
+class TracerTests(unittest.TestCase):
+    """
+    Unit tests for the tracing.Tracer class
+    """
+
+    def setUp(self):
+        self.filename = "trace.json"
+
+    def tearDown(self):
+        if exists(self.filename):
+            remove(self.filename)
+
+    def spans(self, events):
+        return [e for e in events if e["ph"] == "X"]
+
+    def test_span_inactive(self):
+        tracer = Tracer()
+        with span("a"):
+            pass
+        actual = self.spans(tracer.events())
+        testname = "span() inactive"
+        print_test_message(testname, actual=actual, expected=[])
+        self.assertEqual(actual, [])
+
+    def test_span_nested(self):
+        with Tracer(rank=3) as tracer:
+            with span("outer", chunk=1):
+                with span("inner", file="x.nc"):
+                    pass
+        with span("after"):
+            pass
+        actual = self.spans(tracer.events())
+        testname = "span() nested"
+        print_test_message(testname, actual=actual)
+        self.assertEqual([e["name"] for e in actual], ["inner", "outer"])
+        self.assertEqual([e["args"] for e in actual], [{"file": "x.nc"}, {"chunk": 1}])
+        self.assertEqual({(e["pid"], e["tid"]) for e in actual}, {(3, 0)})
+        inner, outer = actual
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertLessEqual(
+            inner["ts"] + inner["dur"], outer["ts"] + outer["dur"] + 1e-3
+        )
+
+    def test_threads(self):
+        def run():
+            with span("thread"):
+                pass
+
+        with Tracer() as tracer:
+            with span("main"):
+                thread = Thread(target=run, name="reader")
+                thread.start()
+                thread.join()
+        events = tracer.events()
+        actual = {
+            e["args"]["name"]: e["tid"] for e in events if e["name"] == "thread_name"
+        }
+        testname = "Tracer.events() threads"
+        print_test_message(testname, actual=actual)
+        self.assertEqual(actual["reader"], 1)
+        self.assertEqual(
+            {e["name"]: e["tid"] for e in self.spans(events)}, {"main": 0, "thread": 1}
+        )
+
+    def test_gather_write(self):
+        with Tracer() as tracer:
+            with span("a"):
+                pass
+        events = tracer.gather(create_comm(serial=True))
+        Tracer.write(events, self.filename)
+        with open(self.filename) as fobj:
+            actual = json.load(fobj)
+        testname = "Tracer.write()"
+        print_test_message(testname, actual=actual)
+        self.assertEqual(actual["traceEvents"], tracer.events())
+        self.assertEqual(actual["traceEvents"][0]["args"], {"name": "rank 0"})
@@ -0,0 +1,191 @@
+"""
+Command-Line Interface Unit Tests
+
+Copyright 2017-2020, University Corporation for Atmospheric Research
+LICENSE: See the LICENSE.rst file for details
+"""
+
+import json
+import unittest
+from collections import OrderedDict
+from copy import deepcopy
+from os import remove
+from os.path import exists
+
+import numpy
+from netCDF4 import Dataset as NCDataset
+
+from pyconform.cli import xconform
+
+from .testutils import print_test_message
+
+
+class XconformTests(unittest.TestCase):
+    """
+    Unit tests for the xconform command-line tool with multiple standardization files
+    """
+
+    def setUp(self):
+        self.infile = "xconform_in.nc"
+        self.stdfiles = ["xconform_a.json", "xconform_b.json"]
+        self.outfiles = ["xconform_a_u.nc", "xconform_b_u.nc"]
+        self.profile = "xconform_profile.json"
+        self.cleanFiles()
+
+        self.u = numpy.arange(6, dtype="f").reshape(3, 2)
+        with NCDataset(self.infile, "w") as ncf:
+            ncf.createDimension("time")
+            ncf.createDimension("lat", 2)
+            time = ncf.createVariable("time", "d", ("time",))
+            time.setncatts(
+                {
+                    "units": "days since 1979-01-01 0:0:0",
+                    "calendar": "noleap",
+                    "standard_name": "time",
+                }
+            )
+            time[:] = numpy.arange(3, dtype="d")
+            lat = ncf.createVariable("lat", "d", ("lat",))
+            lat.setncatts({"units": "degrees_north", "standard_name": "latitude"})
+            lat[:] = [-45.0, 45.0]
+            u = ncf.createVariable("u", "f", ("time", "lat"))
+            u.setncatts({"units": "m"})
+            u[:] = self.u
+
+        coords = OrderedDict(
+            [
+                (
+                    "time",
+                    {
+                        "datatype": "double",
+                        "dimensions": ["time"],
+                        "definition": "time",
+                        "attributes": OrderedDict(
+                            [
+                                ("units", "days since 1979-01-01 0:0:0"),
+                                ("calendar", "noleap"),
+                                ("standard_name", "time"),
+                                ("axis", "T"),
+                            ]
+                        ),
+                    },
+                ),
+                (
+                    "lat",
+                    {
+                        "datatype": "double",
+                        "dimensions": ["lat"],
+                        "definition": "lat",
+                        "attributes": {"units": "degrees_north", "axis": "Y"},
+                    },
+                ),
+            ]
+        )
+        self.specs = OrderedDict()
+        for stdfile, outfile in zip(self.stdfiles, self.outfiles):
+            spec = deepcopy(coords)
+            spec["u"] = {
+                "datatype": "float",
+                "dimensions": ["time", "lat"],
+                "definition": "u",
+                "attributes": {"units": "m"},
+                "file": {"filename": outfile, "format": "NETCDF4_CLASSIC"},
+            }
+            self.specs[stdfile] = spec
+
+    def tearDown(self):
+        self.cleanFiles()
+
+    def cleanFiles(self):
+        for fname in [self.infile, self.profile] + self.stdfiles + self.outfiles:
+            if exists(fname):
+                remove(fname)
+
+    def writeSpecs(self):
+        for stdfile, spec in self.specs.items():
+            with open(stdfile, "w") as fobj:
+                json.dump(spec, fobj)
+
+    def test_cli_stdfiles(self):
+        argv = ["-f", self.stdfiles[0], "--stdfile", self.stdfiles[1], self.infile]
+        actual = xconform.cli(argv).stdfiles
+        expected = self.stdfiles
+        print_test_message("cli(-f A --stdfile B)", actual=actual, expected=expected)
+        self.assertEqual(actual, expected)
+
+    def test_output_datasets_shared_coordinates(self):
+        outdss = xconform.output_datasets(self.specs)
+        actual = {s: sorted(outdss[s].files) for s in outdss}
+        expected = {s: [f] for s, f in zip(self.stdfiles, self.outfiles)}
+        print_test_message("output_datasets() files", actual=actual, expected=expected)
+        self.assertEqual(actual, expected)
+        for outds in outdss.values():
+            self.assertEqual(sorted(outds.variables), ["lat", "time", "u"])
+
+    def test_output_datasets_different_definitions(self):
+        self.specs[self.stdfiles[1]]["u"]["definition"] = "2 * u"
+        outdss = xconform.output_datasets(self.specs)
+        actual = [outdss[s].variables["u"].definition for s in self.stdfiles]
+        expected = ["u", "2 * u"]
+        print_test_message(
+            "output_datasets() definitions", actual=actual, expected=expected
+        )
+        self.assertEqual(actual, expected)
+
+    def test_output_datasets_same_output_file(self):
+        self.specs[self.stdfiles[1]]["u"]["file"]["filename"] = self.outfiles[0]
+        print_test_message("output_datasets() with the same output file")
+        with self.assertRaisesRegex(ValueError, self.outfiles[0]):
+            xconform.output_datasets(self.specs)
+
+    def test_main_different_definitions(self):
+        self.specs[self.stdfiles[1]]["u"]["definition"] = "2 * u"
+        self.writeSpecs()
+        argv = ["-s", "-f", self.stdfiles[0], "-f", self.stdfiles[1], self.infile]
+        xconform.main(argv)
+        for outfile, factor in zip(self.outfiles, [1, 2]):
+            with NCDataset(outfile) as ncf:
+                actual = ncf.variables["u"][:]
+                self.assertEqual(sorted(ncf.variables), ["lat", "time", "u"])
+            expected = factor * self.u
+            print_test_message(
+                "main() {}".format(outfile), actual=actual, expected=expected
+            )
+            numpy.testing.assert_array_equal(actual, expected)
+
+    def test_main_different_files(self):
+        self.writeSpecs()
+        argv = ["-s", "-f", self.stdfiles[0], "-f", self.stdfiles[1], self.infile]
+        xconform.main(argv)
+        for outfile in self.outfiles:
+            with NCDataset(outfile) as ncf:
+                actual = ncf.variables["u"][:]
+            print_test_message(
+                "main() {}".format(outfile), actual=actual, expected=self.u
+            )
+            numpy.testing.assert_array_equal(actual, self.u)
+
+    def readBytes(self, argv):
+        xconform.main(argv + ["--profile", self.profile, self.infile])
+        with open(self.profile) as fobj:
+            records = json.load(fobj)
+        return sum(r["bytes"] for r in records["reads"] if r["label"].startswith("u"))
+
+    def test_main_fanout_shared_reads(self):
+        self.specs[self.stdfiles[1]]["u"]["definition"] = "2 * u"
+        self.writeSpecs()
+        argv = ["-s", "-f", self.stdfiles[0], "-f", self.stdfiles[1], "-c", "time,1"]
+        actual = self.readBytes(argv + ["--fanout", "2"])
+        expected = self.u.nbytes
+        print_test_message(
+            "main(--fanout 2) bytes of u read", actual=actual, expected=expected
+        )
+        self.assertEqual(actual, expected)
+        self.assertEqual(self.readBytes(argv), 2 * expected)
+        for outfile, factor in zip(self.outfiles, [1, 2]):
+            with NCDataset(outfile) as ncf:
+                numpy.testing.assert_array_equal(ncf.variables["u"][:], factor * self.u)
+
+
+if __name__ == "__main__":
+    unittest.main()